@@ -4,171 +4,606 @@ Simple MVP for product selection, quote calculation, and proposal/invoice genera
 """
 
 import streamlit as st
-import gspread
 from google.oauth2.service_account import Credentials
 import pandas as pd
+import json
+import os
+import time
+import io
+import csv
+import threading
+import sqlite3
+from functools import partial
 from datetime import datetime
+from pathlib import Path
+from types import MappingProxyType
+from pricing import (
+    round_to_nearest_five,
+    parse_tariff_rate,
+    calculate_product_tariff,
+    compile_pricing_table,
+    build_catalog_index,
+    prepare_catalog,
+    catalog_to_sheet_text,
+    get_unit_price,
+    quote_catalog,
+    clean_price,
+    calculate_product_totals,
+    calculate_order_totals,
+    calculate_order_moq,
+    MOQ_MINIMUM_ORDER_VALUE
+)
+from sheets_client import authorize
+from performance import create_timing_store, record_timing, timing_summary
+from catalog_source import GoogleSheetsSource, LocalFileSource, load_catalog_frames
+from quote_store import (
+    init_quote_store,
+    save_quote,
+    count_quotes,
+    list_quotes,
+    load_quote,
+    delete_quote
+)
+
+# ===== GOOGLE SHEETS CONNECTION =====
+# Spreadsheet and sheet layout settings (soft-coded for easy modification)
+SPREADSHEET_NAME = "master_pricing_template_10_14"
+
+# Quantities and markups used for the catalog price sheet download
+PRICE_SHEET_QUANTITIES = [25, 50, 100, 250, 500, 1000]
+PRICE_SHEET_MARKUPS = [100.0]
+
+# Local snapshot of the parsed sheets, served instantly when a new server process starts
+# (Google Sheets only - local catalog files load quickly and must not replace it)
+SNAPSHOT_DIR = Path(__file__).parent / ".pricing_snapshot"
+SNAPSHOT_FILES = ["template.parquet", "metadata.parquet", "partner_info.parquet"]
+
+# Background refresh: a server thread checks Google Sheets for changes this often,
+# so users never wait for a download (see catalog_prefetch_loop)
+CATALOG_REFRESH_SECONDS = 60
+PREFETCH_THREAD_NAME = "catalog-prefetch"  # One background refresh thread per server process
+# While Google Sheets is unavailable, the last good data is served and the download retried this often
+STALE_RETRY_SECONDS = 60
+# Open pages check for a new catalog version this often and rerun to show the new prices
+CATALOG_WATCH_SECONDS = 30
+
+# Saved quotes ("Recent Orders"), kept across sessions and restarts (see quote_store.py).
+# Set PBP_QUOTE_STORE to a database file to use instead (e.g. a temporary one for benchmarks)
+QUOTE_STORE_ENV_VAR = "PBP_QUOTE_STORE"
+QUOTE_STORE_PATH = Path(os.environ.get(QUOTE_STORE_ENV_VAR) or Path(__file__).parent / "saved_quotes.db")
+RECENT_ORDERS_PAGE_SIZE = 5  # Saved quotes shown per sidebar page
+
+# Oldest Streamlit with every feature used here: lazy deliverable tabs (1.55) and
+# downloads written when clicked (download_button with a function, 1.52)
+MIN_STREAMLIT_VERSION = (1, 55)
+
+# Offline mode: set this environment variable to an .xlsx workbook or a folder of
+# per-sheet CSV files to load the catalog locally instead of from Google Sheets
+# (e.g. PBP_PRICING_DATA_FILE="templates/Partner Specific Pricing Template.xlsx")
+LOCAL_DATA_ENV_VAR = "PBP_PRICING_DATA_FILE"
+
+# Performance instrumentation (opt-in): PBP_PERFORMANCE=1 times the data load, each numbered
+# section and each CSV download, and shows the timings in a sidebar "Performance" expander.
+# PBP_PERFORMANCE=log also logs every timing as a JSON line with rolling p50/p95 (see performance.py)
+PERFORMANCE_ENV_VAR = "PBP_PERFORMANCE"
+PERFORMANCE_MODE = os.environ.get(PERFORMANCE_ENV_VAR, "").strip().lower()
+PERFORMANCE_ENABLED = PERFORMANCE_MODE not in ("", "0", "false", "no")
+
+def connect_to_sheets():
+    """
+    Connect to Google Sheets using service account credentials.
+    The client reuses pooled connections and retries quota/server errors (see sheets_client.py).
+    """
+    creds_info = st.secrets["gcp_service_account"]
+    scopes = [
+        "https://www.googleapis.com/auth/spreadsheets",
+        "https://www.googleapis.com/auth/drive"
+    ]
+    creds = Credentials.from_service_account_info(creds_info, scopes=scopes)
+    return authorize(creds)
 
-# ===== HELPER FUNCTIONS =====
-def apply_marketing_rounding(price, enabled=True):
-    """Apply charm pricing: round whole dollar amounts down by $1 (e.g., $60 -> $59)"""
-    if enabled and price % 1 == 0:
-        return price - 1
-    return price
+def open_spreadsheet():
+    """
+    Open the pricing spreadsheet.
+    Called once by the catalog source, which keeps the Spreadsheet (and its
+    connection) for every later load - no Streamlit cache, so the background
+    refresh thread can use it too.
+    """
+    gc = connect_to_sheets()
+    return gc.open(SPREADSHEET_NAME)
 
-def round_to_nearest_five(price, enabled=True):
-    """Round price to the nearest multiple of 5 (e.g., $17.50 -> $20, $12.30 -> $10)"""
-    if enabled:
-        return round(price / 5) * 5
-    return price
+@st.cache_resource
+def get_catalog_source():
+    """
+    Where the pricing catalog comes from (see catalog_source.py):
+    a local file if LOCAL_DATA_ENV_VAR is set, otherwise the Google Sheet.
+    """
+    local_path = os.environ.get(LOCAL_DATA_ENV_VAR)
+    if local_path:
+        return LocalFileSource(local_path)
+    return GoogleSheetsSource(open_spreadsheet, SPREADSHEET_NAME)
 
-def calculate_moq(unit_price):
+@st.cache_data(ttl=60)  # Check for changes at most once a minute
+def get_sheet_modified_time():
     """
-    Calculate Minimum Order Quantity based on $1,000 minimum order value.
-    Formula: MOQ = ceil(1000 / Unit Price)
+    Ask the catalog source when the data was last modified
+    (for Google Sheets, Drive's modification time, e.g. '2025-10-14T17:49:04.000Z').
+    This is a tiny request, so it is cheap compared to downloading the sheets.
+    Returns None if the check fails (the data is then downloaded again).
     """
-    import math
-    if unit_price <= 0:
+    return read_modified_time(get_catalog_source())
+
+def read_modified_time(source):
+    """The source's last modification time, or None if the check fails (no Streamlit cache)."""
+    try:
+        return source.get_modified_time()
+    except Exception:
         return None
-    return math.ceil(1000 / unit_price)
 
-def calculate_credit_card_fee(total, apply_fee=False, fee_percent=2.9):
+@st.cache_resource
+def get_catalog_cache():
+    """
+    Process-wide store for the pricing catalog, shared by every user session.
+    'catalog' holds the current catalog version (see publish_catalog); a refresh
+    swaps in a new version, so all sessions see new prices on their next rerun.
+    The other keys track where the data came from and whether Sheets is failing.
+    """
+    return {
+        'lock': threading.Lock(),
+        'catalog': None,  # Current catalog version (read-only)
+        'source': None,
+        'checked_at': None,  # When the data was last confirmed current
+        'last_error': None,  # Set while Google Sheets is failing (the data is stale)
+        'prefetch_thread': None,  # Background refresh thread (see start_catalog_prefetch)
+        'wake': threading.Event()  # Set to make the background thread check right away
+    }
+
+def publish_catalog(cache, frames, modified_time, loaded_at, download_seconds=None):
+    """
+    Build a new catalog version from the three DataFrames and make it current.
+    download_seconds: how long the download from the source took (None for a snapshot).
+    The version is read-only and never changed after publishing: a refresh
+    publishes a new one in a single swap, so a session never sees a mix of
+    old and new data. Call with the catalog lock held.
+    """
+    previous = cache['catalog']
+    df_template, df_metadata, df_partner_info = frames
+
+    cache['catalog'] = MappingProxyType({
+        'version': previous['version'] + 1 if previous is not None else 1,
+        'df_template': df_template,
+        'df_metadata': df_metadata,
+        'df_partner_info': df_partner_info,
+        'pricing_table': compile_pricing_table(df_template),
+        'catalog_index': build_catalog_index(df_template),
+        'modified_time': modified_time,
+        'loaded_at': loaded_at,
+        'download_seconds': download_seconds
+    })
+    return cache['catalog']
+
+def get_catalog():
+    """The current catalog version (None until the first load)."""
+    return get_catalog_cache()['catalog']
+
+def download_pricing_data(source):
+    """
+    Download pricing data from the catalog source (the master_pricing_template_10_14
+    Google Sheet, in one batched request). Loads three sheets: Template, Metadata,
+    Partner-Specific Info. Returns three DataFrames.
+    """
+    return load_catalog_frames(source)
+
+def save_snapshot(source, frames, modified_time):
+    """
+    Save the three DataFrames to local Parquet files, stamped with the
+    sheet's modification time. Best effort: failures are ignored.
+    """
+    if not isinstance(source, GoogleSheetsSource):
+        return
+    try:
+        SNAPSHOT_DIR.mkdir(exist_ok=True)
+        for file_name, df in zip(SNAPSHOT_FILES, frames):
+            temp_path = SNAPSHOT_DIR / (file_name + ".tmp")
+            df.to_parquet(temp_path)
+            os.replace(temp_path, SNAPSHOT_DIR / file_name)
+
+        # Write the version stamp last so it only points at complete files
+        version = {'modified_time': modified_time, 'saved_at': datetime.now().isoformat()}
+        temp_path = SNAPSHOT_DIR / "version.json.tmp"
+        temp_path.write_text(json.dumps(version))
+        os.replace(temp_path, SNAPSHOT_DIR / "version.json")
+    except Exception:
+        pass
+
+def load_snapshot():
+    """
+    Load the three DataFrames from the local snapshot.
+    Returns (frames, modified_time, saved_at), or (None, None, None) if there is no usable snapshot.
+    """
+    if not isinstance(get_catalog_source(), GoogleSheetsSource):
+        return None, None, None
+    try:
+        version = json.loads((SNAPSHOT_DIR / "version.json").read_text())
+        frames = tuple(pd.read_parquet(SNAPSHOT_DIR / file_name) for file_name in SNAPSHOT_FILES)
+        # Snapshots keep the typed columns; older all-text snapshots are typed here
+        frames = (prepare_catalog(frames[0]),) + frames[1:]
+        return frames, version.get('modified_time'), datetime.fromisoformat(version['saved_at'])
+    except Exception:
+        return None, None, None
+
+def refresh_pricing_data():
     """
-    Calculate credit card processing fee if applicable.
-    Default rate: 2.9%
+    Refresh the shared catalog, downloading it only when the sheet has changed.
+    Returns the current catalog version (see refresh_catalog).
     """
-    if apply_fee:
-        return total * (fee_percent / 100)
-    return 0.0
+    return refresh_catalog(get_catalog_cache(), get_catalog_source(), get_sheet_modified_time())
 
-def parse_tier_info(tier_string):
+def refresh_catalog(cache, source, modified_time):
+    """
+    Refresh a catalog cache from a catalog source, given the source's current
+    modification time: if nothing changed since the last download, the current
+    catalog version is kept without any download. If the sheet changed, it is
+    reloaded in full (Sheets has no per-row change feed): the new data is typed,
+    a new catalog version is published and the local snapshot is updated.
+    Makes no Streamlit calls, so the background thread can use it.
+    Returns the current catalog version.
+    """
+    with cache['lock']:
+        catalog = cache['catalog']
+        if (catalog is not None
+                and modified_time is not None
+                and modified_time == catalog['modified_time']):
+            cache['source'] = source.name  # Snapshot (if any) is confirmed current
+            cache['checked_at'] = datetime.now()
+            cache['last_error'] = None
+            return catalog
+
+        download_start = time.perf_counter()
+        frames = download_pricing_data(source)
+        download_seconds = time.perf_counter() - download_start
+
+        catalog = publish_catalog(cache, frames, modified_time, datetime.now(), download_seconds)
+        cache['source'] = source.name
+        cache['checked_at'] = catalog['loaded_at']
+        cache['last_error'] = None
+        save_snapshot(source, frames, modified_time)
+        return catalog
+
+def catalog_prefetch_loop(target):
     """
-    Parse 'T1: 1-25, T2: 26-50, ...' into dict of tier ranges.
-    Returns: {1: (1, 25), 2: (26, 50), ...}
+    Background thread that keeps the shared catalog current, so user
+    requests never block on the network. Checks the catalog source every
+    CATALOG_REFRESH_SECONDS (or right away when woken) and publishes a new
+    catalog version when the sheet changed. While Google Sheets is failing,
+    the current data stays in use and the check is retried every STALE_RETRY_SECONDS.
+    target: {'cache': catalog cache, 'source': catalog source}, read on every
+    check so the thread can be pointed at a new cache (see start_catalog_prefetch).
+    Calls the source directly: Streamlit's caches need a script run, which this thread doesn't have.
     """
-    if pd.isna(tier_string) or tier_string == "" or tier_string == "NA":
-        return {}
-
-    tier_dict = {}
-    parts = tier_string.split(',')
-    for part in parts:
-        if ':' not in part:
-            continue
-        # Extract "T1: 1-25" → tier_num=1, range=(1, 25)
-        tier_label, range_str = part.split(':')
-        tier_num = int(tier_label.strip().replace('T', ''))
-        range_str = range_str.strip()
-        if '-' in range_str:
-            min_qty, max_qty = range_str.split('-')
-            tier_dict[tier_num] = (int(min_qty), int(max_qty))
-        elif '+' in range_str:
-            # Handle "1000+" format
-            min_qty = int(range_str.replace('+', ''))
-            tier_dict[tier_num] = (min_qty, float('inf'))
-
-    return tier_dict
-
-def parse_tariff_rate(tariff_string):
+    while True:
+        cache, source = target['cache'], target['source']
+        cache['wake'].clear()
+        try:
+            refresh_catalog(cache, source, read_modified_time(source))
+            wait_seconds = CATALOG_REFRESH_SECONDS
+        except Exception as e:
+            cache['last_error'] = str(e)
+            wait_seconds = STALE_RETRY_SECONDS
+        cache['wake'].wait(wait_seconds)
+
+def find_prefetch_thread():
+    """The running background refresh thread, if any (found by name, one per server process)."""
+    return next((thread for thread in threading.enumerate()
+                 if thread.name == PREFETCH_THREAD_NAME and thread.is_alive()), None)
+
+def start_catalog_prefetch():
     """
-    Parse tariff percentage from spreadsheet strings.
+    Start the background refresh thread (once per server process).
+    The thread outlives the resource cache: after "Clear cache", the running
+    thread is pointed at the new catalog cache instead of starting a second one.
+    """
+    cache = get_catalog_cache()
+    with cache['lock']:
+        if cache['prefetch_thread'] is not None:
+            return
+        target = {'cache': cache, 'source': get_catalog_source()}
+        thread = find_prefetch_thread()
+        if thread is None:
+            thread = threading.Thread(target=catalog_prefetch_loop, args=(target,),
+                                      name=PREFETCH_THREAD_NAME, daemon=True)
+            thread.prefetch_target = target
+            thread.start()
+        else:
+            previous_cache = thread.prefetch_target['cache']
+            thread.prefetch_target.update(target)
+            previous_cache['wake'].set()  # Stop waiting on the old cache
+        cache['prefetch_thread'] = thread
 
-    Examples:
-        "50.00%" -> 50.0
-        "50%" -> 50.0
-        "25.5%" -> 25.5
-        "" -> 0.0
-        "NA" -> 0.0
+def revalidate_in_background():
+    """Ask the background thread to check Google Sheets for newer data now."""
+    start_catalog_prefetch()
+    get_catalog_cache()['wake'].set()
 
-    Returns:
-        float: Tariff rate as decimal percentage (0.0 if invalid)
+def load_pricing_data():
+    """
+    Load pricing data for the app.
+    Once loaded, the current catalog is returned instantly: the background
+    thread (see catalog_prefetch_loop) keeps it up to date.
+    On a fresh server process, the local snapshot is served immediately;
+    only the very first load without a snapshot waits for Google Sheets.
+    Returns the current catalog version.
     """
-    if not tariff_string or tariff_string == '' or tariff_string == 'NA':
-        return 0.0
+    cache = get_catalog_cache()
+    if cache['catalog'] is not None and cache['prefetch_thread'] is not None:
+        return cache['catalog']  # No lock: a refresh in progress must not block users
+
+    with cache['lock']:
+        if cache['catalog'] is None:
+            frames, modified_time, saved_at = load_snapshot()
+            if frames is not None:
+                publish_catalog(cache, frames, modified_time, saved_at)
+                cache['source'] = "local snapshot"
+                cache['checked_at'] = saved_at
+
+    start_catalog_prefetch()
+    if cache['catalog'] is not None:
+        return cache['catalog']
+
     try:
-        cleaned = str(tariff_string).replace('%', '').strip()
-        return float(cleaned)
-    except (ValueError, AttributeError):
-        return 0.0
+        return refresh_pricing_data()
+    except Exception as e:
+        return serve_stale_pricing_data(e)
+
+def serve_stale_pricing_data(error):
+    """
+    Google Sheets failed: keep serving the last good pricing data
+    (from memory or the local snapshot) and retry in the background.
+    Raises the error again if there is no copy to serve.
+    """
+    cache = get_catalog_cache()
+    if cache['catalog'] is None:
+        raise error
 
-def calculate_product_tariff(product_cost_with_markup, tariff_rate_percent):
+    cache['last_error'] = str(error)
+    revalidate_in_background()
+    return cache['catalog']
+
+@st.fragment(run_every=CATALOG_WATCH_SECONDS)
+def watch_catalog_version(version):
+    """
+    Rerun the page when the background thread publishes a new catalog version,
+    so open pages show new prices without waiting for the user to click.
     """
-    Calculate tariff on product cost.
+    catalog = get_catalog()
+    if catalog is not None and catalog['version'] != version:
+        st.toast("Pricing data updated")
+        st.rerun()
+
+def describe_age(moment):
+    """How long ago a datetime was, for status badges (e.g., '5 min ago')."""
+    if moment is None:
+        return "an unknown time ago"
+    minutes = int((datetime.now() - moment).total_seconds() // 60)
+    if minutes < 1:
+        return "less than a minute ago"
+    if minutes < 60:
+        return f"{minutes} min ago"
+    if minutes < 48 * 60:
+        return f"{minutes // 60} h ago"
+    return f"{minutes // (24 * 60)} days ago"
 
-    Args:
-        product_cost_with_markup: Base product cost (price + markup, excluding customization)
-        tariff_rate_percent: Tariff rate as percentage (e.g., 50.0 for 50%)
+@st.cache_resource
+def get_quote_store():
+    """Create the saved quote database once per server process and return its path."""
+    init_quote_store(QUOTE_STORE_PATH)
+    return QUOTE_STORE_PATH
 
-    Returns:
-        float: Tariff dollar amount
+@st.cache_resource
+def get_timing_store():
+    """Section timings shared by all sessions, for the rolling p50/p95 (see performance.py)."""
+    return create_timing_store(log_json=PERFORMANCE_MODE == "log")
 
-    Example:
-        product_cost = $4,000 (base $2,000 + markup $2,000)
-        tariff_rate = 50.0%
-        tariff_amount = $2,000
+def start_section(section):
+    """
+    Start timing an app section (the section timed before it ends here).
+    Does nothing unless performance instrumentation is on (PERFORMANCE_ENV_VAR).
+    """
+    if not PERFORMANCE_ENABLED:
+        return
+    end_section()
+    st.session_state.current_section = (section, time.perf_counter())
+
+def end_section():
+    """Stop timing the current section and record its time."""
+    if not PERFORMANCE_ENABLED or st.session_state.get('current_section') is None:
+        return
+    section, start = st.session_state.current_section
+    seconds = time.perf_counter() - start
+    st.session_state.current_section = None
+    st.session_state.section_timings[section] = seconds
+    record_timing(get_timing_store(), section, seconds)
+
+def timed_download(section, build_file):
     """
-    if tariff_rate_percent <= 0:
-        return 0.0
-    return product_cost_with_markup * (tariff_rate_percent / 100)
+    Time a download's file build, which runs when the button is clicked.
+    Returns build_file unchanged unless performance instrumentation is on.
+    """
+    if not PERFORMANCE_ENABLED:
+        return build_file
+
+    store = get_timing_store()  # Looked up now: the click runs outside the script
 
-def determine_tier_number(quantity, tier_info_string, has_tiers):
+    def build_and_time():
+        start = time.perf_counter()
+        data = build_file()
+        record_timing(store, section, time.perf_counter() - start)
+        return data
+    return build_and_time
+
+def show_performance_panel(slot):
     """
-    Returns tier number (1-6) based on quantity, or None if no tiers.
+    Fill the sidebar's "Performance" expander: each section's time on this
+    session's latest run, and its p50/p95 over recent runs of all sessions.
     """
-    if has_tiers != 'Y':
-        return None
+    summary = timing_summary(get_timing_store())
+    rows = []
+    for section, stats in summary.items():
+        last_seconds = st.session_state.section_timings.get(section)
+        rows.append([
+            section,
+            f"{last_seconds * 1000:.0f}" if last_seconds is not None else "-",
+            f"{stats['p50'] * 1000:.0f}",
+            f"{stats['p95'] * 1000:.0f}",
+            stats['count']
+        ])
 
-    tier_ranges = parse_tier_info(tier_info_string)
+    with slot.container():
+        st.markdown("---")
+        with st.expander("Performance", expanded=False):
+            if not rows:
+                st.caption("No timings yet")
+                return
+            st.table(pd.DataFrame(rows, columns=["Section", "Last (ms)", "p50 (ms)", "p95 (ms)", "Runs"]))
+            st.caption("Updated on each full page run. Downloads are timed when clicked.")
 
-    if not tier_ranges:
-        return None
+def get_order_item_row(item, catalog_index):
+    """
+    Look up the catalog row for an order item (by its 'product_key').
+    Items saved before product keys existed carry their own 'product_data_row'.
+    Returns None if the product is no longer in the catalog.
+    """
+    if 'product_key' in item:
+        return catalog_index['rows_by_key'].get(item['product_key'])
+    return item.get('product_data_row')
 
-    for tier_num, (min_qty, max_qty) in tier_ranges.items():
-        if min_qty <= quantity <= max_qty:
-            return tier_num
+def get_order_discount():
+    """
+    Read the order discount from the Order Settings in session state.
+    Returns (discount_percent, discount_description).
+    """
+    discount_percent = 0.0
+    discount_description = ""
 
-    # If quantity exceeds all ranges, use highest tier
-    if tier_ranges:
-        return max(tier_ranges.keys())
+    if st.session_state.order_discount_type == "preset":
+        # Extract percentage from preset string (e.g., "NGO Discount (5%)" -> 5.0)
+        preset = st.session_state.order_discount_preset
+        discount_description = preset
+        # Parse percentage from string like "NGO Discount (5%)"
+        if "(" in preset and "%" in preset:
+            percent_str = preset.split("(")[1].split("%")[0]
+            discount_percent = float(percent_str)
 
-    return None
+    elif st.session_state.order_discount_type == "custom":
+        discount_percent = st.session_state.order_discount_custom_value
+        discount_description = st.session_state.order_discount_custom_desc if st.session_state.order_discount_custom_desc else f"Custom Discount ({discount_percent}%)"
 
-def get_unit_price_new_system(row, quantity):
+    return discount_percent, discount_description
+
+def get_order_totals():
+    """
+    Totals for the current order (see calculate_order_totals), shared by the
+    sidebar CSV, Order Summary, Invoice and Purchase Order.
+    Only recalculated when the order items or Order Settings change.
     """
-    Get correct unit price based on new tier logic from master_pricing_template_10_14.
-    Handles both tiered and non-tiered pricing.
+    discount_percent, discount_description = get_order_discount()
+    settings = (
+        st.session_state.order_shipping,
+        discount_percent,
+        st.session_state.apply_cc_fee,
+        st.session_state.cc_fee_percent,
+        st.session_state.order_use_marketing_rounding
+    )
+    # Fingerprint = settings + the item amounts the totals depend on
+    fingerprint = (discount_description, settings, tuple(
+        (item['product_total'], item.get('tariff_amount', 0.0), item['quantity'])
+        for item in st.session_state.order_items
+    ))
+
+    cached = st.session_state.get('order_totals_cache')
+    if cached is not None and cached[0] == fingerprint:
+        return cached[1]
+
+    totals = calculate_order_totals(st.session_state.order_items, *settings)
+    totals['discount_description'] = discount_description
+    st.session_state.order_totals_cache = (fingerprint, totals)
+    return totals
+
+def write_csv(columns, rows):
+    """
+    Write a header and rows to CSV text in one pass (same format as DataFrame.to_csv(index=False)).
+    Rows can be lists or dicts keyed by column name (missing columns are left blank).
     """
-    has_tiers = str(row.get('Pricing Tiers (Y/N)', '')).strip().upper()
+    output = io.StringIO()
+    writer = csv.writer(output, lineterminator="\n")
+    writer.writerow(columns)
+    for row in rows:
+        if isinstance(row, dict):
+            row = [row.get(column, "") for column in columns]
+        writer.writerow(row)
+    return output.getvalue()
+
+def get_order_csv_rows(totals):
+    """Rows for the sidebar's "Download Order (CSV)" (same totals as the Order Summary)."""
+    # Order items
+    rows = []
+    for item in st.session_state.order_items:
+        rows.append([
+            item['product_name'],
+            item['quantity'],
+            f"${item['total_per_unit']:.2f}",
+            f"${item['product_total']:.2f}"
+        ])
 
-    if has_tiers != 'Y':
-        # Use flat rate
-        flat_price = clean_price(row.get('PBP Cost (No Tiers)', ''))
-        if flat_price is not None:
-            return flat_price, "No Tiers", "PBP Cost (No Tiers)"
-        else:
-            return None, None, None
+    # Add totals
+    if totals['discount_percent'] > 0:
+        rows.append([f"Discount ({totals['discount_description']})", "", "", f"-${totals['discount_amount']:.2f}"])
+    rows.append(["Shipping", "", "", f"${totals['shipping']:.2f}"])
+
+    # Add per-product tariff lines
+    for item in st.session_state.order_items:
+        tariff_amount = item.get('tariff_amount', 0)
+        if tariff_amount > 0:
+            country = item.get('country_of_origin', 'Unknown')
+            tariff_rate = item.get('tariff_rate_percent', 0)
+            rows.append([f"Tariff: {item['product_name']} ({tariff_rate}% - {country})", "", "", f"${tariff_amount:.2f}"])
 
-    # Determine tier and get price
-    tier_info = row.get('Pricing Tiers Info', '')
-    tier_num = determine_tier_number(quantity, tier_info, has_tiers)
+    if st.session_state.apply_cc_fee and totals['cc_fee_amount'] > 0:
+        rows.append([f"Credit Card Fee ({st.session_state.cc_fee_percent}%)", "", "", f"${totals['cc_fee_amount']:.2f}"])
+    rows.append(["TOTAL", "", "", f"${totals['total_quote']:.2f}"])
+    return rows
 
-    if tier_num is None:
-        return None, None, None
+def update_order_download(totals):
+    """
+    Store the latest order CSV rows for the sidebar download.
+    Called by the order fragment, which can rerun without the sidebar.
+    """
+    st.session_state.order_download['rows'] = get_order_csv_rows(totals)
 
-    tier_col = f'PBP Cost: Tier {tier_num}'
-    price = clean_price(row.get(tier_col, ''))
+def write_order_csv(order_download):
+    """Write the sidebar order CSV from the latest rows (runs when the download is clicked)."""
+    return write_csv(["Product", "Quantity", "Per Unit", "Total"], order_download['rows'])
 
-    if price is not None:
-        # Get tier range for display
-        tier_ranges = parse_tier_info(tier_info)
-        if tier_num in tier_ranges:
-            min_qty, max_qty = tier_ranges[tier_num]
-            if max_qty == float('inf'):
-                tier_range = f"{min_qty}+"
-            else:
-                tier_range = f"{min_qty}-{max_qty}"
-            return price, tier_range, tier_col
+def show_order_download(slot):
+    """
+    Fill the sidebar's "Download Order (CSV)" slot.
+    The file is written when clicked, from the rows the order fragment last stored.
+    """
+    with slot.container():
+        if len(st.session_state.order_items) == 0:
+            st.caption("Add products to download order")
+            return
+
+        if 'rows' not in st.session_state.order_download:
+            update_order_download(get_order_totals())
 
-    return None, None, None
+        st.download_button(
+            label="Download Order (CSV)",
+            data=timed_download("CSV: Order (sidebar)", partial(write_order_csv, st.session_state.order_download)),
+            file_name=f"order_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+            mime="text/csv",
+            use_container_width=True
+        )
 
 # Page configuration
 st.set_page_config(
@@ -178,6 +613,14 @@ st.set_page_config(
     initial_sidebar_state="auto"
 )
 
+# Stop with a clear message on an older Streamlit (instead of a TypeError on the first render)
+if tuple(int(part) for part in st.__version__.split(".")[:2]) < MIN_STREAMLIT_VERSION:
+    st.error(
+        f"This app needs Streamlit {'.'.join(map(str, MIN_STREAMLIT_VERSION))} or newer "
+        f"(installed: {st.__version__}). Run: pip install -r requirements.txt --upgrade"
+    )
+    st.stop()
+
 # ===== SESSION STATE INITIALIZATION (MUST BE EARLY) =====
 # Initialize order_items if not exists
 if 'order_items' not in st.session_state:
@@ -187,9 +630,9 @@ if 'order_items' not in st.session_state:
 if 'edit_index' not in st.session_state:
     st.session_state.edit_index = None
 
-# Initialize order history
-if 'order_history' not in st.session_state:
-    st.session_state.order_history = []
+# Initialize the Recent Orders page (saved quotes are in the quote store, not session state)
+if 'recent_orders_page' not in st.session_state:
+    st.session_state.recent_orders_page = 0
 
 # Initialize shipping in session state
 if 'order_shipping' not in st.session_state:
@@ -230,6 +673,15 @@ if 'apply_cc_fee' not in st.session_state:
 if 'cc_fee_percent' not in st.session_state:
     st.session_state.cc_fee_percent = 2.9
 
+# Latest rows for the sidebar order CSV (kept current by the order fragment)
+if 'order_download' not in st.session_state:
+    st.session_state.order_download = {}
+
+# Section timings for the Performance panel (only used when PERFORMANCE_ENABLED)
+if 'section_timings' not in st.session_state:
+    st.session_state.section_timings = {}
+st.session_state.current_section = None  # Each full run starts with no section being timed
+
 st.title("Peace by Piece Pricing & Quoting App")
 
 # Purpose statement
@@ -241,6 +693,7 @@ proposals with detailed pricing breakdowns.
 st.divider()
 
 # ===== SIDEBAR =====
+start_section("Sidebar")
 with st.sidebar:
     st.markdown("## Instructions & Tools")
 
@@ -262,45 +715,79 @@ with st.sidebar:
 
     st.markdown("---")
 
-    # Section 2: Recent Orders
+    # Section 2: Recent Orders (saved quotes, one page at a time)
     st.markdown("### Recent Orders")
-    if len(st.session_state.order_history) == 0:
-        st.caption("No recent orders this session")
+    try:
+        quote_store = get_quote_store()
+        orders_search = st.text_input(
+            "Search saved quotes",
+            key="recent_orders_search",
+            placeholder="Client, partner or product",
+            label_visibility="collapsed",
+            on_change=lambda: st.session_state.update(recent_orders_page=0)
+        )
+        saved_count = count_quotes(quote_store, orders_search)
+        page_count = max(1, -(-saved_count // RECENT_ORDERS_PAGE_SIZE))  # Round up
+        page = min(st.session_state.recent_orders_page, page_count - 1)
+        saved_orders = list_quotes(quote_store, RECENT_ORDERS_PAGE_SIZE, page * RECENT_ORDERS_PAGE_SIZE, orders_search)
+    except sqlite3.Error as e:
+        st.caption(f"Saved quotes unavailable: {e}")
+        saved_orders = []
+        saved_count = None
+
+    if saved_count == 0:
+        st.caption("No matching saved quotes" if orders_search.strip() else "No saved quotes yet")
     else:
-        # Show last 5 orders, most recent first
-        for idx, order in enumerate(reversed(st.session_state.order_history[-5:])):
+        # Most recent first
+        for idx, order in enumerate(saved_orders):
             with st.container():
-                timestamp_str = order['timestamp'].strftime('%I:%M %p')
+                timestamp_str = order['timestamp'].strftime('%b %d, %I:%M %p')
                 product_preview = ', '.join(order['product_names'][:2])
                 if len(order['product_names']) > 2:
                     product_preview += f" +{len(order['product_names'])-2} more"
 
+                if order['client_company']:
+                    st.caption(f"**{order['client_company']}**")
                 st.caption(f"{timestamp_str} - {product_preview}")
                 st.caption(f"${order['total_quote']:.2f} ({order['total_units']} units)")
 
                 col1, col2 = st.columns(2)
                 with col1:
-                    if st.button("Load", key=f"load_order_{idx}", use_container_width=True):
+                    if st.button("Load", key=f"load_order_{order['id']}", use_container_width=True):
                         # Reload this order
-                        st.session_state.order_items = order['order_items'].copy()
-                        st.session_state.order_shipping = order['shipping']
+                        saved_order = load_quote(quote_store, order['id'])
+                        if saved_order is not None:
+                            st.session_state.order_items = saved_order['order_items']
+                            st.session_state.order_shipping = saved_order['shipping']
                         st.rerun()
                 with col2:
-                    if st.button("Delete", key=f"delete_order_{idx}", use_container_width=True):
-                        # Remove from history
-                        actual_idx = len(st.session_state.order_history) - 1 - idx
-                        st.session_state.order_history.pop(actual_idx)
+                    if st.button("Delete", key=f"delete_order_{order['id']}", use_container_width=True):
+                        delete_quote(quote_store, order['id'])
                         st.rerun()
 
-                if idx < min(4, len(st.session_state.order_history) - 1):
+                if idx < len(saved_orders) - 1:
                     st.markdown("---")
 
+        if saved_count is not None and page_count > 1:
+            col1, col2, col3 = st.columns([1, 2, 1])
+            with col1:
+                if st.button("‹", key="recent_orders_prev", disabled=page == 0, use_container_width=True):
+                    st.session_state.recent_orders_page = page - 1
+                    st.rerun()
+            with col2:
+                st.caption(f"Page {page + 1} of {page_count} ({saved_count} quotes)")
+            with col3:
+                if st.button("›", key="recent_orders_next", disabled=page >= page_count - 1, use_container_width=True):
+                    st.session_state.recent_orders_page = page + 1
+                    st.rerun()
+
     st.markdown("---")
 
     # Section 3: Data Status
     st.markdown("### Data Status")
-    if 'data_loaded_at' in st.session_state:
-        load_time = st.session_state.data_loaded_at
+    sidebar_catalog = get_catalog()
+    if sidebar_catalog is not None:
+        load_time = sidebar_catalog['loaded_at']
         time_ago = datetime.now() - load_time
 
         if time_ago.seconds < 60:
@@ -310,15 +797,24 @@ with st.sidebar:
         else:
             time_str = load_time.strftime('%I:%M %p')
 
-        st.caption(f"Last updated: {time_str}")
+        st.caption(f"Last updated: {time_str} (catalog version {sidebar_catalog['version']})")
+        if sidebar_catalog['download_seconds'] is not None:
+            st.caption(f"Download time: {sidebar_catalog['download_seconds']:.2f}s")
+        data_source = get_catalog_cache()['source']
+        if data_source:
+            st.caption(f"Source: {data_source}")
+        if get_catalog_cache()['last_error']:
+            st.caption(f"{get_catalog_source().name} unavailable - data from {describe_age(get_catalog_cache()['checked_at'])}")
 
         if st.button("Refresh Data", use_container_width=True):
-            # Clear cached data and reload
-            df_template, df_metadata, df_partner_info = load_pricing_data()
-            st.session_state.df_template = df_template
-            st.session_state.df_metadata = df_metadata
-            st.session_state.df_partner_info = df_partner_info
-            st.session_state.data_loaded_at = datetime.now()
+            # Check the sheet for changes now and reload if needed
+            # (a new catalog version is shared with every session)
+            get_sheet_modified_time.clear()
+            try:
+                refresh_pricing_data()
+            except Exception as e:
+                # Keep quoting with the current data (shown as stale) while Sheets is down
+                serve_stale_pricing_data(e)
             st.rerun()
     else:
         st.caption("Data status: Unknown")
@@ -329,280 +825,81 @@ with st.sidebar:
     st.markdown("### Download Options")
 
     # Download current order as CSV
-    if len(st.session_state.order_items) > 0:
-        import io
-        import csv
-
-        # Build CSV content
-        output = io.StringIO()
-        writer = csv.writer(output)
-
-        # Header
-        writer.writerow(["Product", "Quantity", "Per Unit", "Total"])
-
-        # Order items
-        for item in st.session_state.order_items:
-            writer.writerow([
-                item['product_name'],
-                item['quantity'],
-                f"${item['total_per_unit']:.2f}",
-                f"${item['product_total']:.2f}"
-            ])
-
-        # Add totals
-        products_subtotal = sum(item['product_total'] for item in st.session_state.order_items)
-        writer.writerow(["Shipping", "", "", f"${st.session_state.order_shipping:.2f}"])
-
-        # Add per-product tariff lines
-        for item in st.session_state.order_items:
-            tariff_amount = item.get('tariff_amount', 0)
-            if tariff_amount > 0:
-                country = item.get('country_of_origin', 'Unknown')
-                tariff_rate = item.get('tariff_rate_percent', 0)
-                writer.writerow([f"Tariff: {item['product_name']} ({tariff_rate}% - {country})", "", "", f"${tariff_amount:.2f}"])
-
-        # Calculate total tariff
-        total_tariff = sum(item.get('tariff_amount', 0) for item in st.session_state.order_items)
-        total_quote = products_subtotal + st.session_state.order_shipping + total_tariff
-        writer.writerow(["TOTAL", "", "", f"${total_quote:.2f}"])
-
-        csv_content = output.getvalue()
-
-        st.download_button(
-            label="Download Order (CSV)",
-            data=csv_content,
-            file_name=f"order_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-            mime="text/csv",
-            use_container_width=True
-        )
-    else:
-        st.caption("Add products to download order")
+    # (filled in after the Order Settings are applied - see show_order_download)
+    order_download_slot = st.empty()
 
     # Download master pricing data
-    if 'df_template' in st.session_state:
-        csv_pricing = st.session_state.df_template.to_csv(index=False)
-
+    if sidebar_catalog is not None:
+        df_template_for_export = sidebar_catalog['df_template']
         st.download_button(
             label="Download Pricing Data (CSV)",
-            data=csv_pricing,
+            # Written when clicked, as sheet text ('$1,500.00', 'Y') so scripts/quote_orders.py can read it back
+            data=timed_download("CSV: Pricing Data",
+                                lambda: catalog_to_sheet_text(df_template_for_export).to_csv(index=False)),
             file_name=f"pricing_data_{datetime.now().strftime('%Y%m%d')}.csv",
             mime="text/csv",
             use_container_width=True
         )
 
-# ===== HELPER FUNCTIONS =====
-
-def clean_price(price_string):
-    """
-    Convert price string like '$48.00' or '$1,500.00' to float.
-    Returns None if empty or invalid.
-    """
-    if not price_string or price_string == '':
-        return None
-    try:
-        # Remove $, commas, whitespace
-        cleaned = str(price_string).replace('$', '').replace(',', '').strip()
-        return float(cleaned)
-    except (ValueError, AttributeError):
-        return None
-
-
-def get_price_for_quantity(product_row, quantity):
-    """
-    Select the appropriate price tier based on quantity.
-    Returns (price, tier_range, column_name) or (None, None, None) if not found.
-    """
-    # Define tier columns and their ranges (soft-coded for easy modification)
-    tier_columns = [
-        {'min': 1, 'max': 25, 'column': 'PBP Cost w/o shipping (1-25)'},
-        {'min': 26, 'max': 50, 'column': 'PBP Cost w/o shipping (26-50)'},
-        {'min': 51, 'max': 100, 'column': 'PBP Cost w/o shipping (51-100)'},
-        {'min': 101, 'max': 250, 'column': 'PBP Cost w/o shipping (101-250)'},
-        {'min': 251, 'max': 500, 'column': 'PBP Cost w/o shipping (251-500)'},
-        {'min': 501, 'max': 1000, 'column': 'PBP Cost w/o shipping (501-1000)'},
-        {'min': 1001, 'max': float('inf'), 'column': 'PBP Cost w/o shipping (1000+)'}
-    ]
-
-    # Find matching tier
-    for i, tier in enumerate(tier_columns):
-        if tier['min'] <= quantity <= tier['max']:
-            # Try exact tier match
-            if tier['column'] in product_row.index:
-                price = clean_price(product_row[tier['column']])
-                if price is not None:
-                    tier_range = f"{tier['min']}-{tier['max']}" if tier['max'] != float('inf') else f"{tier['min']}+"
-                    return price, tier_range, tier['column']
-
-            # Fallback: try higher tiers
-            for higher_tier in tier_columns[i+1:]:
-                if higher_tier['column'] in product_row.index:
-                    price = clean_price(product_row[higher_tier['column']])
-                    if price is not None:
-                        tier_range = f"{higher_tier['min']}-{higher_tier['max']}" if higher_tier['max'] != float('inf') else f"{higher_tier['min']}+"
-                        return price, tier_range, higher_tier['column']
-
-            # Fallback: try lower tiers
-            for lower_tier in reversed(tier_columns[:i]):
-                if lower_tier['column'] in product_row.index:
-                    price = clean_price(product_row[lower_tier['column']])
-                    if price is not None:
-                        tier_range = f"{lower_tier['min']}-{lower_tier['max']}" if lower_tier['max'] != float('inf') else f"{lower_tier['min']}+"
-                        return price, tier_range, lower_tier['column']
-
-    return None, None, None
-
-
-def calculate_additional_costs(product_row, quantity, include_labels=False):
-    """
-    Calculate additional costs (setup fees, labels, etc.)
-    Art Setup Fee only applies when labels are selected.
-    Returns dict with all additional costs.
-    """
-    additional_costs = {}
-
-    # Label Costs (optional, user chooses)
-    if include_labels:
-        # Art Setup Fee (one-time per order) - only when labels are selected
-        setup_fee = clean_price(product_row.get('Art Setup Fee', ''))
-        if setup_fee is None:
-            setup_fee = 0
-        additional_costs['art_setup_fee_total'] = setup_fee
-        additional_costs['art_setup_fee_per_unit'] = setup_fee / quantity if quantity > 0 else 0
-
-        # Label unit cost and minimum
-        label_cost_per_label = clean_price(product_row.get('Labels up to 1" x 2.5\'', ''))
-        if label_cost_per_label is None:
-            label_cost_per_label = 0
-
-        label_minimum_raw = clean_price(product_row.get('Minimum for labels', ''))
-        label_minimum = int(label_minimum_raw) if label_minimum_raw else 100
-
-        # Apply minimum: customer pays for at least label_minimum labels
-        labels_to_charge = max(quantity, label_minimum)
-        additional_costs['labels_charged'] = labels_to_charge
-        additional_costs['label_cost_per_label'] = label_cost_per_label
-        additional_costs['label_cost_total'] = label_cost_per_label * labels_to_charge
-        additional_costs['label_cost_per_unit'] = (label_cost_per_label * labels_to_charge) / quantity if quantity > 0 else 0
-
-        # Warning message if minimum applies
-        if quantity < label_minimum:
-            additional_costs['label_warning'] = f"Minimum {label_minimum} labels required. Charging for {labels_to_charge} labels even though ordering {quantity} units."
-    else:
-        # No labels requested - no costs apply
-        additional_costs['art_setup_fee_total'] = 0
-        additional_costs['art_setup_fee_per_unit'] = 0
-        additional_costs['label_cost_total'] = 0
-        additional_costs['labels_charged'] = 0
-        additional_costs['label_warning'] = None
-
-    return additional_costs
-
-
-# ===== GOOGLE SHEETS CONNECTION =====
-@st.cache_resource
-def connect_to_sheets():
-    """
-    Connect to Google Sheets using service account credentials.
-    Cached so we don't reconnect on every rerun.
-    """
-    creds_info = st.secrets["gcp_service_account"]
-    scopes = [
-        "https://www.googleapis.com/auth/spreadsheets",
-        "https://www.googleapis.com/auth/drive"
-    ]
-    creds = Credentials.from_service_account_info(creds_info, scopes=scopes)
-    return gspread.authorize(creds)
-
-@st.cache_data(ttl=300)  # Cache data for 5 minutes
-def load_pricing_data():
-    """
-    Load pricing data from master_pricing_template_10_14 Google Sheet.
-    Loads three sheets: Template, Metadata, Partner-Specific Info
-    Returns three DataFrames.
-    """
-    gc = connect_to_sheets()
-    spreadsheet = gc.open("master_pricing_template_10_14")
-
-    # Load Template sheet (header at row 6, index 5)
-    template_sheet = spreadsheet.worksheet("Template")
-    template_values = template_sheet.get_all_values()
-
-    # Row 6 has headers, but first column is empty - skip it
-    raw_headers = template_values[5]
-    raw_data = template_values[6:]
-
-    # Find first non-empty column index
-    first_col_idx = 0
-    for i, header in enumerate(raw_headers):
-        if header.strip():
-            first_col_idx = i
-            break
-
-    # Extract headers and data starting from first non-empty column
-    template_headers = [col.strip() for col in raw_headers[first_col_idx:]]
-    template_data = [row[first_col_idx:] for row in raw_data]
-
-    df_template = pd.DataFrame(template_data, columns=template_headers)
-
-    # Remove empty rows (where Partner column is empty)
-    df_template = df_template[df_template['Partner'].str.strip() != '']
+    # Download catalog-wide price sheet (built only when clicked)
+    if sidebar_catalog is not None:
+        df_template_for_sheet = sidebar_catalog['df_template']
+        pricing_table_for_sheet = sidebar_catalog['pricing_table']
 
-    # Load Metadata sheet (header at row 2, index 1)
-    metadata_sheet = spreadsheet.worksheet("Metadata")
-    metadata_values = metadata_sheet.get_all_values()
-    metadata_headers = [col.strip() if col else f"Unnamed_{i}" for i, col in enumerate(metadata_values[1])]  # Row 2 (index 1)
-    metadata_data = metadata_values[2:]
-    df_metadata = pd.DataFrame(metadata_data, columns=metadata_headers)
-
-    # Load Partner-Specific Info sheet (header at row 2, index 1)
-    partner_sheet = spreadsheet.worksheet("Partner-Specific Info")
-    partner_values = partner_sheet.get_all_values()
-
-    # Row 2 has headers, may have empty first column - skip it
-    raw_partner_headers = partner_values[1]
-    raw_partner_data = partner_values[2:]
-
-    # Find first non-empty column index for partner sheet
-    first_partner_col_idx = 0
-    for i, header in enumerate(raw_partner_headers):
-        if header.strip():
-            first_partner_col_idx = i
-            break
-
-    # Extract headers and data starting from first non-empty column
-    partner_headers = [col.strip() if col else f"Unnamed_{i}" for i, col in enumerate(raw_partner_headers[first_partner_col_idx:])]
-    partner_data = [row[first_partner_col_idx:] for row in raw_partner_data]
-
-    df_partner_info = pd.DataFrame(partner_data, columns=partner_headers)
-
-    # Remove empty rows from partner info (only if Partner column exists)
-    if 'Partner' in df_partner_info.columns:
-        df_partner_info = df_partner_info[df_partner_info['Partner'].str.strip() != '']
+        st.download_button(
+            label="Download Catalog Price Sheet (CSV)",
+            data=timed_download("CSV: Catalog Price Sheet", lambda: quote_catalog(
+                df_template_for_sheet,
+                pricing_table_for_sheet,
+                PRICE_SHEET_QUANTITIES,
+                PRICE_SHEET_MARKUPS
+            ).to_csv(index=False)),
+            file_name=f"price_sheet_{datetime.now().strftime('%Y%m%d')}.csv",
+            mime="text/csv",
+            use_container_width=True,
+            help="Every product priced at common order quantities (before customization)"
+        )
 
-    return df_template, df_metadata, df_partner_info
+    # Section 5: Performance (filled in at the end of the run - see show_performance_panel)
+    if PERFORMANCE_ENABLED:
+        performance_slot = st.empty()
 
 # Load data
+start_section("Load pricing data")
+# The catalog is shared by all sessions (not copied into session state)
+# and kept current by a background thread, so this is instant after the first load.
 try:
-    if 'df_template' not in st.session_state:
-        df_template, df_metadata, df_partner_info = load_pricing_data()
-        st.session_state.df_template = df_template
-        st.session_state.df_metadata = df_metadata
-        st.session_state.df_partner_info = df_partner_info
-        st.session_state.data_loaded_at = datetime.now()
+    catalog = load_pricing_data()
 
-    df_template = st.session_state.df_template
-    df_metadata = st.session_state.df_metadata
-    df_partner_info = st.session_state.df_partner_info
+    # One catalog version for the whole rerun, even if a refresh publishes a new one meanwhile
+    df_template = catalog['df_template']
+    df_metadata = catalog['df_metadata']
+    df_partner_info = catalog['df_partner_info']
+    pricing_table = catalog['pricing_table']
+    catalog_index = catalog['catalog_index']
 
     # Count unique partner-product combinations
     unique_products = len(df_template)
-    unique_partners = len(df_template['Partner'].unique())
-
-    st.success(f"Loaded {unique_products} products from {unique_partners} partners (master_pricing_template_10_14)")
+    unique_partners = len(catalog_index['partners'])
+
+    catalog_cache = get_catalog_cache()
+    if catalog_cache['last_error']:
+        # Stale data: still usable for quoting, but flag its age
+        st.warning(
+            f"{get_catalog_source().name} is unavailable, so {unique_products} products from {unique_partners} partners "
+            f"are shown as of {describe_age(catalog_cache['checked_at'])}. Retrying in the background. "
+            f"(Error: {catalog_cache['last_error']})"
+        )
+    else:
+        st.success(f"Loaded {unique_products} products from {unique_partners} partners ({get_catalog_source().location})")
 except Exception as e:
     st.error(f"Failed to load data: {e}")
+    show_order_download(order_download_slot)
     st.stop()
 
+# Pick up new catalog versions published by the background thread
+watch_catalog_version(catalog['version'])
+
 # Order status indicator
 total_products = len(st.session_state.order_items)
 if total_products > 0:
@@ -613,6 +910,7 @@ else:
 st.divider()
 
 # ===== CLIENT INFORMATION =====
+start_section("1. Client & Order Information")
 st.header("1. Client & Order Information")
 
 with st.expander("Client Details", expanded=False):
@@ -698,6 +996,7 @@ with st.expander("Client Details", expanded=False):
 st.divider()
 
 # ===== PRODUCT SELECTION =====
+start_section("2. Select Products")
 st.header("2. Select Products")
 
 # Create dropdowns for filtering
@@ -705,19 +1004,17 @@ col1, col2 = st.columns(2)
 
 with col1:
     # Partner dropdown (using "Partner" column from Template sheet)
-    partners = sorted(df_template["Partner"].unique().tolist())
+    # (prebuilt at load time - no DataFrame scans on each rerun)
+    partners = catalog_index['partners']
     selected_partner = st.selectbox("Select Partner", partners)
 
 with col2:
-    # Filter products based on partner selection (using "Product/Service" column)
-    available_products = df_template[df_template["Partner"] == selected_partner]["Product/Service"].unique().tolist()
+    # Products for the selected partner (using "Product/Service" column)
+    available_products = catalog_index['products_by_partner'][selected_partner]
     selected_product = st.selectbox("Select Product/Service", available_products)
 
-# Get selected product details
-product_data = df_template[
-    (df_template["Partner"] == selected_partner) &
-    (df_template["Product/Service"] == selected_product)
-].iloc[0]
+# Get selected product details (row dict for this Partner + Product/Service)
+product_data = catalog_index['rows_by_key'][(selected_partner, selected_product)]
 
 # Display product details in cleaner layout
 st.markdown("##### Product Details")
@@ -728,8 +1025,8 @@ with col1:
 with col2:
     origin = product_data.get("Country of Origin", "N/A")
     st.markdown(f"**Country of Origin:** {origin if origin else 'N/A'}")
-    has_tiers = product_data.get("Pricing Tiers (Y/N)", "N/A")
-    st.markdown(f"**Tiered Pricing:** {has_tiers}")
+    has_tiers = product_data.get("Pricing Tiers (Y/N)", False)
+    st.markdown(f"**Tiered Pricing:** {'Y' if has_tiers else 'N'}")
 
 # Show product description if available
 description = product_data.get("Marketing Description", "")
@@ -749,1436 +1046,1429 @@ if tier_info and tier_info.strip() and tier_info != "NA":
 
 st.markdown("<br>", unsafe_allow_html=True)
 
-# ===== QUANTITY & PRICING =====
-st.header("3. Quantity & Pricing")
-
-# 3.1 - Quantity Selection
-st.subheader("Quantity Selection")
-quantity = st.number_input(
-    "Quantity",
-    min_value=1,
-    value=1,
-    step=1,
-    key="input_quantity"
-)
-
-# Show tier being used
-base_price_preview, tier_range_preview, tier_column_preview = get_unit_price_new_system(product_data, quantity)
-if base_price_preview:
-    if tier_range_preview == "No Tiers":
-        st.caption(f"Flat pricing: ${base_price_preview:.2f} per unit")
-    else:
-        st.caption(f"Using pricing tier: {tier_range_preview} units | Base price: ${base_price_preview:.2f} per unit")
-
-st.divider()
+# ===== PRODUCT CONFIGURATOR (SECTIONS 3-5) =====
+# Runs as a fragment: quantity, markup and customization changes only rerun these sections.
+# Reads the selected product from section 2; "Add to Order" reruns the whole app.
+@st.fragment
+def render_product_configurator():
+    # ===== QUANTITY & PRICING =====
+    start_section("3. Quantity & Pricing")
+    st.header("3. Quantity & Pricing")
+
+    # 3.1 - Quantity Selection
+    st.subheader("Quantity Selection")
+    quantity = st.number_input(
+        "Quantity",
+        min_value=1,
+        value=1,
+        step=1,
+        key="input_quantity"
+    )
 
-# 3.2 - Partner MSRP (Reference)
-st.subheader("Partner MSRP (Reference)")
+    # Show tier being used
+    base_price_preview, tier_range_preview, tier_column_preview = get_unit_price(pricing_table, product_data, quantity)
+    if base_price_preview:
+        if tier_range_preview == "No Tiers":
+            st.caption(f"Flat pricing: ${base_price_preview:.2f} per unit")
+        else:
+            st.caption(f"Using pricing tier: {tier_range_preview} units | Base price: ${base_price_preview:.2f} per unit")
 
-show_msrp = st.checkbox(
-    "Show Partner MSRP comparison",
-    value=False,
-    key="show_msrp_checkbox",
-    help="Display partner's suggested retail price for reference"
-)
+    st.divider()
 
-partner_msrp = 0.0
-if show_msrp:
-    # Check if MSRP exists in spreadsheet
-    default_msrp = clean_price(product_data.get('Partner MSRP', '')) or 0.0
+    # 3.2 - Partner MSRP (Reference)
+    st.subheader("Partner MSRP (Reference)")
 
-    partner_msrp = st.number_input(
-        "Partner MSRP (per unit)",
-        min_value=0.0,
-        value=float(default_msrp),
-        step=1.0,
-        key="input_partner_msrp",
-        help="Optional - Partner's suggested retail price for reference"
+    show_msrp = st.checkbox(
+        "Show Partner MSRP comparison",
+        value=False,
+        key="show_msrp_checkbox",
+        help="Display partner's suggested retail price for reference"
     )
 
-    st.caption("This is the partner's suggested retail price - for reference only")
+    partner_msrp = 0.0
+    if show_msrp:
+        # Check if MSRP exists in spreadsheet
+        default_msrp = clean_price(product_data.get('Partner MSRP', '')) or 0.0
 
-st.divider()
+        partner_msrp = st.number_input(
+            "Partner MSRP (per unit)",
+            min_value=0.0,
+            value=float(default_msrp),
+            step=1.0,
+            key="input_partner_msrp",
+            help="Optional - Partner's suggested retail price for reference"
+        )
 
-# 3.3 - Markup Configuration
-st.subheader("Markup Configuration")
+        st.caption("This is the partner's suggested retail price - for reference only")
 
-markup_percent = st.number_input(
-    "Markup %",
-    min_value=0.0,
-    value=100.0,
-    step=5.0,
-    key="input_markup",
-    help="Your profit margin. 100% = double the cost (2x), 50% = 1.5x the cost, 200% = triple the cost (3x)"
-)
+    st.divider()
 
-# Rounding option
-round_to_five = st.checkbox(
-    "Round to nearest multiple of $5",
-    value=False,
-    key="round_to_five_checkbox",
-    help="Rounds the customer price per unit to the nearest $5 (e.g., $17.50 becomes $20, $12.30 becomes $10)"
-)
+    # 3.3 - Markup Configuration
+    st.subheader("Markup Configuration")
 
-# Calculate pricing breakdown (no customization yet)
-if base_price_preview:
-    product_subtotal_preview = base_price_preview * quantity
-    markup_amount_preview = product_subtotal_preview * (markup_percent / 100)
-    customer_price_no_custom_raw = product_subtotal_preview + markup_amount_preview
-    customer_price_per_unit_raw = customer_price_no_custom_raw / quantity
-
-    # Apply rounding if enabled
-    customer_price_per_unit = round_to_nearest_five(customer_price_per_unit_raw, round_to_five)
-    customer_price_no_custom = customer_price_per_unit * quantity
-
-    # Display pricing breakdown
-    st.markdown("**Pricing Breakdown (Before Customization)**")
-
-    breakdown_data = [
-        ["Base Cost (Partner)", f"${base_price_preview:.2f}/unit", f"${product_subtotal_preview:.2f} total"],
-        ["Your Markup ({:.0f}%)".format(markup_percent), f"${markup_amount_preview/quantity:.2f}/unit", f"${markup_amount_preview:.2f} total"],
-        ["", "", ""],
-        ["**Customer Price (No Custom)**", f"**${customer_price_per_unit:.2f}/unit**", f"**${customer_price_no_custom:.2f}**"]
-    ]
+    markup_percent = st.number_input(
+        "Markup %",
+        min_value=0.0,
+        value=100.0,
+        step=5.0,
+        key="input_markup",
+        help="Your profit margin. 100% = double the cost (2x), 50% = 1.5x the cost, 200% = triple the cost (3x)"
+    )
 
-    # Show rounding note if enabled
-    if round_to_five:
-        breakdown_data.append(["", "", ""])
-        breakdown_data.append(["Rounding Applied", f"(${customer_price_per_unit_raw:.2f} → ${customer_price_per_unit:.2f})", ""])
+    # Rounding option
+    round_to_five = st.checkbox(
+        "Round to nearest multiple of $5",
+        value=False,
+        key="round_to_five_checkbox",
+        help="Rounds the customer price per unit to the nearest $5 (e.g., $17.50 becomes $20, $12.30 becomes $10)"
+    )
 
-    breakdown_df = pd.DataFrame(breakdown_data, columns=["Item", "Per Unit", "Total"])
-    st.table(breakdown_df)
+    # Calculate pricing breakdown (no customization yet)
+    if base_price_preview:
+        product_subtotal_preview = base_price_preview * quantity
+        markup_amount_preview = product_subtotal_preview * (markup_percent / 100)
+        customer_price_no_custom_raw = product_subtotal_preview + markup_amount_preview
+        customer_price_per_unit_raw = customer_price_no_custom_raw / quantity
+
+        # Apply rounding if enabled
+        customer_price_per_unit = round_to_nearest_five(customer_price_per_unit_raw, round_to_five)
+        customer_price_no_custom = customer_price_per_unit * quantity
+
+        # Display pricing breakdown
+        st.markdown("**Pricing Breakdown (Before Customization)**")
+
+        breakdown_data = [
+            ["Base Cost (Partner)", f"${base_price_preview:.2f}/unit", f"${product_subtotal_preview:.2f} total"],
+            ["Your Markup ({:.0f}%)".format(markup_percent), f"${markup_amount_preview/quantity:.2f}/unit", f"${markup_amount_preview:.2f} total"],
+            ["", "", ""],
+            ["**Customer Price (No Custom)**", f"**${customer_price_per_unit:.2f}/unit**", f"**${customer_price_no_custom:.2f}**"]
+        ]
 
-    st.caption("This is the base product price before customization, tariffs, or shipping")
+        # Show rounding note if enabled
+        if round_to_five:
+            breakdown_data.append(["", "", ""])
+            breakdown_data.append(["Rounding Applied", f"(${customer_price_per_unit_raw:.2f} → ${customer_price_per_unit:.2f})", ""])
 
-    # MSRP Comparison (if enabled)
-    if show_msrp and partner_msrp > 0:
-        st.markdown("**Compare to Partner MSRP:**")
+        breakdown_df = pd.DataFrame(breakdown_data, columns=["Item", "Per Unit", "Total"])
+        st.table(breakdown_df)
 
-        msrp_diff = customer_price_per_unit - partner_msrp
-        msrp_diff_percent = (msrp_diff / partner_msrp * 100) if partner_msrp > 0 else 0
+        st.caption("This is the base product price before customization, tariffs, or shipping")
 
-        comparison_data = [
-            ["Partner MSRP", f"${partner_msrp:.2f}/unit"],
-            ["Your Price", f"${customer_price_per_unit:.2f}/unit"],
-            ["Difference", f"${msrp_diff:.2f} ({msrp_diff_percent:+.1f}%)"]
-        ]
+        # MSRP Comparison (if enabled)
+        if show_msrp and partner_msrp > 0:
+            st.markdown("**Compare to Partner MSRP:**")
 
-        comparison_df = pd.DataFrame(comparison_data, columns=["Item", "Price"])
-        st.table(comparison_df)
+            msrp_diff = customer_price_per_unit - partner_msrp
+            msrp_diff_percent = (msrp_diff / partner_msrp * 100) if partner_msrp > 0 else 0
 
-        if msrp_diff < 0:
-            st.caption(f"Your price is {abs(msrp_diff_percent):.1f}% below Partner MSRP")
-        elif msrp_diff > 0:
-            st.caption(f"Your price is {msrp_diff_percent:.1f}% above Partner MSRP")
-        else:
-            st.caption("Your price matches Partner MSRP")
+            comparison_data = [
+                ["Partner MSRP", f"${partner_msrp:.2f}/unit"],
+                ["Your Price", f"${customer_price_per_unit:.2f}/unit"],
+                ["Difference", f"${msrp_diff:.2f} ({msrp_diff_percent:+.1f}%)"]
+            ]
 
-# ===== CUSTOMIZATION OPTIONS =====
-st.divider()
-st.header("4. Customization Options")
-
-# Customization options
-customization_info = product_data.get("Customization Info", "")
-if customization_info and customization_info.strip():
-    st.markdown(f"**Customization Options:** {customization_info}")
-
-include_customization = st.checkbox(
-    "Add customization to this product",
-    value=False,
-    key="input_customization",
-    help="Adds setup fee and per-unit customization cost (e.g., custom labels, branding, engraving)"
-)
+            comparison_df = pd.DataFrame(comparison_data, columns=["Item", "Price"])
+            st.table(comparison_df)
+
+            if msrp_diff < 0:
+                st.caption(f"Your price is {abs(msrp_diff_percent):.1f}% below Partner MSRP")
+            elif msrp_diff > 0:
+                st.caption(f"Your price is {msrp_diff_percent:.1f}% above Partner MSRP")
+            else:
+                st.caption("Your price matches Partner MSRP")
 
-# Show editable customization cost fields when customization is enabled
-if include_customization:
+    # ===== CUSTOMIZATION OPTIONS =====
+    start_section("4. Customization Options")
     st.divider()
-    st.subheader("Customization Minimum Quantity")
+    st.header("4. Customization Options")
+
+    # Customization options
+    customization_info = product_data.get("Customization Info", "")
+    if customization_info and customization_info.strip():
+        st.markdown(f"**Customization Options:** {customization_info}")
 
-    apply_custom_minimum = st.checkbox(
-        "Apply minimum quantity for customization",
+    include_customization = st.checkbox(
+        "Add customization to this product",
         value=False,
-        key="apply_custom_minimum_checkbox",
-        help="Charge for a minimum quantity of customization units even if ordering fewer items"
+        key="input_customization",
+        help="Adds setup fee and per-unit customization cost (e.g., custom labels, branding, engraving)"
     )
 
-    customization_minimum_qty = 0
-    if apply_custom_minimum:
-        customization_minimum_qty = st.number_input(
-            "Minimum Customization Quantity",
-            min_value=1,
-            value=max(100, quantity),
-            step=1,
-            key="input_custom_minimum_qty",
-            help="Minimum number of units to charge for customization"
+    # Show editable customization cost fields when customization is enabled
+    if include_customization:
+        st.divider()
+        st.subheader("Customization Minimum Quantity")
+
+        apply_custom_minimum = st.checkbox(
+            "Apply minimum quantity for customization",
+            value=False,
+            key="apply_custom_minimum_checkbox",
+            help="Charge for a minimum quantity of customization units even if ordering fewer items"
         )
 
-        if customization_minimum_qty > quantity:
-            st.info(f"Customer will be charged for {customization_minimum_qty} customization units (ordering {quantity} product units)")
-        else:
-            st.caption(f"Minimum ({customization_minimum_qty}) is not higher than order quantity ({quantity}) - no effect")
+        customization_minimum_qty = 0
+        if apply_custom_minimum:
+            customization_minimum_qty = st.number_input(
+                "Minimum Customization Quantity",
+                min_value=1,
+                value=max(100, quantity),
+                step=1,
+                key="input_custom_minimum_qty",
+                help="Minimum number of units to charge for customization"
+            )
 
-    st.divider()
-    st.markdown("##### Customization Costs")
-    st.caption("Default values are from the spreadsheet. You can override them if needed.")
+            if customization_minimum_qty > quantity:
+                st.info(f"Customer will be charged for {customization_minimum_qty} customization units (ordering {quantity} product units)")
+            else:
+                st.caption(f"Minimum ({customization_minimum_qty}) is not higher than order quantity ({quantity}) - no effect")
 
-    col1, col2 = st.columns(2)
+        st.divider()
+        st.markdown("##### Customization Costs")
+        st.caption("Default values are from the spreadsheet. You can override them if needed.")
 
-    with col1:
-        default_setup_fee = clean_price(product_data.get('Customization Setup Fee', '')) or 0
-        customization_setup_fee_input = st.number_input(
-            "Customization Setup Fee",
-            min_value=0.0,
-            value=float(default_setup_fee),
-            step=1.0,
-            key="input_setup_fee",
-            help="One-time setup fee for this customization"
-        )
+        col1, col2 = st.columns(2)
 
-    with col2:
-        default_per_unit = clean_price(product_data.get('Customization Cost per Unit', '')) or 0
-        customization_per_unit_input = st.number_input(
-            "Customization Cost per Unit",
-            min_value=0.0,
-            value=float(default_per_unit),
-            step=0.1,
-            key="input_per_unit",
-            help="Additional cost per unit for customization"
-        )
+        with col1:
+            default_setup_fee = clean_price(product_data.get('Customization Setup Fee', '')) or 0
+            customization_setup_fee_input = st.number_input(
+                "Customization Setup Fee",
+                min_value=0.0,
+                value=float(default_setup_fee),
+                step=1.0,
+                key="input_setup_fee",
+                help="One-time setup fee for this customization"
+            )
 
-    # Show customization cost summary
-    st.markdown("**Total Customization Cost:**")
+        with col2:
+            default_per_unit = clean_price(product_data.get('Customization Cost per Unit', '')) or 0
+            customization_per_unit_input = st.number_input(
+                "Customization Cost per Unit",
+                min_value=0.0,
+                value=float(default_per_unit),
+                step=0.1,
+                key="input_per_unit",
+                help="Additional cost per unit for customization"
+            )
 
-    # Determine effective quantity for customization charges
-    if apply_custom_minimum and customization_minimum_qty > quantity:
-        effective_custom_qty = customization_minimum_qty
-    else:
-        effective_custom_qty = quantity
+        # Show customization cost summary
+        st.markdown("**Total Customization Cost:**")
 
-    customization_setup_total_preview = customization_setup_fee_input
-    customization_unit_total_preview = customization_per_unit_input * effective_custom_qty
-    total_customization_preview = customization_setup_total_preview + customization_unit_total_preview
-    per_unit_impact = total_customization_preview / quantity if quantity > 0 else 0
+        # Determine effective quantity for customization charges
+        if apply_custom_minimum and customization_minimum_qty > quantity:
+            effective_custom_qty = customization_minimum_qty
+        else:
+            effective_custom_qty = quantity
 
-    summary_data = [
-        ["Setup Fee", f"${customization_setup_total_preview:.2f} (one-time)"],
-        ["Per-Unit Cost", f"${customization_per_unit_input:.2f} x {effective_custom_qty} = ${customization_unit_total_preview:.2f}"],
-    ]
+        customization_setup_total_preview = customization_setup_fee_input
+        customization_unit_total_preview = customization_per_unit_input * effective_custom_qty
+        total_customization_preview = customization_setup_total_preview + customization_unit_total_preview
+        per_unit_impact = total_customization_preview / quantity if quantity > 0 else 0
 
-    # Show note if minimum is applied
-    if apply_custom_minimum and customization_minimum_qty > quantity:
-        summary_data.append(["", ""])
-        summary_data.append(["Note", f"Charging for {customization_minimum_qty} units (minimum)"])
+        summary_data = [
+            ["Setup Fee", f"${customization_setup_total_preview:.2f} (one-time)"],
+            ["Per-Unit Cost", f"${customization_per_unit_input:.2f} x {effective_custom_qty} = ${customization_unit_total_preview:.2f}"],
+        ]
 
-    summary_data.extend([
-        ["", ""],
-        ["**Total**", f"**${total_customization_preview:.2f}**"],
-        ["**Per-Unit Impact**", f"**${per_unit_impact:.2f}/unit**"]
-    ])
+        # Show note if minimum is applied
+        if apply_custom_minimum and customization_minimum_qty > quantity:
+            summary_data.append(["", ""])
+            summary_data.append(["Note", f"Charging for {customization_minimum_qty} units (minimum)"])
 
-    summary_df = pd.DataFrame(summary_data, columns=["Item", "Amount"])
-    st.table(summary_df)
-else:
-    customization_setup_fee_input = 0
-    customization_per_unit_input = 0
-    apply_custom_minimum = False
-    customization_minimum_qty = 0
+        summary_data.extend([
+            ["", ""],
+            ["**Total**", f"**${total_customization_preview:.2f}**"],
+            ["**Per-Unit Impact**", f"**${per_unit_impact:.2f}/unit**"]
+        ])
 
-st.markdown("<br>", unsafe_allow_html=True)
+        summary_df = pd.DataFrame(summary_data, columns=["Item", "Amount"])
+        st.table(summary_df)
+    else:
+        customization_setup_fee_input = 0
+        customization_per_unit_input = 0
+        apply_custom_minimum = False
+        customization_minimum_qty = 0
+
+    st.markdown("<br>", unsafe_allow_html=True)
+
+    # ===== PRODUCT PREVIEW & ADD TO ORDER =====
+    start_section("5. Product Preview")
+    st.header("5. Product Preview")
+
+    # Get price for quantity using new system
+    base_price, tier_range, tier_column = get_unit_price(pricing_table, product_data, quantity)
+
+    if base_price is None:
+        st.error("No pricing available for this quantity. Please contact the partner.")
+        # DEBUG: Show available pricing data
+        with st.expander("Debug: Available Pricing Data"):
+            st.write(f"Pricing Tiers (Y/N): {product_data.get('Pricing Tiers (Y/N)', 'N/A')}")
+            st.write(f"Pricing Tiers Info: {product_data.get('Pricing Tiers Info', 'N/A')}")
+            st.write(f"PBP Cost (No Tiers): {product_data.get('PBP Cost (No Tiers)', 'N/A')}")
+            for i in range(1, 7):
+                col_name = f'PBP Cost: Tier {i}'
+                st.write(f"{col_name}: {product_data.get(col_name, 'N/A')}")
+        return
+
+    # Show which tier is being used
+    if tier_range == "No Tiers":
+        st.caption(f"Flat pricing: ${base_price:.2f} per unit")
+    else:
+        st.caption(f"Using pricing tier: {tier_range} units | Base price: ${base_price:.2f} per unit")
 
-# ===== PRODUCT PREVIEW & ADD TO ORDER =====
-st.header("5. Product Preview")
-
-# Get price for quantity using new system
-base_price, tier_range, tier_column = get_unit_price_new_system(product_data, quantity)
-
-if base_price is None:
-    st.error("No pricing available for this quantity. Please contact the partner.")
-    # DEBUG: Show available pricing data
-    with st.expander("Debug: Available Pricing Data"):
-        st.write(f"Pricing Tiers (Y/N): {product_data.get('Pricing Tiers (Y/N)', 'N/A')}")
-        st.write(f"Pricing Tiers Info: {product_data.get('Pricing Tiers Info', 'N/A')}")
-        st.write(f"PBP Cost (No Tiers): {product_data.get('PBP Cost (No Tiers)', 'N/A')}")
-        for i in range(1, 7):
-            col_name = f'PBP Cost: Tier {i}'
-            st.write(f"{col_name}: {product_data.get(col_name, 'N/A')}")
-    st.stop()
+    # Calculate customization costs - use user input values
+    customization_setup_fee = 0
+    customization_per_unit = 0
 
-# Show which tier is being used
-if tier_range == "No Tiers":
-    st.caption(f"Flat pricing: ${base_price:.2f} per unit")
-else:
-    st.caption(f"Using pricing tier: {tier_range} units | Base price: ${base_price:.2f} per unit")
+    if include_customization:
+        customization_setup_fee = customization_setup_fee_input
+        customization_per_unit = customization_per_unit_input
 
-# Calculate customization costs - use user input values
-customization_setup_fee = 0
-customization_per_unit = 0
-
-if include_customization:
-    customization_setup_fee = customization_setup_fee_input
-    customization_per_unit = customization_per_unit_input
-
-    # Apply minimum if set
-    if apply_custom_minimum and customization_minimum_qty > quantity:
-        effective_custom_qty = customization_minimum_qty
+        # Apply minimum if set
+        if apply_custom_minimum and customization_minimum_qty > quantity:
+            effective_custom_qty = customization_minimum_qty
+        else:
+            effective_custom_qty = quantity
     else:
         effective_custom_qty = quantity
-else:
-    effective_custom_qty = quantity
-
-# Calculate product totals (without shipping/tariff)
-product_subtotal = base_price * quantity
-customization_setup_total = customization_setup_fee
-customization_unit_total = customization_per_unit * effective_custom_qty
-subtotal_before_markup = product_subtotal + customization_setup_total + customization_unit_total
-markup_amount = product_subtotal * (markup_percent / 100)
-product_total = subtotal_before_markup + markup_amount
-
-# Per-unit for this product
-total_per_unit = product_total / quantity
-
-# Display product summary
-st.success(f"Product Total: ${product_total:.2f}  ({quantity} units @ ${total_per_unit:.2f} each)")
-
-# Add to Order button
-button_label = "Update Product in Order" if st.session_state.edit_index is not None else "Add to Order"
-if st.button(button_label, type="primary", use_container_width=True):
-    # Parse tariff data from product
-    tariff_estimate_raw = product_data.get('Tariff Estimate (if available)', '')
-    default_tariff_rate = parse_tariff_rate(tariff_estimate_raw)
-
-    # Calculate tariff base (product + markup, no customization)
-    tariff_base = product_subtotal + markup_amount
-    tariff_amount = calculate_product_tariff(tariff_base, default_tariff_rate)
-
-    # Create order item
-    order_item = {
-        'product_name': product_data["Product/Service"],
-        'product_ref': product_data.get("Purchase Description", ""),
-        'partner': product_data["Partner"],
-        'minimum_qty': "",  # Not in new structure
-        'quantity': quantity,
-        'markup_percent': markup_percent,
-        'include_customization': include_customization,
-        'customization_description': customization_info if customization_info else "Custom work",
-        'base_price': base_price,
-        'tier_range': tier_range,
-        'tier_column': tier_column,
-        'customization_setup_fee': customization_setup_fee,
-        'customization_per_unit': customization_per_unit,
-        'product_subtotal': product_subtotal,
-        'customization_setup_total': customization_setup_total,
-        'customization_unit_total': customization_unit_total,
-        'subtotal_before_markup': subtotal_before_markup,
-        'markup_amount': markup_amount,
-        'product_total': product_total,
-        'total_per_unit': total_per_unit,
-        'product_data_row': product_data,  # Store full product row for proposal generation
-        'country_of_origin': product_data.get("Country of Origin", ""),
-        'tariff_rate_percent': default_tariff_rate,
-        'tariff_info': product_data.get("Tariff Info", ""),
-        'tariff_base': tariff_base,
-        'tariff_amount': tariff_amount,
-        'partner_msrp_per_unit': partner_msrp if show_msrp else 0.0,
-        'show_msrp_comparison': show_msrp,
-        'round_to_five': round_to_five,
-        'apply_custom_minimum': apply_custom_minimum if include_customization else False,
-        'customization_minimum_qty': customization_minimum_qty if (include_customization and apply_custom_minimum) else 0,
-        'effective_custom_qty': effective_custom_qty if include_customization else 0
-    }
-
-    # Add or update item
-    if st.session_state.edit_index is not None:
-        st.session_state.order_items[st.session_state.edit_index] = order_item
-        st.session_state.edit_index = None
-        st.success("Product updated in order!")
-    else:
-        st.session_state.order_items.append(order_item)
-        st.success("Product added to order!")
-
-    st.rerun()
-
-# Show detailed breakdown in expander
-with st.expander("Detailed Price Breakdown"):
-    breakdown_items = [
-        ["Base Price (tier: " + tier_range + ")", f"${base_price:.2f}", f"${product_subtotal:.2f}"]
-    ]
-
-    if include_customization:
-        if customization_setup_total > 0:
-            breakdown_items.append(["Customization Setup Fee", f"${customization_setup_total / quantity:.2f}", f"${customization_setup_total:.2f}"])
-        if customization_unit_total > 0:
-            if apply_custom_minimum and customization_minimum_qty > quantity:
-                breakdown_items.append([f"Customization per Unit ({effective_custom_qty} units @ ${customization_per_unit:.2f}) [minimum applied]", f"${customization_per_unit:.2f}", f"${customization_unit_total:.2f}"])
-            else:
-                breakdown_items.append([f"Customization per Unit ({quantity} @ ${customization_per_unit:.2f})", f"${customization_per_unit:.2f}", f"${customization_unit_total:.2f}"])
-
-    breakdown_items.append(["**Subtotal**", f"**${subtotal_before_markup / quantity:.2f}**", f"**${subtotal_before_markup:.2f}**"])
-    breakdown_items.append([f"Markup ({markup_percent}% on product only)", f"${markup_amount / quantity:.2f}", f"${markup_amount:.2f}"])
-    breakdown_items.append(["**Product Total**", f"**${total_per_unit:.2f}**", f"**${product_total:.2f}**"])
-
-    breakdown_df = pd.DataFrame(breakdown_items, columns=["Item", "Per Unit", "Total"])
-    st.table(breakdown_df)
-
-# ===== CURRENT ORDER SUMMARY =====
-st.divider()
-st.header("6. Current Order")
-
-if len(st.session_state.order_items) == 0:
-    st.info("""
-    **Your order is empty.**
 
-    Select a product from Section 1, customize the details in Section 2,
-    then click "Add to Order" in Section 3 to add items here.
-    """)
-else:
-    st.success(f"{len(st.session_state.order_items)} product(s) in order")
-
-    # Display order items
-    for idx, item in enumerate(st.session_state.order_items):
-        # Calculate what will show as separate line items in deliverables
-        has_customization = item.get('include_customization', False)
-        customization_setup = item.get('customization_setup_total', 0) if has_customization else 0
-        customization_unit = item.get('customization_unit_total', 0) if has_customization else 0
-
-        # Count line items for display
-        line_item_count = 1  # Base product
-        if customization_setup > 0:
-            line_item_count += 1
-        if customization_unit > 0:
-            line_item_count += 1
-
-        line_count_text = f" ({line_item_count} line items)" if has_customization and line_item_count > 1 else ""
-
-        with st.expander(f"{item['product_name']}  -  {item['quantity']} units @ ${item['total_per_unit']:.2f} each  =  ${item['product_total']:.2f}{line_count_text}"):
-            # Check if custom item
-            if item.get('is_custom', False):
-                # Custom item display
-                col1, col2 = st.columns([3, 1])
-
-                with col1:
-                    st.write(f"**Type:** Custom Line Item")
-                    st.write(f"**Description:** {item.get('custom_description', 'N/A')}")
-                    st.write(f"**Quantity:** {item['quantity']}")
-                    st.write(f"**Unit Price:** ${item['total_per_unit']:.2f}")
-                    st.write(f"**Total Price:** ${item['product_total']:.2f}")
-
-                with col2:
-                    if st.button("Remove", key=f"remove_{idx}"):
-                        st.session_state.order_items.pop(idx)
-                        st.rerun()
+    # Calculate product totals (without shipping/tariff)
+    default_tariff_rate = parse_tariff_rate(product_data.get('Tariff Estimate (if available)', ''))
+    totals = calculate_product_totals(
+        base_price,
+        quantity,
+        markup_percent,
+        customization_setup_fee=customization_setup_fee,
+        customization_per_unit=customization_per_unit,
+        effective_custom_qty=effective_custom_qty,
+        tariff_rate_percent=default_tariff_rate
+    )
+    product_subtotal = totals['product_subtotal']
+    customization_setup_total = totals['customization_setup_total']
+    customization_unit_total = totals['customization_unit_total']
+    subtotal_before_markup = totals['subtotal_before_markup']
+    markup_amount = totals['markup_amount']
+    product_total = totals['product_total']
+
+    # Per-unit for this product
+    total_per_unit = totals['total_per_unit']
+
+    # Display product summary
+    st.success(f"Product Total: ${product_total:.2f}  ({quantity} units @ ${total_per_unit:.2f} each)")
+
+    # Add to Order button
+    button_label = "Update Product in Order" if st.session_state.edit_index is not None else "Add to Order"
+    if st.button(button_label, type="primary", use_container_width=True):
+        # Tariff base is product + markup (no customization)
+        tariff_base = totals['tariff_base']
+        tariff_amount = totals['tariff_amount']
+
+        # Create order item
+        order_item = {
+            'product_name': product_data["Product/Service"],
+            'product_ref': product_data.get("Purchase Description", ""),
+            'partner': product_data["Partner"],
+            'minimum_qty': "",  # Not in new structure
+            'quantity': quantity,
+            'markup_percent': markup_percent,
+            'include_customization': include_customization,
+            'customization_description': customization_info if customization_info else "Custom work",
+            'base_price': base_price,
+            'tier_range': tier_range,
+            'tier_column': tier_column,
+            'customization_setup_fee': customization_setup_fee,
+            'customization_per_unit': customization_per_unit,
+            'product_subtotal': product_subtotal,
+            'customization_setup_total': customization_setup_total,
+            'customization_unit_total': customization_unit_total,
+            'subtotal_before_markup': subtotal_before_markup,
+            'markup_amount': markup_amount,
+            'product_total': product_total,
+            'total_per_unit': total_per_unit,
+            'product_key': (product_data["Partner"], product_data["Product/Service"]),  # Catalog index key (for proposal generation)
+            'country_of_origin': product_data.get("Country of Origin", ""),
+            'tariff_rate_percent': default_tariff_rate,
+            'tariff_info': product_data.get("Tariff Info", ""),
+            'tariff_base': tariff_base,
+            'tariff_amount': tariff_amount,
+            'partner_msrp_per_unit': partner_msrp if show_msrp else 0.0,
+            'show_msrp_comparison': show_msrp,
+            'round_to_five': round_to_five,
+            'apply_custom_minimum': apply_custom_minimum if include_customization else False,
+            'customization_minimum_qty': customization_minimum_qty if (include_customization and apply_custom_minimum) else 0,
+            'effective_custom_qty': effective_custom_qty if include_customization else 0
+        }
 
-            else:
-                # Regular product display
-                col1, col2, col3 = st.columns([2, 1, 1])
+        # Proposal MOQ and its tier price, calculated once here (not on every proposal render)
+        order_item['moq'], order_item['moq_base_price'], _ = calculate_order_moq(
+            pricing_table,
+            product_data,
+            quantity,
+            markup_percent,
+            customization_setup_fee,
+            customization_per_unit
+        )
 
-                with col1:
-                    st.write(f"**Partner:** {item['partner']}")
-                    st.write(f"**Product Ref:** {item['product_ref']}")
-                    st.write(f"**Quantity:** {item['quantity']}")
-                    st.write(f"**Pricing Tier:** {item['tier_range']}")
-                    st.write(f"**Base Price:** ${item['base_price']:.2f} per unit")
-                    st.write(f"**Markup:** {item['markup_percent']:.1f}%")
-                    if has_customization:
-                        customization_desc = item.get('customization_description', 'Custom work')
-                        st.write(f"**Customization:** {customization_desc}")
+        # Add or update item
+        if st.session_state.edit_index is not None:
+            st.session_state.order_items[st.session_state.edit_index] = order_item
+            st.session_state.edit_index = None
+            st.success("Product updated in order!")
+        else:
+            st.session_state.order_items.append(order_item)
+            st.success("Product added to order!")
 
-                        # Show minimum if applied
-                        if item.get('apply_custom_minimum', False):
-                            custom_min = item.get('customization_minimum_qty', 0)
-                            if custom_min > item['quantity']:
-                                st.write(f"**Customization Minimum:** {custom_min} units (applied)")
+        st.rerun()
 
-                with col2:
-                    if st.button("✏️ Edit", key=f"edit_{idx}"):
-                        st.session_state.edit_index = idx
-                        st.rerun()
+    # Show detailed breakdown in expander
+    with st.expander("Detailed Price Breakdown"):
+        breakdown_items = [
+            ["Base Price (tier: " + tier_range + ")", f"${base_price:.2f}", f"${product_subtotal:.2f}"]
+        ]
 
-                with col3:
-                    if st.button("Remove", key=f"remove_{idx}"):
-                        st.session_state.order_items.pop(idx)
-                        st.rerun()
+        if include_customization:
+            if customization_setup_total > 0:
+                breakdown_items.append(["Customization Setup Fee", f"${customization_setup_total / quantity:.2f}", f"${customization_setup_total:.2f}"])
+            if customization_unit_total > 0:
+                if apply_custom_minimum and customization_minimum_qty > quantity:
+                    breakdown_items.append([f"Customization per Unit ({effective_custom_qty} units @ ${customization_per_unit:.2f}) [minimum applied]", f"${customization_per_unit:.2f}", f"${customization_unit_total:.2f}"])
+                else:
+                    breakdown_items.append([f"Customization per Unit ({quantity} @ ${customization_per_unit:.2f})", f"${customization_per_unit:.2f}", f"${customization_unit_total:.2f}"])
 
-                # Show line item breakdown - how this will appear in invoices/proposals
-                if has_customization and (customization_setup > 0 or customization_unit > 0):
-                    st.write("**Line Items (as they will appear in deliverables):**")
+        breakdown_items.append(["**Subtotal**", f"**${subtotal_before_markup / quantity:.2f}**", f"**${subtotal_before_markup:.2f}**"])
+        breakdown_items.append([f"Markup ({markup_percent}% on product only)", f"${markup_amount / quantity:.2f}", f"${markup_amount:.2f}"])
+        breakdown_items.append(["**Product Total**", f"**${total_per_unit:.2f}**", f"**${product_total:.2f}**"])
 
-                    # Calculate base product price (without customization)
-                    base_product_only = item['product_subtotal'] + item['markup_amount']
+        breakdown_df = pd.DataFrame(breakdown_items, columns=["Item", "Per Unit", "Total"])
+        st.table(breakdown_df)
 
-                    line_items_display = [
-                        [f"1. {item['product_name']}", item['quantity'], f"${base_product_only / item['quantity']:.2f}", f"${base_product_only:.2f}"]
-                    ]
+    end_section()
 
-                    line_num = 2
-                    if customization_setup > 0:
-                        customization_desc = item.get('customization_description', 'Custom work')
-                        line_items_display.append([f"{line_num}. Setup Fee: {customization_desc}", 1, f"${customization_setup:.2f}", f"${customization_setup:.2f}"])
-                        line_num += 1
+render_product_configurator()
 
-                    if customization_unit > 0:
-                        customization_desc = item.get('customization_description', 'Custom work')
-                        line_items_display.append([f"{line_num}. Customization: {customization_desc}", item['quantity'], f"${customization_unit / item['quantity']:.2f}", f"${customization_unit:.2f}"])
-                        line_num += 1
+# ===== ORDER (SECTIONS 6-8) =====
+# Runs as a fragment: shipping, tariff, discount and fee changes only rerun the order sections.
+# Adding, editing or removing items reruns the whole app.
+@st.fragment
+def render_order():
+    # ===== CURRENT ORDER SUMMARY =====
+    start_section("6. Current Order")
+    st.divider()
+    st.header("6. Current Order")
 
-                    # Add tariff line item if applicable
-                    tariff_amount = item.get('tariff_amount', 0)
-                    if tariff_amount > 0:
-                        country = item.get('country_of_origin', 'Unknown')
-                        tariff_rate = item.get('tariff_rate_percent', 0)
-                        line_items_display.append([
-                            f"{line_num}. Tariff ({tariff_rate}% - {country})",
-                            1,
-                            f"${tariff_amount:.2f}",
-                            f"${tariff_amount:.2f}"
-                        ])
+    if len(st.session_state.order_items) == 0:
+        st.info("""
+    **Your order is empty.**
 
-                    line_items_display.append(["**TOTAL**", "", "", f"**${item['product_total']:.2f}**"])
+    Select a product from Section 1, customize the details in Section 2,
+    then click "Add to Order" in Section 3 to add items here.
+    """)
+    else:
+        st.success(f"{len(st.session_state.order_items)} product(s) in order")
+
+        # Display order items
+        for idx, item in enumerate(st.session_state.order_items):
+            # Calculate what will show as separate line items in deliverables
+            has_customization = item.get('include_customization', False)
+            customization_setup = item.get('customization_setup_total', 0) if has_customization else 0
+            customization_unit = item.get('customization_unit_total', 0) if has_customization else 0
+
+            # Count line items for display
+            line_item_count = 1  # Base product
+            if customization_setup > 0:
+                line_item_count += 1
+            if customization_unit > 0:
+                line_item_count += 1
+
+            line_count_text = f" ({line_item_count} line items)" if has_customization and line_item_count > 1 else ""
+
+            with st.expander(f"{item['product_name']}  -  {item['quantity']} units @ ${item['total_per_unit']:.2f} each  =  ${item['product_total']:.2f}{line_count_text}"):
+                # Check if custom item
+                if item.get('is_custom', False):
+                    # Custom item display
+                    col1, col2 = st.columns([3, 1])
+
+                    with col1:
+                        st.write(f"**Type:** Custom Line Item")
+                        st.write(f"**Description:** {item.get('custom_description', 'N/A')}")
+                        st.write(f"**Quantity:** {item['quantity']}")
+                        st.write(f"**Unit Price:** ${item['total_per_unit']:.2f}")
+                        st.write(f"**Total Price:** ${item['product_total']:.2f}")
+
+                    with col2:
+                        if st.button("Remove", key=f"remove_{idx}"):
+                            st.session_state.order_items.pop(idx)
+                            st.rerun()
 
-                    line_items_df = pd.DataFrame(line_items_display, columns=["Item", "Qty", "Per Unit", "Total"])
-                    st.table(line_items_df)
                 else:
-                    st.write("**Line Item:**")
-                    simple_display = pd.DataFrame([
-                        {
-                            "Item": item['product_name'],
-                            "Qty": item['quantity'],
-                            "Per Unit": f"${item['total_per_unit']:.2f}",
-                            "Total": f"${item['product_total']:.2f}"
-                        }
-                    ])
-                    st.table(simple_display)
-
-                # Show detailed cost breakdown with toggle
-                show_breakdown = st.checkbox("Show detailed cost breakdown", key=f"breakdown_{idx}")
-                if show_breakdown:
-                    breakdown_items = [
-                        ["Base Price", f"${item['base_price']:.2f}", f"${item['product_subtotal']:.2f}"]
-                    ]
-
-                    if customization_setup > 0:
-                        breakdown_items.append(["Customization Setup Fee", f"${customization_setup / item['quantity']:.2f}", f"${customization_setup:.2f}"])
-                    if customization_unit > 0:
-                        breakdown_items.append(["Customization per Unit", f"${customization_unit / item['quantity']:.2f}", f"${customization_unit:.2f}"])
-
-                    breakdown_items.append(["**Subtotal**", f"**${item['subtotal_before_markup'] / item['quantity']:.2f}**", f"**${item['subtotal_before_markup']:.2f}**"])
-                    breakdown_items.append([f"Markup ({item['markup_percent']:.1f}%)", f"${item['markup_amount'] / item['quantity']:.2f}", f"${item['markup_amount']:.2f}"])
-                    breakdown_items.append(["**Product Total**", f"**${item['total_per_unit']:.2f}**", f"**${item['product_total']:.2f}**"])
-
-                    breakdown_df = pd.DataFrame(breakdown_items, columns=["Item", "Per Unit", "Total"])
-                    st.table(breakdown_df)
-
-    # Clear order button
-    if st.button("Clear Entire Order", type="secondary"):
-        st.session_state.order_items = []
-        st.session_state.edit_index = None
-        st.rerun()
+                    # Regular product display
+                    col1, col2, col3 = st.columns([2, 1, 1])
+
+                    with col1:
+                        st.write(f"**Partner:** {item['partner']}")
+                        st.write(f"**Product Ref:** {item['product_ref']}")
+                        st.write(f"**Quantity:** {item['quantity']}")
+                        st.write(f"**Pricing Tier:** {item['tier_range']}")
+                        st.write(f"**Base Price:** ${item['base_price']:.2f} per unit")
+                        st.write(f"**Markup:** {item['markup_percent']:.1f}%")
+                        if has_customization:
+                            customization_desc = item.get('customization_description', 'Custom work')
+                            st.write(f"**Customization:** {customization_desc}")
+
+                            # Show minimum if applied
+                            if item.get('apply_custom_minimum', False):
+                                custom_min = item.get('customization_minimum_qty', 0)
+                                if custom_min > item['quantity']:
+                                    st.write(f"**Customization Minimum:** {custom_min} units (applied)")
+
+                    with col2:
+                        if st.button("✏️ Edit", key=f"edit_{idx}"):
+                            st.session_state.edit_index = idx
+                            st.rerun()
+
+                    with col3:
+                        if st.button("Remove", key=f"remove_{idx}"):
+                            st.session_state.order_items.pop(idx)
+                            st.rerun()
+
+                    # Show line item breakdown - how this will appear in invoices/proposals
+                    if has_customization and (customization_setup > 0 or customization_unit > 0):
+                        st.write("**Line Items (as they will appear in deliverables):**")
+
+                        # Calculate base product price (without customization)
+                        base_product_only = item['product_subtotal'] + item['markup_amount']
+
+                        line_items_display = [
+                            [f"1. {item['product_name']}", item['quantity'], f"${base_product_only / item['quantity']:.2f}", f"${base_product_only:.2f}"]
+                        ]
+
+                        line_num = 2
+                        if customization_setup > 0:
+                            customization_desc = item.get('customization_description', 'Custom work')
+                            line_items_display.append([f"{line_num}. Setup Fee: {customization_desc}", 1, f"${customization_setup:.2f}", f"${customization_setup:.2f}"])
+                            line_num += 1
+
+                        if customization_unit > 0:
+                            customization_desc = item.get('customization_description', 'Custom work')
+                            line_items_display.append([f"{line_num}. Customization: {customization_desc}", item['quantity'], f"${customization_unit / item['quantity']:.2f}", f"${customization_unit:.2f}"])
+                            line_num += 1
+
+                        # Add tariff line item if applicable
+                        tariff_amount = item.get('tariff_amount', 0)
+                        if tariff_amount > 0:
+                            country = item.get('country_of_origin', 'Unknown')
+                            tariff_rate = item.get('tariff_rate_percent', 0)
+                            line_items_display.append([
+                                f"{line_num}. Tariff ({tariff_rate}% - {country})",
+                                1,
+                                f"${tariff_amount:.2f}",
+                                f"${tariff_amount:.2f}"
+                            ])
+
+                        line_items_display.append(["**TOTAL**", "", "", f"**${item['product_total']:.2f}**"])
+
+                        line_items_df = pd.DataFrame(line_items_display, columns=["Item", "Qty", "Per Unit", "Total"])
+                        st.table(line_items_df)
+                    else:
+                        st.write("**Line Item:**")
+                        simple_display = pd.DataFrame([
+                            {
+                                "Item": item['product_name'],
+                                "Qty": item['quantity'],
+                                "Per Unit": f"${item['total_per_unit']:.2f}",
+                                "Total": f"${item['product_total']:.2f}"
+                            }
+                        ])
+                        st.table(simple_display)
+
+                    # Show detailed cost breakdown with toggle
+                    show_breakdown = st.checkbox("Show detailed cost breakdown", key=f"breakdown_{idx}")
+                    if show_breakdown:
+                        breakdown_items = [
+                            ["Base Price", f"${item['base_price']:.2f}", f"${item['product_subtotal']:.2f}"]
+                        ]
+
+                        if customization_setup > 0:
+                            breakdown_items.append(["Customization Setup Fee", f"${customization_setup / item['quantity']:.2f}", f"${customization_setup:.2f}"])
+                        if customization_unit > 0:
+                            breakdown_items.append(["Customization per Unit", f"${customization_unit / item['quantity']:.2f}", f"${customization_unit:.2f}"])
+
+                        breakdown_items.append(["**Subtotal**", f"**${item['subtotal_before_markup'] / item['quantity']:.2f}**", f"**${item['subtotal_before_markup']:.2f}**"])
+                        breakdown_items.append([f"Markup ({item['markup_percent']:.1f}%)", f"${item['markup_amount'] / item['quantity']:.2f}", f"${item['markup_amount']:.2f}"])
+                        breakdown_items.append(["**Product Total**", f"**${item['total_per_unit']:.2f}**", f"**${item['product_total']:.2f}**"])
+
+                        breakdown_df = pd.DataFrame(breakdown_items, columns=["Item", "Per Unit", "Total"])
+                        st.table(breakdown_df)
+
+        # Clear order button
+        if st.button("Clear Entire Order", type="secondary"):
+            st.session_state.order_items = []
+            st.session_state.edit_index = None
+            st.rerun()
 
-# ===== ORDER SETTINGS =====
-st.divider()
-st.header("7. Order Settings")
+    # ===== ORDER SETTINGS =====
+    start_section("7. Order Settings")
+    st.divider()
+    st.header("7. Order Settings")
 
-if len(st.session_state.order_items) == 0:
-    st.caption("Add products to your order first, then configure order settings here.")
-else:
-    # Shipping
-    st.subheader("Shipping")
-    st.session_state.order_shipping = st.number_input(
-        "Shipping Cost ($)",
-        min_value=0.0,
-        value=st.session_state.order_shipping,
-        step=10.0,
-        key="shipping_input",
-        help="One-time shipping cost for the entire order (not per product)"
-    )
+    if len(st.session_state.order_items) == 0:
+        st.caption("Add products to your order first, then configure order settings here.")
+    else:
+        # Shipping
+        st.subheader("Shipping")
+        st.session_state.order_shipping = st.number_input(
+            "Shipping Cost ($)",
+            min_value=0.0,
+            value=st.session_state.order_shipping,
+            step=10.0,
+            key="shipping_input",
+            help="One-time shipping cost for the entire order (not per product)"
+        )
 
-    # Tariff Configuration
-    st.divider()
-    st.subheader("Tariff Configuration")
+        # Tariff Configuration
+        st.divider()
+        st.subheader("Tariff Configuration")
 
-    st.markdown("""
+        st.markdown("""
 Tariffs are import duties based on product country of origin.
 Rates default to current estimates but can be adjusted as needed.
 """)
 
-    # Build editable tariff table with detailed breakdown
-    tariff_table_rows = []
-
-    for idx, item in enumerate(st.session_state.order_items):
-        # Get tariff base (product cost + markup, excludes customization)
-        tariff_base = item.get('tariff_base', 0.0)
-        tariff_base_per_unit = tariff_base / item['quantity'] if item['quantity'] > 0 else 0
-
-        # Display product info
-        st.markdown(f"**{idx + 1}. {item['product_name']}**")
-
-        col1, col2, col3 = st.columns([2, 2, 2])
-
-        with col1:
-            country = item.get('country_of_origin', 'N/A')
-            st.write(f"**Country:** {country if country else 'N/A'}")
-            st.write(f"**Quantity:** {item['quantity']} units")
-
-        with col2:
-            st.write(f"**Unit Cost:** ${tariff_base_per_unit:.2f}")
-            st.write(f"**Total Cost:** ${tariff_base:.2f}")
-            st.caption("(Product + Markup, excludes customization)")
-
-        with col3:
-            # Editable tariff rate
-            current_rate = item.get('tariff_rate_percent', 0.0)
-            new_rate = st.number_input(
-                "Tariff Rate (%)",
-                min_value=0.0,
-                max_value=100.0,
-                value=current_rate,
-                step=0.5,
-                key=f"tariff_rate_{idx}",
-                format="%.1f"
-            )
-
-            # Update if changed
-            if new_rate != current_rate:
-                item['tariff_rate_percent'] = new_rate
-                item['tariff_amount'] = calculate_product_tariff(tariff_base, new_rate)
-
-            tariff_amount = item.get('tariff_amount', 0.0)
-            st.write(f"**Tariff Amount:** ${tariff_amount:.2f}")
-            if tariff_base > 0 and new_rate > 0:
-                st.caption(f"${tariff_base:.2f} × {new_rate}% = ${tariff_amount:.2f}")
-
-        # Show tariff info if available
-        tariff_info = item.get('tariff_info', '')
-        if tariff_info and tariff_info.strip():
-            st.caption(f"ℹ️ {tariff_info}")
-
-        st.markdown("")  # Spacing
-
-    # Show total tariff
-    total_tariff = sum(item.get('tariff_amount', 0.0) for item in st.session_state.order_items)
-    st.markdown(f"**Total Tariff for Order:** ${total_tariff:.2f}")
-
-    st.caption("Tariff is calculated on product cost + markup (excludes customization fees and shipping)")
-
-    # Discount Options
-    st.divider()
-    st.subheader("Discount Options")
-
-    discount_type = st.radio(
-        "Select discount type:",
-        options=["none", "preset", "custom"],
-        format_func=lambda x: {"none": "No Discount", "preset": "Preset Discount", "custom": "Custom Discount"}[x],
-        horizontal=True,
-        key="discount_type_radio"
-    )
-    st.session_state.order_discount_type = discount_type
-
-    if discount_type == "preset":
-        preset_options = [
-            "NGO Discount (5%)"
-        ]
-        st.session_state.order_discount_preset = st.selectbox(
-            "Select preset discount:",
-            options=preset_options,
-            key="discount_preset_select"
+        # Build editable tariff table with detailed breakdown
+        tariff_table_rows = []
+
+        for idx, item in enumerate(st.session_state.order_items):
+            # Get tariff base (product cost + markup, excludes customization)
+            tariff_base = item.get('tariff_base', 0.0)
+            tariff_base_per_unit = tariff_base / item['quantity'] if item['quantity'] > 0 else 0
+
+            # Display product info
+            st.markdown(f"**{idx + 1}. {item['product_name']}**")
+
+            col1, col2, col3 = st.columns([2, 2, 2])
+
+            with col1:
+                country = item.get('country_of_origin', 'N/A')
+                st.write(f"**Country:** {country if country else 'N/A'}")
+                st.write(f"**Quantity:** {item['quantity']} units")
+
+            with col2:
+                st.write(f"**Unit Cost:** ${tariff_base_per_unit:.2f}")
+                st.write(f"**Total Cost:** ${tariff_base:.2f}")
+                st.caption("(Product + Markup, excludes customization)")
+
+            with col3:
+                # Editable tariff rate
+                current_rate = item.get('tariff_rate_percent', 0.0)
+                new_rate = st.number_input(
+                    "Tariff Rate (%)",
+                    min_value=0.0,
+                    max_value=100.0,
+                    value=current_rate,
+                    step=0.5,
+                    key=f"tariff_rate_{idx}",
+                    format="%.1f"
+                )
+
+                # Update if changed
+                if new_rate != current_rate:
+                    item['tariff_rate_percent'] = new_rate
+                    item['tariff_amount'] = calculate_product_tariff(tariff_base, new_rate)
+
+                tariff_amount = item.get('tariff_amount', 0.0)
+                st.write(f"**Tariff Amount:** ${tariff_amount:.2f}")
+                if tariff_base > 0 and new_rate > 0:
+                    st.caption(f"${tariff_base:.2f} × {new_rate}% = ${tariff_amount:.2f}")
+
+            # Show tariff info if available
+            tariff_info = item.get('tariff_info', '')
+            if tariff_info and tariff_info.strip():
+                st.caption(f"ℹ️ {tariff_info}")
+
+            st.markdown("")  # Spacing
+
+        # Show total tariff
+        total_tariff = sum(item.get('tariff_amount', 0.0) for item in st.session_state.order_items)
+        st.markdown(f"**Total Tariff for Order:** ${total_tariff:.2f}")
+
+        st.caption("Tariff is calculated on product cost + markup (excludes customization fees and shipping)")
+
+        # Discount Options
+        st.divider()
+        st.subheader("Discount Options")
+
+        discount_type = st.radio(
+            "Select discount type:",
+            options=["none", "preset", "custom"],
+            format_func=lambda x: {"none": "No Discount", "preset": "Preset Discount", "custom": "Custom Discount"}[x],
+            horizontal=True,
+            key="discount_type_radio"
         )
-
-    elif discount_type == "custom":
-        col1, col2 = st.columns(2)
-        with col1:
-            st.session_state.order_discount_custom_desc = st.text_input(
-                "Discount Description",
-                value=st.session_state.order_discount_custom_desc,
-                key="discount_custom_desc",
-                placeholder="e.g., Early Bird Special"
-            )
-        with col2:
-            st.session_state.order_discount_custom_value = st.number_input(
-                "Discount Percentage (%)",
-                min_value=0.0,
-                max_value=100.0,
-                value=st.session_state.order_discount_custom_value,
-                step=1.0,
-                key="discount_custom_value"
+        st.session_state.order_discount_type = discount_type
+
+        if discount_type == "preset":
+            preset_options = [
+                "NGO Discount (5%)"
+            ]
+            st.session_state.order_discount_preset = st.selectbox(
+                "Select preset discount:",
+                options=preset_options,
+                key="discount_preset_select"
             )
 
-    # Additional Options
-    st.divider()
-    st.subheader("Additional Options")
-
-    col1, col2 = st.columns(2)
-
-    with col1:
-        st.session_state.order_use_marketing_rounding = st.checkbox(
-            "Apply marketing rounding (e.g., $60 → $59)",
-            value=st.session_state.order_use_marketing_rounding,
-            key="marketing_rounding_checkbox",
-            help="Rounds whole dollar amounts down by $1 for charm pricing effect"
-        )
-
-    with col2:
-        st.session_state.apply_cc_fee = st.checkbox(
-            "Apply credit card processing fee",
-            value=st.session_state.apply_cc_fee,
-            key="cc_fee_checkbox",
-            help="Add credit card processing fee to total (default 2.9%)"
-        )
-
-    if st.session_state.apply_cc_fee:
-        st.session_state.cc_fee_percent = st.number_input(
-            "Credit Card Fee Percentage (%)",
-            min_value=0.0,
-            max_value=10.0,
-            value=st.session_state.cc_fee_percent,
-            step=0.1,
-            key="cc_fee_percent_input",
-            help="Percentage fee charged for credit card payments"
-        )
-
-    # Custom Line Items
-    st.divider()
-    st.subheader("Custom Line Items")
-
-    with st.expander("➕ Add Custom Line Item", expanded=False):
-        st.caption("Add unique services or customizations not in the catalog")
+        elif discount_type == "custom":
+            col1, col2 = st.columns(2)
+            with col1:
+                st.session_state.order_discount_custom_desc = st.text_input(
+                    "Discount Description",
+                    value=st.session_state.order_discount_custom_desc,
+                    key="discount_custom_desc",
+                    placeholder="e.g., Early Bird Special"
+                )
+            with col2:
+                st.session_state.order_discount_custom_value = st.number_input(
+                    "Discount Percentage (%)",
+                    min_value=0.0,
+                    max_value=100.0,
+                    value=st.session_state.order_discount_custom_value,
+                    step=1.0,
+                    key="discount_custom_value"
+                )
+
+        # Additional Options
+        st.divider()
+        st.subheader("Additional Options")
 
         col1, col2 = st.columns(2)
+
         with col1:
-            custom_name = st.text_input(
-                "Product/Service Name*",
-                key="custom_name_input",
-                placeholder="e.g., Custom Engraving Service"
-            )
-            custom_quantity = st.number_input(
-                "Quantity*",
-                min_value=1,
-                value=1,
-                step=1,
-                key="custom_quantity_input"
+            st.session_state.order_use_marketing_rounding = st.checkbox(
+                "Apply marketing rounding (e.g., $60 → $59)",
+                value=st.session_state.order_use_marketing_rounding,
+                key="marketing_rounding_checkbox",
+                help="Rounds whole dollar amounts down by $1 for charm pricing effect"
             )
 
         with col2:
-            custom_description = st.text_input(
-                "Description",
-                key="custom_description_input",
-                placeholder="e.g., Laser engraving on wooden items"
+            st.session_state.apply_cc_fee = st.checkbox(
+                "Apply credit card processing fee",
+                value=st.session_state.apply_cc_fee,
+                key="cc_fee_checkbox",
+                help="Add credit card processing fee to total (default 2.9%)"
             )
-            custom_price = st.number_input(
-                "Total Price ($)*",
+
+        if st.session_state.apply_cc_fee:
+            st.session_state.cc_fee_percent = st.number_input(
+                "Credit Card Fee Percentage (%)",
                 min_value=0.0,
-                value=0.0,
-                step=10.0,
-                key="custom_price_input",
-                help="Total price for this line item (quantity × unit price)"
+                max_value=10.0,
+                value=st.session_state.cc_fee_percent,
+                step=0.1,
+                key="cc_fee_percent_input",
+                help="Percentage fee charged for credit card payments"
             )
 
-        if st.button("Add Custom Item to Order", type="secondary", use_container_width=True, key="add_custom_item_btn"):
-            # Validation
-            if not custom_name or custom_price <= 0:
-                st.error("Please fill in Product/Service Name and set Total Price greater than $0")
-            else:
-                # Create custom item
-                custom_item = {
-                    'product_name': custom_name,
-                    'product_ref': "CUSTOM",
-                    'partner': "Custom",
-                    'quantity': custom_quantity,
-                    'markup_percent': 0.0,
-                    'include_labels': False,
-                    'base_price': custom_price / custom_quantity,
-                    'tier_range': "N/A",
-                    'tier_column': "N/A",
-                    'additional_costs': {},
-                    'product_subtotal': custom_price,
-                    'art_setup_total': 0,
-                    'label_cost_total': 0,
-                    'subtotal_before_markup': custom_price,
-                    'markup_amount': 0,
-                    'product_total': custom_price,
-                    'total_per_unit': custom_price / custom_quantity,
-                    'is_custom': True,
-                    'custom_description': custom_description if custom_description else "Custom line item",
-                    'country_of_origin': '',
-                    'tariff_rate_percent': 0.0,
-                    'tariff_info': '',
-                    'tariff_base': 0.0,
-                    'tariff_amount': 0.0
-                }
-
-                st.session_state.order_items.append(custom_item)
-                st.success(f"Added custom item: {custom_name}")
-                st.rerun()
-
-# Use session state values for calculations
-shipping = st.session_state.order_shipping
-# Calculate total tariff from all products
-tariff = sum(item.get('tariff_amount', 0.0) for item in st.session_state.order_items)
-
-# Calculate discount
-discount_percent = 0.0
-discount_description = ""
-
-if st.session_state.order_discount_type == "preset":
-    # Extract percentage from preset string (e.g., "NGO Discount (5%)" -> 5.0)
-    preset = st.session_state.order_discount_preset
-    discount_description = preset
-    # Parse percentage from string like "NGO Discount (5%)"
-    if "(" in preset and "%" in preset:
-        percent_str = preset.split("(")[1].split("%")[0]
-        discount_percent = float(percent_str)
-
-elif st.session_state.order_discount_type == "custom":
-    discount_percent = st.session_state.order_discount_custom_value
-    discount_description = st.session_state.order_discount_custom_desc if st.session_state.order_discount_custom_desc else f"Custom Discount ({discount_percent}%)"
-
-# ===== TOTAL ORDER CALCULATION =====
-st.divider()
-st.header("8. Order Summary")
-
-if len(st.session_state.order_items) == 0:
-    st.caption("Add products to your order to see the total quote calculation.")
-else:
-    # Calculate totals
-    products_subtotal = sum(item['product_total'] for item in st.session_state.order_items)
-    discount_amount = products_subtotal * (discount_percent / 100)
-    subtotal_after_discount = products_subtotal - discount_amount
-
-    # Calculate base total before CC fee
-    total_before_cc = subtotal_after_discount + shipping + tariff
-
-    # Calculate credit card fee (applied to total before CC fee)
-    cc_fee_amount = calculate_credit_card_fee(total_before_cc, st.session_state.apply_cc_fee, st.session_state.cc_fee_percent)
-
-    # Final total
-    total_quote = total_before_cc + cc_fee_amount
-
-    # Apply marketing rounding if enabled
-    total_quote = apply_marketing_rounding(total_quote, st.session_state.order_use_marketing_rounding)
-
-    total_units = sum(item['quantity'] for item in st.session_state.order_items)
-
-    summary_items = []
-    for item in st.session_state.order_items:
-        summary_items.append([
-            item['product_name'],
-            item['quantity'],
-            f"${item['total_per_unit']:.2f}",
-            f"${item['product_total']:.2f}"
-        ])
-
-    summary_items.append(["**Products Subtotal**", "", "", f"**${products_subtotal:.2f}**"])
-
-    # Add discount line if applicable
-    if discount_percent > 0:
-        summary_items.append([f"Discount ({discount_description})", "", "", f"-${discount_amount:.2f}"])
-
-    summary_items.append(["Shipping", "", "", f"${shipping:.2f}"])
+        # Custom Line Items
+        st.divider()
+        st.subheader("Custom Line Items")
+
+        with st.expander("➕ Add Custom Line Item", expanded=False):
+            st.caption("Add unique services or customizations not in the catalog")
+
+            col1, col2 = st.columns(2)
+            with col1:
+                custom_name = st.text_input(
+                    "Product/Service Name*",
+                    key="custom_name_input",
+                    placeholder="e.g., Custom Engraving Service"
+                )
+                custom_quantity = st.number_input(
+                    "Quantity*",
+                    min_value=1,
+                    value=1,
+                    step=1,
+                    key="custom_quantity_input"
+                )
+
+            with col2:
+                custom_description = st.text_input(
+                    "Description",
+                    key="custom_description_input",
+                    placeholder="e.g., Laser engraving on wooden items"
+                )
+                custom_price = st.number_input(
+                    "Total Price ($)*",
+                    min_value=0.0,
+                    value=0.0,
+                    step=10.0,
+                    key="custom_price_input",
+                    help="Total price for this line item (quantity × unit price)"
+                )
+
+            if st.button("Add Custom Item to Order", type="secondary", use_container_width=True, key="add_custom_item_btn"):
+                # Validation
+                if not custom_name or custom_price <= 0:
+                    st.error("Please fill in Product/Service Name and set Total Price greater than $0")
+                else:
+                    # Create custom item
+                    custom_item = {
+                        'product_name': custom_name,
+                        'product_ref': "CUSTOM",
+                        'partner': "Custom",
+                        'quantity': custom_quantity,
+                        'markup_percent': 0.0,
+                        'include_labels': False,
+                        'base_price': custom_price / custom_quantity,
+                        'tier_range': "N/A",
+                        'tier_column': "N/A",
+                        'additional_costs': {},
+                        'product_subtotal': custom_price,
+                        'art_setup_total': 0,
+                        'label_cost_total': 0,
+                        'subtotal_before_markup': custom_price,
+                        'markup_amount': 0,
+                        'product_total': custom_price,
+                        'total_per_unit': custom_price / custom_quantity,
+                        'is_custom': True,
+                        'custom_description': custom_description if custom_description else "Custom line item",
+                        'country_of_origin': '',
+                        'tariff_rate_percent': 0.0,
+                        'tariff_info': '',
+                        'tariff_base': 0.0,
+                        'tariff_amount': 0.0
+                    }
+
+                    st.session_state.order_items.append(custom_item)
+                    st.success(f"Added custom item: {custom_name}")
+                    st.rerun()
+
+    # Order totals: calculated once here (after the Order Settings) and used below
+    order_totals = get_order_totals()
+    shipping = order_totals['shipping']
+    tariff = order_totals['tariff']
+    discount_percent = order_totals['discount_percent']
+    discount_description = order_totals['discount_description']
+    update_order_download(order_totals)
+
+    # ===== TOTAL ORDER CALCULATION =====
+    start_section("8. Order Summary")
+    st.divider()
+    st.header("8. Order Summary")
 
-    # Add tariff for each product (if > 0)
-    for item in st.session_state.order_items:
-        tariff_amount = item.get('tariff_amount', 0)
-        if tariff_amount > 0:
-            country = item.get('country_of_origin', 'Unknown')
-            tariff_rate = item.get('tariff_rate_percent', 0)
+    if len(st.session_state.order_items) == 0:
+        st.caption("Add products to your order to see the total quote calculation.")
+    else:
+        # Totals (discount, CC fee and marketing rounding already applied)
+        products_subtotal = order_totals['products_subtotal']
+        discount_amount = order_totals['discount_amount']
+        cc_fee_amount = order_totals['cc_fee_amount']
+        total_quote = order_totals['total_quote']
+        total_units = order_totals['total_units']
+
+        summary_items = []
+        for item in st.session_state.order_items:
             summary_items.append([
-                f"Tariff: {item['product_name']} ({tariff_rate}% - {country})",
-                "",
-                "",
-                f"${tariff_amount:.2f}"
+                item['product_name'],
+                item['quantity'],
+                f"${item['total_per_unit']:.2f}",
+                f"${item['product_total']:.2f}"
             ])
 
-    # Add credit card fee if applicable
-    if st.session_state.apply_cc_fee and cc_fee_amount > 0:
-        summary_items.append([f"Credit Card Fee ({st.session_state.cc_fee_percent}%)", "", "", f"${cc_fee_amount:.2f}"])
+        summary_items.append(["**Products Subtotal**", "", "", f"**${products_subtotal:.2f}**"])
 
-    summary_items.append(["**TOTAL QUOTE**", f"**{total_units} total units**", "", f"**${total_quote:.2f}**"])
+        # Add discount line if applicable
+        if discount_percent > 0:
+            summary_items.append([f"Discount ({discount_description})", "", "", f"-${discount_amount:.2f}"])
 
-    summary_df = pd.DataFrame(summary_items, columns=["Product", "Qty", "Per Unit", "Total"])
-    st.table(summary_df)
+        summary_items.append(["Shipping", "", "", f"${shipping:.2f}"])
 
-    # Display total
-    avg_per_unit = total_quote / total_units if total_units > 0 else 0
-    st.success(f"Total Quote: ${total_quote:.2f}  ({total_units} total units @ ${avg_per_unit:.2f} avg per unit)")
+        # Add tariff for each product (if > 0)
+        for item in st.session_state.order_items:
+            tariff_amount = item.get('tariff_amount', 0)
+            if tariff_amount > 0:
+                country = item.get('country_of_origin', 'Unknown')
+                tariff_rate = item.get('tariff_rate_percent', 0)
+                summary_items.append([
+                    f"Tariff: {item['product_name']} ({tariff_rate}% - {country})",
+                    "",
+                    "",
+                    f"${tariff_amount:.2f}"
+                ])
 
-    # Add download button for order summary
-    summary_csv = summary_df.to_csv(index=False)
-    st.download_button(
-        label="Download Order Summary (CSV)",
-        data=summary_csv,
-        file_name=f"order_summary_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-        mime="text/csv",
-        key="download_order_summary"
-    )
+        # Add credit card fee if applicable
+        if st.session_state.apply_cc_fee and cc_fee_amount > 0:
+            summary_items.append([f"Credit Card Fee ({st.session_state.cc_fee_percent}%)", "", "", f"${cc_fee_amount:.2f}"])
 
-    # Save to history button
-    if st.button("Save Quote to History", type="secondary"):
-        # Create order history entry
-        order_entry = {
-            'timestamp': datetime.now(),
-            'total_quote': total_quote,
-            'total_units': total_units,
-            'num_products': len(st.session_state.order_items),
-            'product_names': [item['product_name'] for item in st.session_state.order_items],
-            'order_items': [item.copy() for item in st.session_state.order_items],
-            'shipping': shipping,
-            'tariff': tariff,
-            'discount_type': st.session_state.order_discount_type,
-            'discount_description': discount_description,
-            'discount_percent': discount_percent,
-            'discount_amount': discount_amount,
-            'use_marketing_rounding': st.session_state.order_use_marketing_rounding
-        }
-        st.session_state.order_history.append(order_entry)
-        st.success("Quote saved to history!")
-        st.rerun()
+        summary_items.append(["**TOTAL QUOTE**", f"**{total_units} total units**", "", f"**${total_quote:.2f}**"])
 
-# ===== PROPOSAL GENERATION =====
-st.divider()
-st.header("9. Proposal")
+        summary_df = pd.DataFrame(summary_items, columns=["Product", "Qty", "Per Unit", "Total"])
+        st.table(summary_df)
 
-if len(st.session_state.order_items) == 0:
-    st.caption("Add products to your order to generate a proposal.")
-else:
-    st.subheader("Quote Proposal")
-
-    st.markdown("Each product is presented in a separate table with MOQ pricing and discount information.")
-    st.markdown("")
-
-    # Generate a separate table for each product
-    for idx, item in enumerate(st.session_state.order_items, 1):
-        # Check if custom item
-        if item.get('is_custom', False):
-            # Custom items: show simplified format
-            st.markdown(f"### Product {idx}: {item['product_name']}")
-
-            custom_table = pd.DataFrame([
-                {
-                    "Description": item.get('custom_description', 'Custom line item'),
-                    "Quantity": item['quantity'],
-                    "Unit Price": f"${item['total_per_unit']:.2f}",
-                    "Total": f"${item['product_total']:.2f}"
-                }
-            ])
-            st.table(custom_table)
-            st.caption("Custom line item")
+        # Display total
+        avg_per_unit = total_quote / total_units if total_units > 0 else 0
+        st.success(f"Total Quote: ${total_quote:.2f}  ({total_units} total units @ ${avg_per_unit:.2f} avg per unit)")
 
-            # Add download button for custom item
-            custom_csv = custom_table.to_csv(index=False)
-            st.download_button(
-                label=f"Download Product {idx} Proposal (CSV)",
-                data=custom_csv,
-                file_name=f"proposal_product_{idx}_{item['product_name'].replace(' ', '_')}.csv",
-                mime="text/csv",
-                key=f"download_proposal_{idx}"
-            )
+        # Add download button for order summary
+        st.download_button(
+            label="Download Order Summary (CSV)",
+            data=timed_download("CSV: Order Summary", partial(summary_df.to_csv, index=False)),
+            file_name=f"order_summary_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+            mime="text/csv",
+            key="download_order_summary"
+        )
 
-        else:
-            # Standard products: use new 4-column proposal format
-            st.markdown(f"### Product {idx}: {item['product_name']}")
-
-            # Calculate MOQ based on $1,000 minimum order value
-            # First, get a preliminary unit price (use current order quantity as reference)
-            product_row = item.get('product_data_row')
-            if product_row is not None:
-                # Get base price using current quantity to estimate MOQ
-                preliminary_base_price, _, _ = get_unit_price_new_system(product_row, item['quantity'])
-
-                if preliminary_base_price is not None:
-                    # Calculate per-unit price including markup and customization
-                    temp_customization_per_unit = 0
-                    if item.get('include_customization', False):
-                        # Estimate customization per unit (setup fee amortized + per-unit cost)
-                        temp_setup = item.get('customization_setup_fee', 0)
-                        temp_per_unit = item.get('customization_per_unit', 0)
-                        # Use quantity of 100 as baseline for setup amortization estimate
-                        temp_customization_per_unit = (temp_setup / 100) + temp_per_unit
-
-                    # Estimate total per-unit price with markup
-                    temp_markup_multiplier = 1 + (item['markup_percent'] / 100)
-                    estimated_unit_price = (preliminary_base_price + temp_customization_per_unit) * temp_markup_multiplier
-
-                    # Calculate MOQ based on $1,000 minimum
-                    moq = calculate_moq(estimated_unit_price)
-                    if moq is None:
-                        moq = 5  # Fallback
-
-                    # Now get actual base price for MOQ quantity using new system
-                    moq_base_price, moq_tier_range, _ = get_unit_price_new_system(product_row, moq)
-                else:
-                    moq = 5  # Fallback
-                    moq_base_price, moq_tier_range, _ = get_unit_price_new_system(product_row, moq)
-
-                if moq_base_price is not None:
-                    # Calculate product price WITHOUT customization (for main table)
-                    moq_product_cost = moq_base_price * moq
-                    moq_markup_amount = moq_product_cost * (item['markup_percent'] / 100)
-                    moq_product_only_total = moq_product_cost + moq_markup_amount
-                    moq_product_price_per_unit = moq_product_only_total / moq
-
-                    # Calculate discount price per unit (product only)
-                    moq_discount_price = moq_product_price_per_unit * (1 - discount_percent / 100)
-
-                    # Build column headers
-                    col_moq = "MOQ"
-                    col_price = f"Price Ea (@ Qty {moq})"
-
-                    # Discount column header
-                    if discount_percent > 0:
-                        col_discount = f"Price Ea {discount_description}"
-                    else:
-                        col_discount = "Price Ea (No Discount)"
+        # Save to history button
+        if st.button("Save Quote to History", type="secondary"):
+            # Create order history entry
+            order_entry = {
+                'timestamp': datetime.now(),
+                'total_quote': total_quote,
+                'total_units': total_units,
+                'num_products': len(st.session_state.order_items),
+                'product_names': [item['product_name'] for item in st.session_state.order_items],
+                'order_items': [item.copy() for item in st.session_state.order_items],
+                'shipping': shipping,
+                'tariff': tariff,
+                'discount_type': st.session_state.order_discount_type,
+                'discount_description': discount_description,
+                'discount_percent': discount_percent,
+                'discount_amount': discount_amount,
+                'use_marketing_rounding': st.session_state.order_use_marketing_rounding
+            }
+            order_entry['client_company'] = st.session_state.client_info['company_name']
+            try:
+                save_quote(get_quote_store(), order_entry)
+                st.session_state.recent_orders_page = 0  # Show the new quote
+                st.success("Quote saved to history!")
+                st.rerun()
+            except sqlite3.Error as e:
+                st.error(f"Could not save the quote: {e}")
+
+    # Deliverables (nested fragment: switching tabs only reruns the deliverables)
+    render_deliverables()
+
+# ===== DELIVERABLES (SECTIONS 9-11) =====
+@st.fragment
+def render_deliverables():
+    # Order totals (memoized - see get_order_totals)
+    order_totals = get_order_totals()
+    shipping = order_totals['shipping']
+    discount_percent = order_totals['discount_percent']
+    discount_description = order_totals['discount_description']
+    products_subtotal = order_totals['products_subtotal']
+    discount_amount = order_totals['discount_amount']
+    cc_fee_amount = order_totals['cc_fee_amount']
+    total_quote = order_totals['total_quote']
 
-                    col_delivery = "Delivery"
+    st.divider()
+    st.header("Deliverables")
+    st.caption("Only the open tab is generated, so changes above stay fast as the order grows.")
+
+    # Lazy tabs: on each rerun, only the selected deliverable is built
+    proposal_tab, invoice_tab, po_tab = st.tabs(
+        ["9. Proposal", "10. Invoice", "11. Purchase Order"],
+        key="deliverables_tabs",
+        on_change="rerun"
+    )
 
-                    # Build proposal table (product only, no customization baked in)
-                    proposal_table = pd.DataFrame([
+    # ===== PROPOSAL GENERATION =====
+    with proposal_tab:
+        if len(st.session_state.order_items) == 0:
+            st.caption("Add products to your order to generate a proposal.")
+        elif proposal_tab.open:
+            start_section("9. Proposal")
+            st.subheader("Quote Proposal")
+
+            st.markdown("Each product is presented in a separate table with MOQ pricing and discount information.")
+            st.markdown("")
+
+            # Generate a separate table for each product
+            for idx, item in enumerate(st.session_state.order_items, 1):
+                # Check if custom item
+                if item.get('is_custom', False):
+                    # Custom items: show simplified format
+                    st.markdown(f"### Product {idx}: {item['product_name']}")
+
+                    custom_table = pd.DataFrame([
                         {
-                            col_moq: moq,
-                            col_price: f"${moq_product_price_per_unit:.2f}",
-                            col_discount: f"${moq_discount_price:.2f}",
-                            col_delivery: ""
+                            "Description": item.get('custom_description', 'Custom line item'),
+                            "Quantity": item['quantity'],
+                            "Unit Price": f"${item['total_per_unit']:.2f}",
+                            "Total": f"${item['product_total']:.2f}"
                         }
                     ])
+                    st.table(custom_table)
+                    st.caption("Custom line item")
 
-                    st.table(proposal_table)
-
-                    # Show MOQ calculation note
-                    moq_total_value = moq * moq_product_price_per_unit
-                    st.caption(f"MOQ calculated based on $1,000 minimum order value (MOQ {moq} units = ${moq_total_value:.2f})")
-
-                    # Build customization fees section - show as SEPARATE items
-                    if item.get('include_customization', False):
-                        moq_customization_setup = item.get('customization_setup_fee', 0)
-                        moq_customization_per_unit = item.get('customization_per_unit', 0)
-                        customization_desc = item.get('customization_description', 'Custom work')
-
-                        st.markdown("**Additional Customization Fees:**")
-
-                        customization_fees = []
-                        if moq_customization_setup > 0:
-                            customization_fees.append({
-                                "Item": f"Setup Fee: {customization_desc}",
-                                "Quantity": 1,
-                                "Unit Price": f"${moq_customization_setup:.2f}",
-                                "Total": f"${moq_customization_setup:.2f}"
-                            })
-
-                        if moq_customization_per_unit > 0:
-                            customization_fees.append({
-                                "Item": f"Customization: {customization_desc}",
-                                "Quantity": moq,
-                                "Unit Price": f"${moq_customization_per_unit:.2f}",
-                                "Total": f"${moq_customization_per_unit * moq:.2f}"
-                            })
-
-                        if customization_fees:
-                            customization_df = pd.DataFrame(customization_fees)
-                            st.table(customization_df)
-                            st.caption("Customization fees are separate line items and not included in the product price above.")
-                    else:
-                        st.caption("No customization fees")
-
-                    # Add tariff information if applicable
-                    if item.get('tariff_amount', 0) > 0:
-                        tariff_rate = item.get('tariff_rate_percent', 0)
-                        country = item.get('country_of_origin', 'Unknown')
-                        tariff_amount = item.get('tariff_amount', 0)
-
-                        st.markdown("**Tariff Information:**")
-                        st.caption(f"Import duty: {tariff_rate}% (from {country}) = ${tariff_amount:.2f}")
-
-                        tariff_info = item.get('tariff_info', '')
-                        if tariff_info:
-                            st.caption(f"Note: {tariff_info}")
-
-                    # Add download button for this product's proposal table
-                    proposal_csv = proposal_table.to_csv(index=False)
+                    # Add download button for custom item
                     st.download_button(
                         label=f"Download Product {idx} Proposal (CSV)",
-                        data=proposal_csv,
+                        data=timed_download("CSV: Proposal", partial(custom_table.to_csv, index=False)),
                         file_name=f"proposal_product_{idx}_{item['product_name'].replace(' ', '_')}.csv",
                         mime="text/csv",
                         key=f"download_proposal_{idx}"
                     )
-                else:
-                    st.warning(f"Unable to calculate MOQ pricing for {item['product_name']}")
-            else:
-                st.warning(f"Product data not available for {item['product_name']}")
-
-        st.markdown("")  # Spacing between products
-
-    st.caption("Copy these tables and paste into your proposal template.")
-
-# ===== INVOICE GENERATION =====
-st.divider()
-st.header("10. Invoice")
-
-if len(st.session_state.order_items) == 0:
-    st.caption("Add products to your order to generate an invoice.")
-else:
-    st.subheader("Invoice")
-    invoice_date = datetime.now().strftime("%Y-%m-%d")
-
-    # Display client information header
-    st.markdown("#### Client Information")
-    client_info = st.session_state.client_info
-
-    col1, col2 = st.columns(2)
-    with col1:
-        st.write(f"**Company:** {client_info['company_name'] if client_info['company_name'] else 'Not specified'}")
-        st.write(f"**Contact:** {client_info['contact_name'] if client_info['contact_name'] else 'Not specified'}")
-        st.write(f"**Email:** {client_info['contact_email'] if client_info['contact_email'] else 'Not specified'}")
-        if client_info['client_po']:
-            st.write(f"**Client PO:** {client_info['client_po']}")
-    with col2:
-        st.write(f"**Invoice Date:** {invoice_date}")
-        st.write(f"**New Client:** {'Yes' if client_info['is_new_client'] else 'No'}")
-        st.write(f"**Payment Terms:** {client_info['payment_timeline']}")
-        st.write(f"**Payment Method:** {client_info['payment_preference']}")
-
-    if client_info['billing_address']:
-        st.write(f"**Billing Address:** {client_info['billing_address']}")
-
-    if client_info['shipping_type'] == 'One Location' and client_info['shipping_address']:
-        st.write(f"**Shipping Address:** {client_info['shipping_address']}")
-    elif client_info['shipping_type'] == 'Drop Shipping':
-        st.write(f"**Shipping:** Drop Shipping (details to be arranged)")
 
-    st.divider()
-
-    # Calculate totals (same as order summary)
-    products_subtotal = sum(item['product_total'] for item in st.session_state.order_items)
-    discount_amount = products_subtotal * (discount_percent / 100)
-    subtotal_after_discount = products_subtotal - discount_amount
-    total_before_cc = subtotal_after_discount + shipping + tariff
-    cc_fee_amount = calculate_credit_card_fee(total_before_cc, st.session_state.apply_cc_fee, st.session_state.cc_fee_percent)
-    total_quote = total_before_cc + cc_fee_amount
-
-    # Apply marketing rounding if enabled
-    total_quote = apply_marketing_rounding(total_quote, st.session_state.order_use_marketing_rounding)
+                else:
+                    # Standard products: use new 4-column proposal format
+                    st.markdown(f"### Product {idx}: {item['product_name']}")
+
+                    # MOQ (minimum order value) and its tier price, stored when the item was added
+                    product_row = get_order_item_row(item, catalog_index)
+                    if 'moq' in item or product_row is not None:
+                        if 'moq' in item:
+                            moq, moq_base_price = item['moq'], item['moq_base_price']
+                        else:
+                            # Items added before MOQs were stored
+                            moq, moq_base_price, _ = calculate_order_moq(
+                                pricing_table,
+                                product_row,
+                                item['quantity'],
+                                item['markup_percent'],
+                                item.get('customization_setup_fee', 0),
+                                item.get('customization_per_unit', 0)
+                            )
+
+                        if moq_base_price is not None:
+                            # Calculate product price WITHOUT customization (for main table)
+                            moq_product_cost = moq_base_price * moq
+                            moq_markup_amount = moq_product_cost * (item['markup_percent'] / 100)
+                            moq_product_only_total = moq_product_cost + moq_markup_amount
+                            moq_product_price_per_unit = moq_product_only_total / moq
+
+                            # Calculate discount price per unit (product only)
+                            moq_discount_price = moq_product_price_per_unit * (1 - discount_percent / 100)
+
+                            # Build column headers
+                            col_moq = "MOQ"
+                            col_price = f"Price Ea (@ Qty {moq})"
+
+                            # Discount column header
+                            if discount_percent > 0:
+                                col_discount = f"Price Ea {discount_description}"
+                            else:
+                                col_discount = "Price Ea (No Discount)"
+
+                            col_delivery = "Delivery"
+
+                            # Build proposal table (product only, no customization baked in)
+                            proposal_table = pd.DataFrame([
+                                {
+                                    col_moq: moq,
+                                    col_price: f"${moq_product_price_per_unit:.2f}",
+                                    col_discount: f"${moq_discount_price:.2f}",
+                                    col_delivery: ""
+                                }
+                            ])
+
+                            st.table(proposal_table)
+
+                            # Show MOQ calculation note
+                            moq_total_value = moq * moq_product_price_per_unit
+                            st.caption(f"MOQ calculated based on ${MOQ_MINIMUM_ORDER_VALUE:,.0f} minimum order value (MOQ {moq} units = ${moq_total_value:.2f})")
+
+                            # Build customization fees section - show as SEPARATE items
+                            if item.get('include_customization', False):
+                                moq_customization_setup = item.get('customization_setup_fee', 0)
+                                moq_customization_per_unit = item.get('customization_per_unit', 0)
+                                customization_desc = item.get('customization_description', 'Custom work')
+
+                                st.markdown("**Additional Customization Fees:**")
+
+                                customization_fees = []
+                                if moq_customization_setup > 0:
+                                    customization_fees.append({
+                                        "Item": f"Setup Fee: {customization_desc}",
+                                        "Quantity": 1,
+                                        "Unit Price": f"${moq_customization_setup:.2f}",
+                                        "Total": f"${moq_customization_setup:.2f}"
+                                    })
+
+                                if moq_customization_per_unit > 0:
+                                    customization_fees.append({
+                                        "Item": f"Customization: {customization_desc}",
+                                        "Quantity": moq,
+                                        "Unit Price": f"${moq_customization_per_unit:.2f}",
+                                        "Total": f"${moq_customization_per_unit * moq:.2f}"
+                                    })
+
+                                if customization_fees:
+                                    customization_df = pd.DataFrame(customization_fees)
+                                    st.table(customization_df)
+                                    st.caption("Customization fees are separate line items and not included in the product price above.")
+                            else:
+                                st.caption("No customization fees")
+
+                            # Add tariff information if applicable
+                            if item.get('tariff_amount', 0) > 0:
+                                tariff_rate = item.get('tariff_rate_percent', 0)
+                                country = item.get('country_of_origin', 'Unknown')
+                                tariff_amount = item.get('tariff_amount', 0)
+
+                                st.markdown("**Tariff Information:**")
+                                st.caption(f"Import duty: {tariff_rate}% (from {country}) = ${tariff_amount:.2f}")
+
+                                tariff_info = item.get('tariff_info', '')
+                                if tariff_info:
+                                    st.caption(f"Note: {tariff_info}")
+
+                            # Add download button for this product's proposal table
+                            st.download_button(
+                                label=f"Download Product {idx} Proposal (CSV)",
+                                data=timed_download("CSV: Proposal", partial(proposal_table.to_csv, index=False)),
+                                file_name=f"proposal_product_{idx}_{item['product_name'].replace(' ', '_')}.csv",
+                                mime="text/csv",
+                                key=f"download_proposal_{idx}"
+                            )
+                        else:
+                            st.warning(f"Unable to calculate MOQ pricing for {item['product_name']}")
+                    else:
+                        st.warning(f"Product data not available for {item['product_name']}")
+
+                st.markdown("")  # Spacing between products
+
+            st.caption("Copy these tables and paste into your proposal template.")
+
+    # ===== INVOICE GENERATION =====
+    with invoice_tab:
+        if len(st.session_state.order_items) == 0:
+            st.caption("Add products to your order to generate an invoice.")
+        elif invoice_tab.open:
+            start_section("10. Invoice")
+            st.subheader("Invoice")
+            invoice_date = datetime.now().strftime("%Y-%m-%d")
+
+            # Display client information header
+            st.markdown("#### Client Information")
+            client_info = st.session_state.client_info
+
+            col1, col2 = st.columns(2)
+            with col1:
+                st.write(f"**Company:** {client_info['company_name'] if client_info['company_name'] else 'Not specified'}")
+                st.write(f"**Contact:** {client_info['contact_name'] if client_info['contact_name'] else 'Not specified'}")
+                st.write(f"**Email:** {client_info['contact_email'] if client_info['contact_email'] else 'Not specified'}")
+                if client_info['client_po']:
+                    st.write(f"**Client PO:** {client_info['client_po']}")
+            with col2:
+                st.write(f"**Invoice Date:** {invoice_date}")
+                st.write(f"**New Client:** {'Yes' if client_info['is_new_client'] else 'No'}")
+                st.write(f"**Payment Terms:** {client_info['payment_timeline']}")
+                st.write(f"**Payment Method:** {client_info['payment_preference']}")
+
+            if client_info['billing_address']:
+                st.write(f"**Billing Address:** {client_info['billing_address']}")
+
+            if client_info['shipping_type'] == 'One Location' and client_info['shipping_address']:
+                st.write(f"**Shipping Address:** {client_info['shipping_address']}")
+            elif client_info['shipping_type'] == 'Drop Shipping':
+                st.write(f"**Shipping:** Drop Shipping (details to be arranged)")
+
+            st.divider()
+
+            # Totals (same as order summary)
+            products_subtotal = order_totals['products_subtotal']
+            discount_amount = order_totals['discount_amount']
+            cc_fee_amount = order_totals['cc_fee_amount']
+            total_quote = order_totals['total_quote']
+
+            # Build line items table - show customization as SEPARATE line items
+            invoice_line_items = []
+            for item in st.session_state.order_items:
+                # Check if custom item
+                if item.get('is_custom', False):
+                    description = item.get('custom_description', 'Custom line item')
+                    tier = "Custom"
 
-    # Build line items table - show customization as SEPARATE line items
-    invoice_line_items = []
-    for item in st.session_state.order_items:
-        # Check if custom item
-        if item.get('is_custom', False):
-            description = item.get('custom_description', 'Custom line item')
-            tier = "Custom"
-
-            invoice_line_items.append({
-                'Product/Service Name': item['product_name'],
-                'Description': description,
-                'Quantity': item['quantity'],
-                'Pricing Tier': tier,
-                'Price (Per-Unit)': f"${item['total_per_unit']:.2f}",
-                'Total (Per-Item)': f"${item['product_total']:.2f}"
-            })
-        else:
-            # Regular product
-            description = f"Product Ref: {item['product_ref']}, Partner: {item['partner']}"
-            tier = item['tier_range']
-
-            # Calculate base product price WITHOUT customization
-            base_product_only = item['product_subtotal'] + item['markup_amount']
-            base_product_per_unit = base_product_only / item['quantity']
-
-            # Add base product line
-            invoice_line_items.append({
-                'Product/Service Name': item['product_name'],
-                'Description': description,
-                'Quantity': item['quantity'],
-                'Pricing Tier': tier,
-                'Price (Per-Unit)': f"${base_product_per_unit:.2f}",
-                'Total (Per-Item)': f"${base_product_only:.2f}"
-            })
-
-            # Add customization line items if present
-            if item.get('include_customization', False):
-                customization_desc = item.get('customization_description', 'Custom work')
-                customization_setup = item.get('customization_setup_total', 0)
-                customization_unit = item.get('customization_unit_total', 0)
-
-                # Setup fee line item
-                if customization_setup > 0:
                     invoice_line_items.append({
-                        'Product/Service Name': f"Setup Fee: {customization_desc}",
-                        'Description': f"One-time setup for {item['product_name']}",
-                        'Quantity': 1,
-                        'Pricing Tier': "N/A",
-                        'Price (Per-Unit)': f"${customization_setup:.2f}",
-                        'Total (Per-Item)': f"${customization_setup:.2f}"
+                        'Product/Service Name': item['product_name'],
+                        'Description': description,
+                        'Quantity': item['quantity'],
+                        'Pricing Tier': tier,
+                        'Price (Per-Unit)': f"${item['total_per_unit']:.2f}",
+                        'Total (Per-Item)': f"${item['product_total']:.2f}"
                     })
+                else:
+                    # Regular product
+                    description = f"Product Ref: {item['product_ref']}, Partner: {item['partner']}"
+                    tier = item['tier_range']
 
-                # Per-unit customization line item
-                if customization_unit > 0:
-                    customization_per_unit_price = customization_unit / item['quantity']
+                    # Calculate base product price WITHOUT customization
+                    base_product_only = item['product_subtotal'] + item['markup_amount']
+                    base_product_per_unit = base_product_only / item['quantity']
+
+                    # Add base product line
                     invoice_line_items.append({
-                        'Product/Service Name': f"Customization: {customization_desc}",
-                        'Description': f"Per-unit customization for {item['product_name']}",
+                        'Product/Service Name': item['product_name'],
+                        'Description': description,
                         'Quantity': item['quantity'],
-                        'Pricing Tier': "N/A",
-                        'Price (Per-Unit)': f"${customization_per_unit_price:.2f}",
-                        'Total (Per-Item)': f"${customization_unit:.2f}"
+                        'Pricing Tier': tier,
+                        'Price (Per-Unit)': f"${base_product_per_unit:.2f}",
+                        'Total (Per-Item)': f"${base_product_only:.2f}"
                     })
 
-            # Add tariff line item if applicable
-            if item.get('tariff_amount', 0) > 0:
-                tariff_amount = item.get('tariff_amount', 0)
-                country = item.get('country_of_origin', 'Unknown')
-                tariff_rate = item.get('tariff_rate_percent', 0)
+                    # Add customization line items if present
+                    if item.get('include_customization', False):
+                        customization_desc = item.get('customization_description', 'Custom work')
+                        customization_setup = item.get('customization_setup_total', 0)
+                        customization_unit = item.get('customization_unit_total', 0)
+
+                        # Setup fee line item
+                        if customization_setup > 0:
+                            invoice_line_items.append({
+                                'Product/Service Name': f"Setup Fee: {customization_desc}",
+                                'Description': f"One-time setup for {item['product_name']}",
+                                'Quantity': 1,
+                                'Pricing Tier': "N/A",
+                                'Price (Per-Unit)': f"${customization_setup:.2f}",
+                                'Total (Per-Item)': f"${customization_setup:.2f}"
+                            })
 
-                invoice_line_items.append({
-                    'Product/Service Name': f"Tariff: {item['product_name']}",
-                    'Description': f"Import duty ({tariff_rate}% from {country})",
-                    'Quantity': 1,
-                    'Pricing Tier': "N/A",
-                    'Price (Per-Unit)': f"${tariff_amount:.2f}",
-                    'Total (Per-Item)': f"${tariff_amount:.2f}"
-                })
-
-    # Display line items table
-    invoice_df = pd.DataFrame(invoice_line_items)
-    st.table(invoice_df)
-
-    # Display totals section
-    st.write("")  # Spacing
-    totals_data = [
-        ["Subtotal (Pre-Tax)", f"${products_subtotal:.2f}"]
-    ]
+                        # Per-unit customization line item
+                        if customization_unit > 0:
+                            customization_per_unit_price = customization_unit / item['quantity']
+                            invoice_line_items.append({
+                                'Product/Service Name': f"Customization: {customization_desc}",
+                                'Description': f"Per-unit customization for {item['product_name']}",
+                                'Quantity': item['quantity'],
+                                'Pricing Tier': "N/A",
+                                'Price (Per-Unit)': f"${customization_per_unit_price:.2f}",
+                                'Total (Per-Item)': f"${customization_unit:.2f}"
+                            })
 
-    # Add discount line if applicable
-    if discount_percent > 0:
-        totals_data.append([f"Discount ({discount_description})", f"-${discount_amount:.2f}"])
-
-    totals_data.append(["Shipping", f"${shipping:.2f}"])
-
-    # Add credit card fee if applicable
-    if st.session_state.apply_cc_fee and cc_fee_amount > 0:
-        totals_data.append([f"Credit Card Fee ({st.session_state.cc_fee_percent}%)", f"${cc_fee_amount:.2f}"])
-
-    totals_data.append(["**Final Total**", f"**${total_quote:.2f}**"])
-
-    totals_df = pd.DataFrame(totals_data, columns=["Item", "Amount"])
-    st.table(totals_df)
-
-    st.caption("Copy this table and paste into your invoice template.")
-
-    # Add download button for complete invoice
-    # Combine line items and totals into one downloadable file
-    invoice_complete = invoice_df.copy()
-
-    # Add blank row
-    blank_row = pd.DataFrame([{col: "" for col in invoice_df.columns}])
-    invoice_complete = pd.concat([invoice_complete, blank_row], ignore_index=True)
-
-    # Add totals section
-    for total_item in totals_data:
-        total_row = pd.DataFrame([{
-            'Product/Service Name': total_item[0],
-            'Description': '',
-            'Quantity': '',
-            'Pricing Tier': '',
-            'Price (Per-Unit)': '',
-            'Total (Per-Item)': total_item[1]
-        }])
-        invoice_complete = pd.concat([invoice_complete, total_row], ignore_index=True)
-
-    invoice_csv = invoice_complete.to_csv(index=False)
-    st.download_button(
-        label="Download Complete Invoice (CSV)",
-        data=invoice_csv,
-        file_name=f"invoice_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-        mime="text/csv",
-        key="download_invoice_complete"
-    )
+                    # Add tariff line item if applicable
+                    if item.get('tariff_amount', 0) > 0:
+                        tariff_amount = item.get('tariff_amount', 0)
+                        country = item.get('country_of_origin', 'Unknown')
+                        tariff_rate = item.get('tariff_rate_percent', 0)
 
-# ===== PURCHASE ORDER GENERATION =====
-st.divider()
-st.header("11. Purchase Order")
+                        invoice_line_items.append({
+                            'Product/Service Name': f"Tariff: {item['product_name']}",
+                            'Description': f"Import duty ({tariff_rate}% from {country})",
+                            'Quantity': 1,
+                            'Pricing Tier': "N/A",
+                            'Price (Per-Unit)': f"${tariff_amount:.2f}",
+                            'Total (Per-Item)': f"${tariff_amount:.2f}"
+                        })
 
-if len(st.session_state.order_items) == 0:
-    st.caption("Add products to your order to generate a purchase order.")
-else:
-    st.subheader("Purchase Order")
-    po_date = datetime.now().strftime("%Y-%m-%d")
-    po_number = f"PO-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+            # Display line items table
+            invoice_df = pd.DataFrame(invoice_line_items)
+            st.table(invoice_df)
 
-    # Display PO header information
-    st.markdown("#### Purchase Order Information")
+            # Display totals section
+            st.write("")  # Spacing
+            totals_data = [
+                ["Subtotal (Pre-Tax)", f"${products_subtotal:.2f}"]
+            ]
 
-    col1, col2 = st.columns(2)
-    with col1:
-        st.write(f"**PO Number:** {po_number}")
-        st.write(f"**PO Date:** {po_date}")
-        st.write(f"**Total Units:** {sum(item['quantity'] for item in st.session_state.order_items)}")
-        st.write(f"**Total Amount:** ${total_quote:.2f}")
+            # Add discount line if applicable
+            if discount_percent > 0:
+                totals_data.append([f"Discount ({discount_description})", f"-${discount_amount:.2f}"])
 
-    with col2:
-        client_info = st.session_state.client_info
-        st.write(f"**Client:** {client_info['company_name'] if client_info['company_name'] else 'Not specified'}")
-        st.write(f"**Contact:** {client_info['contact_name'] if client_info['contact_name'] else 'Not specified'}")
-        st.write(f"**Email:** {client_info['contact_email'] if client_info['contact_email'] else 'Not specified'}")
-        if client_info['client_po']:
-            st.write(f"**Client PO Reference:** {client_info['client_po']}")
+            totals_data.append(["Shipping", f"${shipping:.2f}"])
 
-    st.divider()
+            # Add credit card fee if applicable
+            if st.session_state.apply_cc_fee and cc_fee_amount > 0:
+                totals_data.append([f"Credit Card Fee ({st.session_state.cc_fee_percent}%)", f"${cc_fee_amount:.2f}"])
 
-    # Build PO line items table - show customization as SEPARATE line items
-    st.markdown("#### Order Details")
+            totals_data.append(["**Final Total**", f"**${total_quote:.2f}**"])
+
+            totals_df = pd.DataFrame(totals_data, columns=["Item", "Amount"])
+            st.table(totals_df)
+
+            st.caption("Copy this table and paste into your invoice template.")
+
+            # Add download button for complete invoice
+            # Line items, a blank row, then the totals - written in one pass when clicked
+            invoice_rows = invoice_line_items + [{}] + [
+                {'Product/Service Name': label, 'Total (Per-Item)': amount} for label, amount in totals_data
+            ]
+            st.download_button(
+                label="Download Complete Invoice (CSV)",
+                data=timed_download("CSV: Invoice", partial(write_csv, list(invoice_df.columns), invoice_rows)),
+                file_name=f"invoice_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                mime="text/csv",
+                key="download_invoice_complete"
+            )
+
+    # ===== PURCHASE ORDER GENERATION =====
+    with po_tab:
+        if len(st.session_state.order_items) == 0:
+            st.caption("Add products to your order to generate a purchase order.")
+        elif po_tab.open:
+            start_section("11. Purchase Order")
+            st.subheader("Purchase Order")
+            po_date = datetime.now().strftime("%Y-%m-%d")
+            po_number = f"PO-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+
+            # Display PO header information
+            st.markdown("#### Purchase Order Information")
+
+            col1, col2 = st.columns(2)
+            with col1:
+                st.write(f"**PO Number:** {po_number}")
+                st.write(f"**PO Date:** {po_date}")
+                st.write(f"**Total Units:** {order_totals['total_units']}")
+                st.write(f"**Total Amount:** ${total_quote:.2f}")
+
+            with col2:
+                client_info = st.session_state.client_info
+                st.write(f"**Client:** {client_info['company_name'] if client_info['company_name'] else 'Not specified'}")
+                st.write(f"**Contact:** {client_info['contact_name'] if client_info['contact_name'] else 'Not specified'}")
+                st.write(f"**Email:** {client_info['contact_email'] if client_info['contact_email'] else 'Not specified'}")
+                if client_info['client_po']:
+                    st.write(f"**Client PO Reference:** {client_info['client_po']}")
+
+            st.divider()
+
+            # Build PO line items table - show customization as SEPARATE line items
+            st.markdown("#### Order Details")
+
+            po_line_items = []
+            for item in st.session_state.order_items:
+                if item.get('is_custom', False):
+                    partner = "Custom"
+                    product_ref = "N/A"
+                    description = item.get('custom_description', 'Custom line item')
 
-    po_line_items = []
-    for item in st.session_state.order_items:
-        if item.get('is_custom', False):
-            partner = "Custom"
-            product_ref = "N/A"
-            description = item.get('custom_description', 'Custom line item')
-
-            po_line_items.append({
-                'Partner': partner,
-                'Product/Service': item['product_name'],
-                'Product Ref': product_ref,
-                'Quantity': item['quantity'],
-                'Unit Cost': f"${item['total_per_unit']:.2f}",
-                'Total': f"${item['product_total']:.2f}",
-                'Notes': description
-            })
-        else:
-            # Regular product
-            partner = item['partner']
-            product_ref = item['product_ref']
-            description = f"Tier: {item['tier_range']}"
-
-            # Calculate base product price WITHOUT customization
-            base_product_only = item['product_subtotal'] + item['markup_amount']
-            base_product_per_unit = base_product_only / item['quantity']
-
-            # Add base product line
-            po_line_items.append({
-                'Partner': partner,
-                'Product/Service': item['product_name'],
-                'Product Ref': product_ref,
-                'Quantity': item['quantity'],
-                'Unit Cost': f"${base_product_per_unit:.2f}",
-                'Total': f"${base_product_only:.2f}",
-                'Notes': description
-            })
-
-            # Add customization line items if present
-            if item.get('include_customization', False):
-                customization_desc = item.get('customization_description', 'Custom work')
-                customization_setup = item.get('customization_setup_total', 0)
-                customization_unit = item.get('customization_unit_total', 0)
-
-                # Setup fee line item
-                if customization_setup > 0:
                     po_line_items.append({
                         'Partner': partner,
-                        'Product/Service': f"Setup Fee: {customization_desc}",
+                        'Product/Service': item['product_name'],
                         'Product Ref': product_ref,
-                        'Quantity': 1,
-                        'Unit Cost': f"${customization_setup:.2f}",
-                        'Total': f"${customization_setup:.2f}",
-                        'Notes': f"One-time setup for {item['product_name']}"
+                        'Quantity': item['quantity'],
+                        'Unit Cost': f"${item['total_per_unit']:.2f}",
+                        'Total': f"${item['product_total']:.2f}",
+                        'Notes': description
                     })
+                else:
+                    # Regular product
+                    partner = item['partner']
+                    product_ref = item['product_ref']
+                    description = f"Tier: {item['tier_range']}"
+
+                    # Calculate base product price WITHOUT customization
+                    base_product_only = item['product_subtotal'] + item['markup_amount']
+                    base_product_per_unit = base_product_only / item['quantity']
 
-                # Per-unit customization line item
-                if customization_unit > 0:
-                    customization_per_unit_price = customization_unit / item['quantity']
+                    # Add base product line
                     po_line_items.append({
                         'Partner': partner,
-                        'Product/Service': f"Customization: {customization_desc}",
+                        'Product/Service': item['product_name'],
                         'Product Ref': product_ref,
                         'Quantity': item['quantity'],
-                        'Unit Cost': f"${customization_per_unit_price:.2f}",
-                        'Total': f"${customization_unit:.2f}",
-                        'Notes': f"Per-unit customization for {item['product_name']}"
+                        'Unit Cost': f"${base_product_per_unit:.2f}",
+                        'Total': f"${base_product_only:.2f}",
+                        'Notes': description
                     })
 
-            # Add tariff line item if applicable
-            if item.get('tariff_amount', 0) > 0:
-                tariff_amount = item.get('tariff_amount', 0)
-                country = item.get('country_of_origin', 'Unknown')
-                tariff_rate = item.get('tariff_rate_percent', 0)
+                    # Add customization line items if present
+                    if item.get('include_customization', False):
+                        customization_desc = item.get('customization_description', 'Custom work')
+                        customization_setup = item.get('customization_setup_total', 0)
+                        customization_unit = item.get('customization_unit_total', 0)
+
+                        # Setup fee line item
+                        if customization_setup > 0:
+                            po_line_items.append({
+                                'Partner': partner,
+                                'Product/Service': f"Setup Fee: {customization_desc}",
+                                'Product Ref': product_ref,
+                                'Quantity': 1,
+                                'Unit Cost': f"${customization_setup:.2f}",
+                                'Total': f"${customization_setup:.2f}",
+                                'Notes': f"One-time setup for {item['product_name']}"
+                            })
 
-                po_line_items.append({
-                    'Partner': partner,
-                    'Product/Service': f"Tariff: {item['product_name']}",
-                    'Product Ref': product_ref,
-                    'Quantity': 1,
-                    'Unit Cost': f"${tariff_amount:.2f}",
-                    'Total': f"${tariff_amount:.2f}",
-                    'Notes': f"Import duty ({tariff_rate}% from {country})"
-                })
+                        # Per-unit customization line item
+                        if customization_unit > 0:
+                            customization_per_unit_price = customization_unit / item['quantity']
+                            po_line_items.append({
+                                'Partner': partner,
+                                'Product/Service': f"Customization: {customization_desc}",
+                                'Product Ref': product_ref,
+                                'Quantity': item['quantity'],
+                                'Unit Cost': f"${customization_per_unit_price:.2f}",
+                                'Total': f"${customization_unit:.2f}",
+                                'Notes': f"Per-unit customization for {item['product_name']}"
+                            })
 
-    po_df = pd.DataFrame(po_line_items)
-    st.table(po_df)
+                    # Add tariff line item if applicable
+                    if item.get('tariff_amount', 0) > 0:
+                        tariff_amount = item.get('tariff_amount', 0)
+                        country = item.get('country_of_origin', 'Unknown')
+                        tariff_rate = item.get('tariff_rate_percent', 0)
 
-    # Display order summary
-    st.markdown("#### Order Summary")
+                        po_line_items.append({
+                            'Partner': partner,
+                            'Product/Service': f"Tariff: {item['product_name']}",
+                            'Product Ref': product_ref,
+                            'Quantity': 1,
+                            'Unit Cost': f"${tariff_amount:.2f}",
+                            'Total': f"${tariff_amount:.2f}",
+                            'Notes': f"Import duty ({tariff_rate}% from {country})"
+                        })
 
-    summary_data = [
-        ["Products Subtotal", f"${products_subtotal:.2f}"]
-    ]
+            po_df = pd.DataFrame(po_line_items)
+            st.table(po_df)
 
-    if discount_percent > 0:
-        summary_data.append([f"Discount ({discount_description})", f"-${discount_amount:.2f}"])
+            # Display order summary
+            st.markdown("#### Order Summary")
 
-    summary_data.append(["Shipping", f"${shipping:.2f}"])
+            summary_data = [
+                ["Products Subtotal", f"${products_subtotal:.2f}"]
+            ]
 
-    if st.session_state.apply_cc_fee and cc_fee_amount > 0:
-        summary_data.append([f"Credit Card Fee ({st.session_state.cc_fee_percent}%)", f"${cc_fee_amount:.2f}"])
+            if discount_percent > 0:
+                summary_data.append([f"Discount ({discount_description})", f"-${discount_amount:.2f}"])
 
-    summary_data.append(["**Total Order Value**", f"**${total_quote:.2f}**"])
+            summary_data.append(["Shipping", f"${shipping:.2f}"])
 
-    summary_df = pd.DataFrame(summary_data, columns=["Item", "Amount"])
-    st.table(summary_df)
+            if st.session_state.apply_cc_fee and cc_fee_amount > 0:
+                summary_data.append([f"Credit Card Fee ({st.session_state.cc_fee_percent}%)", f"${cc_fee_amount:.2f}"])
 
-    # Payment and shipping information
-    st.markdown("#### Payment & Shipping")
+            summary_data.append(["**Total Order Value**", f"**${total_quote:.2f}**"])
 
-    col1, col2 = st.columns(2)
-    with col1:
-        st.write(f"**Payment Terms:** {client_info['payment_timeline']}")
-        st.write(f"**Payment Method:** {client_info['payment_preference']}")
-    with col2:
-        st.write(f"**Shipping Type:** {client_info['shipping_type']}")
-        if client_info['shipping_type'] == 'One Location' and client_info['shipping_address']:
-            st.write(f"**Shipping Address:**")
-            st.caption(client_info['shipping_address'])
-
-    if client_info['billing_address']:
-        st.write(f"**Billing Address:**")
-        st.caption(client_info['billing_address'])
-
-    st.caption("Copy this purchase order for your records.")
-
-    # Download button for PO
-    po_complete = po_df.copy()
-
-    # Add summary section
-    blank_row = pd.DataFrame([{col: "" for col in po_df.columns}])
-    po_complete = pd.concat([po_complete, blank_row], ignore_index=True)
-
-    for summary_item in summary_data:
-        summary_row = pd.DataFrame([{
-            'Partner': summary_item[0],
-            'Product/Service': '',
-            'Product Ref': '',
-            'Quantity': '',
-            'Unit Cost': '',
-            'Total': summary_item[1],
-            'Notes': ''
-        }])
-        po_complete = pd.concat([po_complete, summary_row], ignore_index=True)
-
-    po_csv = po_complete.to_csv(index=False)
-    st.download_button(
-        label="Download Purchase Order (CSV)",
-        data=po_csv,
-        file_name=f"purchase_order_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-        mime="text/csv",
-        key="download_po"
-    )
+            summary_df = pd.DataFrame(summary_data, columns=["Item", "Amount"])
+            st.table(summary_df)
+
+            # Payment and shipping information
+            st.markdown("#### Payment & Shipping")
+
+            col1, col2 = st.columns(2)
+            with col1:
+                st.write(f"**Payment Terms:** {client_info['payment_timeline']}")
+                st.write(f"**Payment Method:** {client_info['payment_preference']}")
+            with col2:
+                st.write(f"**Shipping Type:** {client_info['shipping_type']}")
+                if client_info['shipping_type'] == 'One Location' and client_info['shipping_address']:
+                    st.write(f"**Shipping Address:**")
+                    st.caption(client_info['shipping_address'])
+
+            if client_info['billing_address']:
+                st.write(f"**Billing Address:**")
+                st.caption(client_info['billing_address'])
+
+            st.caption("Copy this purchase order for your records.")
+
+            # Download button for PO
+            # Line items, a blank row, then the order summary - written in one pass when clicked
+            po_rows = po_line_items + [{}] + [
+                {'Partner': label, 'Total': amount} for label, amount in summary_data
+            ]
+            st.download_button(
+                label="Download Purchase Order (CSV)",
+                data=timed_download("CSV: Purchase Order", partial(write_csv, list(po_df.columns), po_rows)),
+                file_name=f"purchase_order_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                mime="text/csv",
+                key="download_po"
+            )
+
+    end_section()
+
+show_order_download(order_download_slot)
+render_order()
+
+if PERFORMANCE_ENABLED:
+    end_section()
+    show_performance_panel(performance_slot)
 
 # ===== FOOTER =====
 st.divider()
@@ -0,0 +1,214 @@
+"""
+Catalog sources for the PBP Pricing App.
+The pricing catalog is three sheets (Template, Metadata, Partner-Specific Info).
+A catalog source knows how to fetch their raw cell values; load_catalog_frames
+turns those into the app's DataFrames the same way for every source.
+
+Sources:
+    GoogleSheetsSource - the live Google Sheet (used by the app by default)
+    LocalFileSource    - an .xlsx workbook or a folder of per-sheet CSV files,
+                         e.g. templates/Partner Specific Pricing Template.xlsx.
+                         Works offline, for development and benchmarks.
+
+No Streamlit dependency, so scripts can load and time the catalog too.
+"""
+
+import csv
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+from gspread.utils import fill_gaps
+
+from pricing import prepare_catalog
+
+# header_row: 0-based index of the header row
+# skip_empty_leading_columns: drop blank columns before the first header
+SHEET_LAYOUTS = {
+    "Template": {"header_row": 5, "skip_empty_leading_columns": True},
+    "Metadata": {"header_row": 1, "skip_empty_leading_columns": False},
+    "Partner-Specific Info": {"header_row": 1, "skip_empty_leading_columns": True},
+}
+
+# The blank template workbook has a title row above the Partner-Specific Info headers
+TEMPLATE_FILE_LAYOUTS = {
+    **SHEET_LAYOUTS,
+    "Partner-Specific Info": {"header_row": 2, "skip_empty_leading_columns": True},
+}
+
+
+def sheet_range(sheet_name):
+    """Quote a sheet name for A1 notation (e.g., Partner-Specific Info -> 'Partner-Specific Info')"""
+    return "'" + sheet_name.replace("'", "''") + "'"
+
+
+def parse_sheet_values(values, header_row, skip_empty_leading_columns=True):
+    """
+    Turn raw sheet values (list of rows) into a DataFrame.
+    Rows are padded to the same width first, because the batch API
+    trims trailing empty cells (get_all_values() used to pad them for us).
+    Empty headers are named Unnamed_0, Unnamed_1, ...
+    """
+    values = fill_gaps(values, rows=max(len(values), header_row + 1))
+    raw_headers = values[header_row]
+    raw_data = values[header_row + 1:]
+
+    # Find first non-empty column index
+    first_col_idx = 0
+    if skip_empty_leading_columns:
+        for i, header in enumerate(raw_headers):
+            if header.strip():
+                first_col_idx = i
+                break
+
+    # Extract headers and data starting from first non-empty column
+    headers = [col.strip() if col.strip() else f"Unnamed_{i}" for i, col in enumerate(raw_headers[first_col_idx:])]
+    data = [row[first_col_idx:] for row in raw_data]
+
+    return pd.DataFrame(data, columns=headers)
+
+
+def load_catalog_frames(source):
+    """
+    Load the three catalog sheets from a catalog source.
+    Returns (df_template, df_metadata, df_partner_info); the Template is typed
+    with prepare_catalog (prices -> float, Y/N -> bool).
+    """
+    values_by_sheet = source.get_sheet_values(list(source.layouts.keys()))
+    frames = {
+        sheet_name: parse_sheet_values(values_by_sheet.get(sheet_name, []), **layout)
+        for sheet_name, layout in source.layouts.items()
+    }
+
+    # Remove empty rows (where Partner column is empty)
+    df_template = frames["Template"]
+    df_template = df_template[df_template['Partner'].str.strip() != '']
+
+    # Type the catalog once (prices -> float, Y/N -> bool) so reruns never re-parse text
+    df_template = prepare_catalog(df_template)
+
+    df_metadata = frames["Metadata"]
+
+    # Remove empty rows from partner info (only if Partner column exists)
+    df_partner_info = frames["Partner-Specific Info"]
+    if 'Partner' in df_partner_info.columns:
+        df_partner_info = df_partner_info[df_partner_info['Partner'].str.strip() != '']
+
+    return df_template, df_metadata, df_partner_info
+
+
+class GoogleSheetsSource:
+    """
+    The pricing Google Sheet.
+    open_spreadsheet: function returning the gspread Spreadsheet (so the
+    caller decides how to connect). It is called once, on first use, and the
+    Spreadsheet is reused after that (a failed open is retried on the next use).
+    """
+
+    name = "Google Sheets"
+
+    def __init__(self, open_spreadsheet, spreadsheet_name, layouts=SHEET_LAYOUTS):
+        self.open_spreadsheet = open_spreadsheet
+        self.location = spreadsheet_name
+        self.layouts = layouts
+        self.spreadsheet = None
+        self.lock = threading.Lock()
+
+    def get_spreadsheet(self):
+        """The opened Spreadsheet (safe from any thread)."""
+        with self.lock:
+            if self.spreadsheet is None:
+                self.spreadsheet = self.open_spreadsheet()
+            return self.spreadsheet
+
+    def get_modified_time(self):
+        """Drive's last modification time (e.g., '2025-10-14T17:49:04.000Z')."""
+        return self.get_spreadsheet().get_lastUpdateTime()
+
+    def get_sheet_values(self, sheet_names):
+        """Fetch all sheets in a single values:batchGet round trip."""
+        response = self.get_spreadsheet().values_batch_get([sheet_range(name) for name in sheet_names])
+        value_ranges = response.get('valueRanges', [])
+        return {name: value_range.get('values', []) for name, value_range in zip(sheet_names, value_ranges)}
+
+
+class LocalFileSource:
+    """
+    The three catalog sheets from local files: an .xlsx workbook with the same
+    sheet names, or a folder with one CSV per sheet (Template.csv, Metadata.csv,
+    Partner-Specific Info.csv - e.g. Google Sheets "Download > CSV" of each sheet).
+    Cells are read as the text Google Sheets would show ('$1,234.00', '50.00%').
+    """
+
+    name = "Local file"
+
+    def __init__(self, path, layouts=None):
+        self.path = Path(path)
+        self.location = self.path.name
+        if layouts is None:
+            # The blank template workbook has its own layout; CSV folders match the Google Sheet
+            layouts = TEMPLATE_FILE_LAYOUTS if self.path.suffix == '.xlsx' else SHEET_LAYOUTS
+        self.layouts = layouts
+
+    def sheet_paths(self):
+        """The files to read (one workbook, or one CSV per sheet)."""
+        if self.path.is_dir():
+            return [self.path / f"{name}.csv" for name in self.layouts]
+        return [self.path]
+
+    def get_modified_time(self):
+        """Latest modification time of the files (ISO format)."""
+        latest = max(os.path.getmtime(path) for path in self.sheet_paths())
+        return datetime.fromtimestamp(latest).isoformat()
+
+    def get_sheet_values(self, sheet_names):
+        if self.path.is_dir():
+            values = {}
+            for name in sheet_names:
+                with open(self.path / f"{name}.csv", newline='', encoding='utf-8') as handle:
+                    values[name] = list(csv.reader(handle))
+            return values
+        return read_workbook_values(self.path, sheet_names)
+
+
+def format_cell(cell):
+    """Format an Excel cell as Google Sheets shows it ('$1,234.00', '50.00%', 'Y')."""
+    value = cell.value
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'TRUE' if value else 'FALSE'
+    if isinstance(value, (int, float)):
+        number_format = cell.number_format or ''
+        if '%' in number_format:
+            return f"{value * 100:.2f}%"
+        if '$' in number_format:
+            return f"${value:,.2f}"
+        if float(value).is_integer():
+            return str(int(value))
+        return str(value)
+    return str(value)
+
+
+def read_workbook_values(path, sheet_names):
+    """Read sheets from an .xlsx workbook as lists of text rows (trailing blanks trimmed, like the Sheets API)."""
+    from openpyxl import load_workbook  # Only needed for .xlsx sources
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        values = {}
+        for name in sheet_names:
+            rows = []
+            for cells in workbook[name].iter_rows():
+                row = [format_cell(cell) for cell in cells]
+                while row and row[-1] == '':
+                    row.pop()
+                rows.append(row)
+            while rows and not rows[-1]:
+                rows.pop()
+            values[name] = rows
+        return values
+    finally:
+        workbook.close()
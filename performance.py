@@ -0,0 +1,69 @@
+"""
+Timing instrumentation for the PBP Pricing App (opt-in, see PERFORMANCE_ENV_VAR in app.py).
+Keeps the latest timings of each app section (data load, numbered sections,
+CSV downloads) in a rolling window, so the p50/p95 show where time goes.
+Every timing can also be logged as one JSON line. No Streamlit dependency.
+"""
+
+import json
+import logging
+import math
+import sys
+import threading
+from collections import deque
+
+SAMPLE_WINDOW = 200  # Timings kept per section for the rolling percentiles
+
+logger = logging.getLogger("pbp.performance")
+
+
+def create_timing_store(window=SAMPLE_WINDOW, log_json=False):
+    """
+    Rolling timings shared by all sessions: {section: deque of seconds}.
+    With log_json, every timing is also logged to stderr as a JSON line.
+    """
+    if log_json and not logger.handlers:
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return {'lock': threading.Lock(), 'window': window, 'samples': {}, 'log_json': log_json}
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of numbers (fraction 0.5 = median, 0.95 = p95)."""
+    ordered = sorted(values)
+    index = max(0, math.ceil(fraction * len(ordered)) - 1)
+    return ordered[index]
+
+
+def timing_stats(samples):
+    """Count, p50 and p95 (in seconds) of a section's recent timings."""
+    samples = list(samples)
+    return {'count': len(samples), 'p50': percentile(samples, 0.5), 'p95': percentile(samples, 0.95)}
+
+
+def record_timing(store, section, seconds):
+    """Add one timing for a section (safe from any thread). Returns the section's stats."""
+    with store['lock']:
+        samples = store['samples'].setdefault(section, deque(maxlen=store['window']))
+        samples.append(seconds)
+        stats = timing_stats(samples)
+
+    if store['log_json']:
+        logger.info(json.dumps({
+            'event': 'section_timing',
+            'section': section,
+            'ms': round(seconds * 1000, 2),
+            'p50_ms': round(stats['p50'] * 1000, 2),
+            'p95_ms': round(stats['p95'] * 1000, 2),
+            'samples': stats['count']
+        }))
+    return stats
+
+
+def timing_summary(store):
+    """Stats for every section timed so far, in the order they were first seen."""
+    with store['lock']:
+        return {section: timing_stats(samples) for section, samples in store['samples'].items()}
@@ -0,0 +1,711 @@
+"""
+Pricing core for the PBP Pricing App.
+Plain Python/pandas functions with no Streamlit dependency, so they can be
+used from app.py, scripts and command-line tools alike.
+"""
+
+import bisect
+import math
+import numpy as np
+import pandas as pd
+
+# Catalog columns typed once at load time (see prepare_catalog)
+PRICE_COLUMNS = [
+    'PBP Cost (No Tiers)',
+    'Customization Setup Fee',
+    'Customization Cost per Unit',
+    'Partner MSRP'
+]
+TIER_PRICE_PREFIX = 'PBP Cost: Tier '  # 'PBP Cost: Tier 1', 'PBP Cost: Tier 2', ...
+TARIFF_COLUMN = 'Tariff Estimate (if available)'
+YES_NO_COLUMNS = ['Pricing Tiers (Y/N)']
+CATEGORY_COLUMNS = ['Partner', 'Country of Origin']
+
+# MOQ settings (soft-coded for easy modification)
+MOQ_MINIMUM_ORDER_VALUE = 1000  # Minimum order value in dollars
+MOQ_SETUP_AMORTIZATION_QTY = 100  # Units a customization setup fee is spread over in the MOQ estimate
+
+# ===== CATALOG INGEST =====
+def parse_yes_no(value):
+    """
+    Convert a Y/N sheet value to bool: only 'Y' (any case, spaces ignored) is True.
+    Bools (an already typed column) are returned as-is.
+    """
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    return str(value).strip().upper() == 'Y'
+
+def to_float_column(series):
+    """Convert a column of '$1,500.00' / '50.00%' text to float64 (NaN if blank or invalid)."""
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        return series.astype('float64')
+    cleaned = series.astype(str).str.replace(r'[$,%]', '', regex=True).str.strip()
+    return pd.to_numeric(cleaned, errors='coerce').astype('float64')
+
+def prepare_catalog(df_template):
+    """
+    Convert the Template sheet into typed columns, once at load time:
+    prices, fees, MSRP and tariff estimates -> float64 (NaN when blank),
+    Pricing Tiers (Y/N) -> bool, Partner and Country of Origin -> categorical.
+    Safe to run again on an already typed catalog.
+    """
+    df = df_template.copy()
+    for column in df.columns:
+        if column in PRICE_COLUMNS or column.startswith(TIER_PRICE_PREFIX) or column == TARIFF_COLUMN:
+            df[column] = to_float_column(df[column])
+        elif column in YES_NO_COLUMNS:
+            df[column] = df[column].map(parse_yes_no).astype(bool)
+        elif column in CATEGORY_COLUMNS:
+            df[column] = df[column].astype('category')
+    return df
+
+def number_text(value, prefix='', suffix=''):
+    """Write a typed number back as sheet text ('$1,500.00', '25.00%'); '' for NaN."""
+    if pd.isna(value):
+        return ''
+    text = f"{value:,.2f}"
+    if float(text.replace(',', '')) != value:
+        text = f"{value:,}"  # Keep extra decimals (e.g. $0.125) so nothing is rounded away
+    return f"{prefix}{text}{suffix}"
+
+def catalog_to_sheet_text(df_template):
+    """
+    Convert a typed catalog (see prepare_catalog) back to the sheet's text:
+    prices -> '$1,500.00', tariff estimates -> '25.00%', Pricing Tiers (Y/N) -> 'Y'/'N'.
+    Used for the CSV export, so the file reads like the sheet (and quote_orders.py prices it the same).
+    """
+    df = prepare_catalog(df_template)
+    for column in df.columns:
+        if column in PRICE_COLUMNS or column.startswith(TIER_PRICE_PREFIX):
+            df[column] = df[column].map(lambda value: number_text(value, prefix='$'))
+        elif column == TARIFF_COLUMN:
+            df[column] = df[column].map(lambda value: number_text(value, suffix='%'))
+        elif column in YES_NO_COLUMNS:
+            df[column] = df[column].map(lambda value: 'Y' if value else 'N')
+    return df
+
+# ===== PRICING HELPERS =====
+def apply_marketing_rounding(price, enabled=True):
+    """Apply charm pricing: round whole dollar amounts down by $1 (e.g., $60 -> $59)"""
+    if enabled and price % 1 == 0:
+        return price - 1
+    return price
+
+def round_to_nearest_five(price, enabled=True):
+    """Round price to the nearest multiple of 5 (e.g., $17.50 -> $20, $12.30 -> $10)"""
+    if enabled:
+        return round(price / 5) * 5
+    return price
+
+def calculate_moq(unit_price, minimum_order_value=MOQ_MINIMUM_ORDER_VALUE):
+    """
+    Calculate Minimum Order Quantity based on $1,000 minimum order value.
+    Formula: MOQ = ceil(1000 / Unit Price)
+    """
+    if unit_price <= 0:
+        return None
+    return math.ceil(minimum_order_value / unit_price)
+
+def calculate_credit_card_fee(total, apply_fee=False, fee_percent=2.9):
+    """
+    Calculate credit card processing fee if applicable.
+    Default rate: 2.9%
+    """
+    if apply_fee:
+        return total * (fee_percent / 100)
+    return 0.0
+
+def parse_tier_info(tier_string):
+    """
+    Parse 'T1: 1-25, T2: 26-50, ...' into dict of tier ranges.
+    Returns: {1: (1, 25), 2: (26, 50), ...}
+    """
+    if pd.isna(tier_string) or tier_string == "" or tier_string == "NA":
+        return {}
+
+    tier_dict = {}
+    parts = tier_string.split(',')
+    for part in parts:
+        if ':' not in part:
+            continue
+        # Extract "T1: 1-25" → tier_num=1, range=(1, 25)
+        tier_label, range_str = part.split(':')
+        tier_num = int(tier_label.strip().replace('T', ''))
+        range_str = range_str.strip()
+        if '-' in range_str:
+            min_qty, max_qty = range_str.split('-')
+            tier_dict[tier_num] = (int(min_qty), int(max_qty))
+        elif '+' in range_str:
+            # Handle "1000+" format
+            min_qty = int(range_str.replace('+', ''))
+            tier_dict[tier_num] = (min_qty, float('inf'))
+
+    return tier_dict
+
+def parse_tariff_rate(tariff_string):
+    """
+    Parse tariff percentage from spreadsheet strings.
+
+    Examples:
+        "50.00%" -> 50.0
+        "50%" -> 50.0
+        "25.5%" -> 25.5
+        "" -> 0.0
+        "NA" -> 0.0
+        50.0 -> 50.0 (already typed by prepare_catalog; NaN -> 0.0)
+
+    Returns:
+        float: Tariff rate as decimal percentage (0.0 if invalid)
+    """
+    if isinstance(tariff_string, (int, float, np.number)):
+        return 0.0 if pd.isna(tariff_string) else float(tariff_string)
+    if not tariff_string or tariff_string == '' or tariff_string == 'NA':
+        return 0.0
+    try:
+        cleaned = str(tariff_string).replace('%', '').strip()
+        return float(cleaned)
+    except (ValueError, AttributeError):
+        return 0.0
+
+def calculate_product_tariff(product_cost_with_markup, tariff_rate_percent):
+    """
+    Calculate tariff on product cost.
+
+    Args:
+        product_cost_with_markup: Base product cost (price + markup, excluding customization)
+        tariff_rate_percent: Tariff rate as percentage (e.g., 50.0 for 50%)
+
+    Returns:
+        float: Tariff dollar amount
+
+    Example:
+        product_cost = $4,000 (base $2,000 + markup $2,000)
+        tariff_rate = 50.0%
+        tariff_amount = $2,000
+    """
+    if tariff_rate_percent <= 0:
+        return 0.0
+    return product_cost_with_markup * (tariff_rate_percent / 100)
+
+def calculate_product_totals(base_price, quantity, markup_percent, customization_setup_fee=0,
+                             customization_per_unit=0, effective_custom_qty=None, tariff_rate_percent=0.0):
+    """
+    Calculate the totals for one product line (same math as the Product Preview).
+    Markup applies to the product price only; tariff applies to product + markup.
+    effective_custom_qty defaults to quantity (use a higher value for customization minimums).
+    Returns dict of amounts.
+    """
+    if effective_custom_qty is None:
+        effective_custom_qty = quantity
+
+    product_subtotal = base_price * quantity
+    customization_setup_total = customization_setup_fee
+    customization_unit_total = customization_per_unit * effective_custom_qty
+    subtotal_before_markup = product_subtotal + customization_setup_total + customization_unit_total
+    markup_amount = product_subtotal * (markup_percent / 100)
+    product_total = subtotal_before_markup + markup_amount
+
+    # Tariff base is product + markup (excludes customization)
+    tariff_base = product_subtotal + markup_amount
+
+    return {
+        'product_subtotal': product_subtotal,
+        'customization_setup_total': customization_setup_total,
+        'customization_unit_total': customization_unit_total,
+        'subtotal_before_markup': subtotal_before_markup,
+        'markup_amount': markup_amount,
+        'product_total': product_total,
+        'total_per_unit': product_total / quantity,
+        'tariff_base': tariff_base,
+        'tariff_amount': calculate_product_tariff(tariff_base, tariff_rate_percent)
+    }
+
+def calculate_order_totals(order_items, shipping=0.0, discount_percent=0.0, apply_cc_fee=False,
+                           cc_fee_percent=2.9, use_marketing_rounding=False):
+    """
+    Calculate the order totals in one pass over the order items.
+    Discount applies to products only; the credit card fee applies to
+    the total after discount, shipping and tariff; marketing rounding last.
+    Returns dict of amounts.
+    """
+    products_subtotal = 0
+    tariff = 0
+    total_units = 0
+    for item in order_items:
+        products_subtotal += item['product_total']
+        tariff += item.get('tariff_amount', 0.0)
+        total_units += item['quantity']
+
+    discount_amount = products_subtotal * (discount_percent / 100)
+    subtotal_after_discount = products_subtotal - discount_amount
+    total_before_cc = subtotal_after_discount + shipping + tariff
+    cc_fee_amount = calculate_credit_card_fee(total_before_cc, apply_cc_fee, cc_fee_percent)
+    total_quote = apply_marketing_rounding(total_before_cc + cc_fee_amount, use_marketing_rounding)
+
+    return {
+        'products_subtotal': products_subtotal,
+        'discount_percent': discount_percent,
+        'discount_amount': discount_amount,
+        'subtotal_after_discount': subtotal_after_discount,
+        'shipping': shipping,
+        'tariff': tariff,
+        'total_before_cc': total_before_cc,
+        'cc_fee_amount': cc_fee_amount,
+        'total_quote': total_quote,
+        'total_units': total_units
+    }
+
+def determine_tier_number(quantity, tier_info_string, has_tiers):
+    """
+    Returns tier number (1-6) based on quantity, or None if no tiers.
+    """
+    if not parse_yes_no(has_tiers):
+        return None
+
+    tier_ranges = parse_tier_info(tier_info_string)
+
+    if not tier_ranges:
+        return None
+
+    for tier_num, (min_qty, max_qty) in tier_ranges.items():
+        if min_qty <= quantity <= max_qty:
+            return tier_num
+
+    # If quantity exceeds all ranges, use highest tier
+    if tier_ranges:
+        return max(tier_ranges.keys())
+
+    return None
+
+def get_unit_price_new_system(row, quantity):
+    """
+    Get correct unit price based on new tier logic from master_pricing_template_10_14.
+    Handles both tiered and non-tiered pricing.
+    """
+    has_tiers = parse_yes_no(row.get('Pricing Tiers (Y/N)', ''))
+
+    if not has_tiers:
+        # Use flat rate
+        flat_price = clean_price(row.get('PBP Cost (No Tiers)', ''))
+        if flat_price is not None:
+            return flat_price, "No Tiers", "PBP Cost (No Tiers)"
+        else:
+            return None, None, None
+
+    # Determine tier and get price
+    tier_info = row.get('Pricing Tiers Info', '')
+    tier_num = determine_tier_number(quantity, tier_info, has_tiers)
+
+    if tier_num is None:
+        return None, None, None
+
+    tier_col = f'PBP Cost: Tier {tier_num}'
+    price = clean_price(row.get(tier_col, ''))
+
+    if price is not None:
+        # Get tier range for display
+        tier_ranges = parse_tier_info(tier_info)
+        if tier_num in tier_ranges:
+            min_qty, max_qty = tier_ranges[tier_num]
+            if max_qty == float('inf'):
+                tier_range = f"{min_qty}+"
+            else:
+                tier_range = f"{min_qty}-{max_qty}"
+            return price, tier_range, tier_col
+
+    return None, None, None
+
+def compile_pricing_entry(row):
+    """
+    Pre-parse one product row into numbers, so price lookups need no string work.
+    Returns dict with sorted tier boundaries and float prices,
+    or None if the row can't be compiled (lookups then use the row directly).
+    """
+    has_tiers = parse_yes_no(row.get('Pricing Tiers (Y/N)', ''))
+    entry = {
+        'has_tiers': has_tiers,
+        'flat_price': clean_price(row.get('PBP Cost (No Tiers)', '')),
+        'tier_numbers': [],
+        'tier_mins': [],
+        'tier_maxes': [],
+        'tier_prices': [],
+        'tier_labels': [],
+        'fallback_index': None
+    }
+    if not has_tiers:
+        return entry
+
+    try:
+        tier_ranges = parse_tier_info(row.get('Pricing Tiers Info', ''))
+    except ValueError:
+        return None
+
+    # Sort tiers by minimum quantity so lookups can use binary search
+    for tier_num, (min_qty, max_qty) in sorted(tier_ranges.items(), key=lambda tier: tier[1][0]):
+        entry['tier_numbers'].append(tier_num)
+        entry['tier_mins'].append(min_qty)
+        entry['tier_maxes'].append(max_qty)
+        entry['tier_prices'].append(clean_price(row.get(f'PBP Cost: Tier {tier_num}', '')))
+        entry['tier_labels'].append(f"{min_qty}+" if max_qty == float('inf') else f"{min_qty}-{max_qty}")
+
+    # Overlapping ranges depend on the sheet's tier order - keep the row-based lookup for those
+    for i in range(1, len(entry['tier_mins'])):
+        if entry['tier_mins'][i] <= entry['tier_maxes'][i - 1]:
+            return None
+
+    # Quantities outside every range use the highest tier number
+    if entry['tier_numbers']:
+        entry['fallback_index'] = entry['tier_numbers'].index(max(entry['tier_numbers']))
+
+    return entry
+
+def compile_pricing_table(df_template):
+    """
+    Build the compiled pricing table once at load time.
+    Returns {(partner, product): entry} - see compile_pricing_entry().
+    """
+    pricing_table = {}
+    for row in df_template.to_dict('records'):
+        key = (row['Partner'], row['Product/Service'])
+        if key not in pricing_table:  # First row wins, same as the product dropdowns
+            pricing_table[key] = compile_pricing_entry(row)
+    return pricing_table
+
+def build_catalog_index(df_template):
+    """
+    Build the product selection index once at load time.
+    Returns a dict with:
+      'partners': sorted partner names (for the partner dropdown)
+      'products_by_partner': {partner: [products in sheet order]}
+      'rows_by_key': {(partner, product): row dict}
+    """
+    products_by_partner = {}
+    rows_by_key = {}
+    for row in df_template.to_dict('records'):
+        key = (row['Partner'], row['Product/Service'])
+        if key not in rows_by_key:  # First row wins, same as compile_pricing_table()
+            rows_by_key[key] = row
+            products_by_partner.setdefault(row['Partner'], []).append(row['Product/Service'])
+
+    return {
+        'partners': sorted(products_by_partner),
+        'products_by_partner': products_by_partner,
+        'rows_by_key': rows_by_key
+    }
+
+def lookup_unit_price(entry, quantity):
+    """
+    Same result as get_unit_price_new_system(), using a compiled pricing entry.
+    Finds the tier with a binary search over the tier boundaries.
+    """
+    if not entry['has_tiers']:
+        if entry['flat_price'] is not None:
+            return entry['flat_price'], "No Tiers", "PBP Cost (No Tiers)"
+        return None, None, None
+
+    if entry['fallback_index'] is None:
+        return None, None, None
+
+    i = bisect.bisect_right(entry['tier_mins'], quantity) - 1
+    if i < 0 or quantity > entry['tier_maxes'][i]:
+        i = entry['fallback_index']
+
+    price = entry['tier_prices'][i]
+    if price is None:
+        return None, None, None
+    return price, entry['tier_labels'][i], f"PBP Cost: Tier {entry['tier_numbers'][i]}"
+
+def get_unit_price(pricing_table, row, quantity):
+    """
+    Get unit price for a product row using the compiled pricing table.
+    Falls back to get_unit_price_new_system() for rows that weren't compiled.
+    Returns (price, tier_range, column_name).
+    """
+    entry = pricing_table.get((row['Partner'], row['Product/Service']))
+    if entry is None:
+        return get_unit_price_new_system(row, quantity)
+    return lookup_unit_price(entry, quantity)
+
+def solve_compiled_moq(entry, customization_estimate, markup_multiplier,
+                       minimum_order_value=MOQ_MINIMUM_ORDER_VALUE):
+    """
+    Exact MOQ for a compiled pricing entry: the smallest quantity where
+    quantity x (price + customization estimate) x markup reaches the minimum order value.
+    Walks the price segments in quantity order - each tier, plus the gaps around
+    the tiers (priced at the fallback tier, like lookup_unit_price) - so it's O(tiers).
+    Returns the MOQ, or None if no quantity reaches the minimum.
+    """
+    if not entry['has_tiers']:
+        segments = [(1, float('inf'), entry['flat_price'])]
+    elif entry['fallback_index'] is None:
+        return None
+    else:
+        fallback_price = entry['tier_prices'][entry['fallback_index']]
+        segments = []
+        next_quantity = 1
+        for tier_min, tier_max, price in zip(entry['tier_mins'], entry['tier_maxes'], entry['tier_prices']):
+            if tier_min > next_quantity:
+                segments.append((next_quantity, tier_min - 1, fallback_price))
+            segments.append((max(tier_min, next_quantity), tier_max, price))
+            next_quantity = tier_max + 1
+        segments.append((next_quantity, float('inf'), fallback_price))
+
+    for start, end, price in segments:
+        if price is None or start > end:
+            continue
+        unit_price = (price + customization_estimate) * markup_multiplier
+        if unit_price <= 0:
+            continue
+        # Smallest quantity in this segment that reaches the minimum
+        quantity = max(start, calculate_moq(unit_price, minimum_order_value))
+        if quantity <= end:
+            return quantity
+    return None
+
+def calculate_order_moq(pricing_table, row, quantity, markup_percent,
+                        customization_setup_fee=0, customization_per_unit=0,
+                        minimum_order_value=MOQ_MINIMUM_ORDER_VALUE,
+                        amortization_qty=MOQ_SETUP_AMORTIZATION_QTY, max_iterations=10):
+    """
+    MOQ (minimum order value, default $1,000) for a product line, and the base price at the MOQ.
+    Customization is estimated as the setup fee spread over amortization_qty units + the per-unit cost.
+    Compiled products use the exact tier walk (solve_compiled_moq). Other rows start from
+    the price at the ordered quantity and re-price at the MOQ until it stops changing.
+    Returns (moq, base_price, tier_range); base_price is None if there's no price at the MOQ.
+    """
+    markup_multiplier = 1 + (markup_percent / 100)
+    customization_estimate = (customization_setup_fee / amortization_qty) + customization_per_unit
+
+    entry = pricing_table.get((row['Partner'], row['Product/Service']))
+    if entry is not None:
+        moq = solve_compiled_moq(entry, customization_estimate, markup_multiplier, minimum_order_value)
+        if moq is None:
+            moq = 5  # Fallback
+        base_price, tier_range, _ = lookup_unit_price(entry, moq)
+        return moq, base_price, tier_range
+
+    base_price, tier_range, _ = get_unit_price(pricing_table, row, quantity)
+    if base_price is None:
+        moq = 5  # Fallback
+        base_price, tier_range, _ = get_unit_price(pricing_table, row, moq)
+        return moq, base_price, tier_range
+
+    moqs_seen = []
+    for _ in range(max_iterations):
+        moq = calculate_moq((base_price + customization_estimate) * markup_multiplier, minimum_order_value)
+        if moq is None:
+            moq = 5  # Fallback
+        if moq in moqs_seen:
+            # Settled (or alternating between tiers - use the largest MOQ of the cycle)
+            moq = max(moqs_seen[moqs_seen.index(moq):])
+            break
+        moqs_seen.append(moq)
+        base_price, tier_range, _ = get_unit_price(pricing_table, row, moq)
+        if base_price is None:
+            break
+
+    base_price, tier_range, _ = get_unit_price(pricing_table, row, moq)
+    return moq, base_price, tier_range
+
+def quote_catalog(df_template, pricing_table, quantities, markups=(100.0,)):
+    """
+    Price every product at every quantity and markup in one vectorized pass.
+    Uses the compiled pricing table, so no strings are parsed per quote.
+    Customization is not included (same as the Product Preview before customization).
+
+    Returns a DataFrame with one row per (product, quantity, markup):
+    base price, pricing tier, markup, tariff and product total.
+    Products without pricing for a quantity get NaN prices.
+    """
+    products = df_template.drop_duplicates(subset=['Partner', 'Product/Service'])
+    keys = list(zip(products['Partner'], products['Product/Service']))
+    entries = [pricing_table.get(key) for key in keys]
+    quantity_values = np.asarray(quantities)
+    quantities = quantity_values.astype(float)
+    markups = np.asarray(markups, dtype=float)
+
+    # Stack the compiled entries into (products x tiers) arrays, padded with inf/NaN
+    num_products = len(entries)
+    max_tiers = max([len(entry['tier_mins']) for entry in entries if entry] + [1])
+    tier_mins = np.full((num_products, max_tiers), np.inf)
+    tier_maxes = np.full((num_products, max_tiers), -np.inf)
+    tier_prices = np.full((num_products, max_tiers), np.nan)
+    tier_labels = np.full((num_products, max_tiers), None, dtype=object)
+    has_tiers = np.zeros(num_products, dtype=bool)
+    flat_prices = np.full(num_products, np.nan)
+    fallback_index = np.full(num_products, -1)
+
+    for p, entry in enumerate(entries):
+        if entry is None:
+            continue
+        has_tiers[p] = entry['has_tiers']
+        if entry['flat_price'] is not None:
+            flat_prices[p] = entry['flat_price']
+        if entry['fallback_index'] is not None:
+            fallback_index[p] = entry['fallback_index']
+        num_tiers = len(entry['tier_mins'])
+        tier_mins[p, :num_tiers] = entry['tier_mins']
+        tier_maxes[p, :num_tiers] = entry['tier_maxes']
+        tier_prices[p, :num_tiers] = [np.nan if price is None else price for price in entry['tier_prices']]
+        tier_labels[p, :num_tiers] = entry['tier_labels']
+
+    # Tier lookup for every (product, quantity): last tier whose minimum <= quantity,
+    # or the highest tier when the quantity is outside every range
+    tier_index = (tier_mins[:, None, :] <= quantities[None, :, None]).sum(axis=2) - 1
+    safe_index = np.clip(tier_index, 0, max_tiers - 1)
+    in_range = (tier_index >= 0) & (quantities[None, :] <= np.take_along_axis(tier_maxes, safe_index, axis=1))
+    tier_index = np.where(in_range, tier_index, fallback_index[:, None])
+    has_tier = tier_index >= 0
+    safe_index = np.clip(tier_index, 0, max_tiers - 1)
+    tiered_prices = np.where(has_tier, np.take_along_axis(tier_prices, safe_index, axis=1), np.nan)
+    tiered_labels = np.where(has_tier, np.take_along_axis(tier_labels, safe_index, axis=1), None)
+
+    base_prices = np.where(has_tiers[:, None], tiered_prices, flat_prices[:, None])
+    tier_ranges = np.where(has_tiers[:, None], tiered_labels, "No Tiers")
+    tier_ranges = np.where(np.isnan(base_prices), None, tier_ranges)
+
+    # Rows that couldn't be compiled use the row-based lookup (malformed tier info = no price)
+    for p, entry in enumerate(entries):
+        if entry is None:
+            row = products.iloc[p]
+            for q, quantity in enumerate(quantities):
+                try:
+                    price, tier_range, _ = get_unit_price_new_system(row, quantity)
+                except ValueError:
+                    price, tier_range = None, None
+                base_prices[p, q] = np.nan if price is None else price
+                tier_ranges[p, q] = tier_range
+
+    if TARIFF_COLUMN in products.columns:
+        tariff_rates = to_float_column(products[TARIFF_COLUMN]).fillna(0.0).to_numpy()
+    else:
+        tariff_rates = np.zeros(num_products)
+
+    # Broadcast to (products x quantities x markups)
+    product_subtotal = base_prices[:, :, None] * quantities[None, :, None]
+    markup_amount = product_subtotal * (markups[None, None, :] / 100)
+    product_total = product_subtotal + markup_amount
+    tariff_amount = np.where(tariff_rates[:, None, None] > 0, product_total * (tariff_rates[:, None, None] / 100), 0.0)
+
+    shape = product_total.shape
+    return pd.DataFrame({
+        'Partner': np.repeat(products['Partner'].to_numpy(), shape[1] * shape[2]),
+        'Product/Service': np.repeat(products['Product/Service'].to_numpy(), shape[1] * shape[2]),
+        'Quantity': np.tile(np.repeat(quantity_values, shape[2]), shape[0]),
+        'Markup %': np.tile(markups, shape[0] * shape[1]),
+        'Base Price': np.repeat(base_prices, shape[2]),
+        'Pricing Tier': np.repeat(tier_ranges, shape[2]),
+        'Product Subtotal': np.broadcast_to(product_subtotal, shape).ravel(),
+        'Markup Amount': markup_amount.ravel(),
+        'Tariff Rate %': np.repeat(tariff_rates, shape[1] * shape[2]),
+        'Tariff Amount': tariff_amount.ravel(),
+        'Product Total': product_total.ravel()
+    })
+
+def clean_price(price_string):
+    """
+    Convert price string like '$48.00' or '$1,500.00' to float.
+    Numbers (typed catalog) are returned as float.
+    Returns None if empty or invalid.
+    """
+    if isinstance(price_string, (int, float, np.number)):
+        return None if pd.isna(price_string) else float(price_string)
+    if not price_string or price_string == '':
+        return None
+    try:
+        # Remove $, commas, whitespace
+        cleaned = str(price_string).replace('$', '').replace(',', '').strip()
+        return float(cleaned)
+    except (ValueError, AttributeError):
+        return None
+
+
+def get_price_for_quantity(product_row, quantity):
+    """
+    Select the appropriate price tier based on quantity.
+    Returns (price, tier_range, column_name) or (None, None, None) if not found.
+    """
+    # Define tier columns and their ranges (soft-coded for easy modification)
+    tier_columns = [
+        {'min': 1, 'max': 25, 'column': 'PBP Cost w/o shipping (1-25)'},
+        {'min': 26, 'max': 50, 'column': 'PBP Cost w/o shipping (26-50)'},
+        {'min': 51, 'max': 100, 'column': 'PBP Cost w/o shipping (51-100)'},
+        {'min': 101, 'max': 250, 'column': 'PBP Cost w/o shipping (101-250)'},
+        {'min': 251, 'max': 500, 'column': 'PBP Cost w/o shipping (251-500)'},
+        {'min': 501, 'max': 1000, 'column': 'PBP Cost w/o shipping (501-1000)'},
+        {'min': 1001, 'max': float('inf'), 'column': 'PBP Cost w/o shipping (1000+)'}
+    ]
+
+    # Find matching tier
+    for i, tier in enumerate(tier_columns):
+        if tier['min'] <= quantity <= tier['max']:
+            # Try exact tier match
+            if tier['column'] in product_row.index:
+                price = clean_price(product_row[tier['column']])
+                if price is not None:
+                    tier_range = f"{tier['min']}-{tier['max']}" if tier['max'] != float('inf') else f"{tier['min']}+"
+                    return price, tier_range, tier['column']
+
+            # Fallback: try higher tiers
+            for higher_tier in tier_columns[i+1:]:
+                if higher_tier['column'] in product_row.index:
+                    price = clean_price(product_row[higher_tier['column']])
+                    if price is not None:
+                        tier_range = f"{higher_tier['min']}-{higher_tier['max']}" if higher_tier['max'] != float('inf') else f"{higher_tier['min']}+"
+                        return price, tier_range, higher_tier['column']
+
+            # Fallback: try lower tiers
+            for lower_tier in reversed(tier_columns[:i]):
+                if lower_tier['column'] in product_row.index:
+                    price = clean_price(product_row[lower_tier['column']])
+                    if price is not None:
+                        tier_range = f"{lower_tier['min']}-{lower_tier['max']}" if lower_tier['max'] != float('inf') else f"{lower_tier['min']}+"
+                        return price, tier_range, lower_tier['column']
+
+    return None, None, None
+
+
+def calculate_additional_costs(product_row, quantity, include_labels=False):
+    """
+    Calculate additional costs (setup fees, labels, etc.)
+    Art Setup Fee only applies when labels are selected.
+    Returns dict with all additional costs.
+    """
+    additional_costs = {}
+
+    # Label Costs (optional, user chooses)
+    if include_labels:
+        # Art Setup Fee (one-time per order) - only when labels are selected
+        setup_fee = clean_price(product_row.get('Art Setup Fee', ''))
+        if setup_fee is None:
+            setup_fee = 0
+        additional_costs['art_setup_fee_total'] = setup_fee
+        additional_costs['art_setup_fee_per_unit'] = setup_fee / quantity if quantity > 0 else 0
+
+        # Label unit cost and minimum
+        label_cost_per_label = clean_price(product_row.get('Labels up to 1" x 2.5\'', ''))
+        if label_cost_per_label is None:
+            label_cost_per_label = 0
+
+        label_minimum_raw = clean_price(product_row.get('Minimum for labels', ''))
+        label_minimum = int(label_minimum_raw) if label_minimum_raw else 100
+
+        # Apply minimum: customer pays for at least label_minimum labels
+        labels_to_charge = max(quantity, label_minimum)
+        additional_costs['labels_charged'] = labels_to_charge
+        additional_costs['label_cost_per_label'] = label_cost_per_label
+        additional_costs['label_cost_total'] = label_cost_per_label * labels_to_charge
+        additional_costs['label_cost_per_unit'] = (label_cost_per_label * labels_to_charge) / quantity if quantity > 0 else 0
+
+        # Warning message if minimum applies
+        if quantity < label_minimum:
+            additional_costs['label_warning'] = f"Minimum {label_minimum} labels required. Charging for {labels_to_charge} labels even though ordering {quantity} units."
+    else:
+        # No labels requested - no costs apply
+        additional_costs['art_setup_fee_total'] = 0
+        additional_costs['art_setup_fee_per_unit'] = 0
+        additional_costs['label_cost_total'] = 0
+        additional_costs['labels_charged'] = 0
+        additional_costs['label_warning'] = None
+
+    return additional_costs
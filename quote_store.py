@@ -0,0 +1,177 @@
+"""
+Saved quote store for the PBP Pricing App.
+Keeps saved quotes ("Recent Orders") in a local SQLite database, so they
+survive app restarts and are shared between sessions. No Streamlit dependency.
+
+Each quote is one row in 'quotes' (summary columns + the full order as JSON),
+plus one row per product in 'quote_products' for searching by partner/product.
+Lists only read the summary columns, one page at a time.
+"""
+
+import json
+import sqlite3
+from datetime import datetime
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS quotes (
+    id INTEGER PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    client_company TEXT NOT NULL DEFAULT '' COLLATE NOCASE,
+    total_quote REAL NOT NULL,
+    total_units INTEGER NOT NULL,
+    product_names TEXT NOT NULL,
+    order_data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS quote_products (
+    quote_id INTEGER NOT NULL REFERENCES quotes(id) ON DELETE CASCADE,
+    partner TEXT NOT NULL COLLATE NOCASE,
+    product TEXT NOT NULL COLLATE NOCASE
+);
+CREATE INDEX IF NOT EXISTS quotes_created_at ON quotes (created_at);
+CREATE INDEX IF NOT EXISTS quotes_client_company ON quotes (client_company, created_at);
+CREATE INDEX IF NOT EXISTS quote_products_quote_id ON quote_products (quote_id);
+CREATE INDEX IF NOT EXISTS quote_products_partner ON quote_products (partner);
+CREATE INDEX IF NOT EXISTS quote_products_product ON quote_products (product);
+"""
+
+# Quotes matching a search: client company, partner or product starting with the search text
+# (prefix LIKE on NOCASE columns can use the indexes above)
+SEARCH_FILTER = """
+    WHERE id IN (
+        SELECT id FROM quotes WHERE client_company LIKE :pattern ESCAPE '\\'
+        UNION SELECT quote_id FROM quote_products WHERE partner LIKE :pattern ESCAPE '\\'
+        UNION SELECT quote_id FROM quote_products WHERE product LIKE :pattern ESCAPE '\\'
+    )
+"""
+
+
+def connect(path):
+    """
+    Open the quote database. A new connection per call keeps this safe to use
+    from every Streamlit session thread; SQLite connections are cheap.
+    """
+    connection = sqlite3.connect(path, timeout=10)
+    connection.execute("PRAGMA foreign_keys = ON")
+    connection.execute("PRAGMA synchronous = NORMAL")  # Safe with WAL, much faster saves
+    return connection
+
+
+def init_quote_store(path):
+    """Create the quote database and its indexes if they don't exist yet."""
+    with connect(path) as connection:
+        connection.execute("PRAGMA journal_mode = WAL")  # Readers don't wait for a save
+        connection.executescript(SCHEMA)
+    connection.close()
+
+
+def to_json_value(value):
+    """JSON fallback for pandas/numpy values and other non-JSON values in order items."""
+    if hasattr(value, 'to_dict'):
+        return value.to_dict()  # pandas Series, e.g. an older item's 'product_data_row' (column -> value)
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()  # datetime / pd.Timestamp
+    if hasattr(value, 'tolist'):
+        return value.tolist()  # numpy numbers, bools and arrays
+    return str(value)
+
+
+def save_quote(path, quote):
+    """
+    Save a quote (the "Save Quote to History" entry: timestamp, totals,
+    order_items, shipping, ...). Returns the new quote id.
+    """
+    order_data = {key: value for key, value in quote.items() if key != 'timestamp'}
+
+    with connect(path) as connection:
+        cursor = connection.execute(
+            "INSERT INTO quotes (created_at, client_company, total_quote, total_units, product_names, order_data)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                quote['timestamp'].isoformat(),
+                quote.get('client_company', '').strip(),
+                float(quote['total_quote']),
+                int(quote['total_units']),
+                json.dumps(quote['product_names']),
+                json.dumps(order_data, default=to_json_value)
+            )
+        )
+        quote_id = cursor.lastrowid
+        connection.executemany(
+            "INSERT INTO quote_products (quote_id, partner, product) VALUES (?, ?, ?)",
+            [(quote_id, str(item.get('partner', '')), str(item.get('product_name', '')))
+             for item in quote['order_items']]
+        )
+    connection.close()
+    return quote_id
+
+
+def search_parameters(search):
+    """Turn search text into a LIKE prefix pattern (% and _ are matched literally)."""
+    search = search.strip().replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return {'pattern': search + '%'}
+
+
+def count_quotes(path, search=""):
+    """Number of saved quotes (matching the search text, if given)."""
+    query = "SELECT COUNT(*) FROM quotes"
+    if search.strip():
+        query += SEARCH_FILTER
+    with connect(path) as connection:
+        count = connection.execute(query, search_parameters(search)).fetchone()[0]
+    connection.close()
+    return count
+
+
+def list_quotes(path, limit, offset=0, search=""):
+    """
+    One page of saved quotes, most recent first (matching the search text, if given).
+    Returns summary dicts (id, timestamp, client_company, total_quote,
+    total_units, product_names) without loading the full orders.
+    """
+    query = "SELECT id, created_at, client_company, total_quote, total_units, product_names FROM quotes"
+    if search.strip():
+        query += SEARCH_FILTER
+    query += " ORDER BY created_at DESC, id DESC LIMIT :limit OFFSET :offset"
+
+    parameters = search_parameters(search)
+    parameters.update({'limit': limit, 'offset': offset})
+    with connect(path) as connection:
+        rows = connection.execute(query, parameters).fetchall()
+    connection.close()
+
+    return [
+        {
+            'id': quote_id,
+            'timestamp': datetime.fromisoformat(created_at),
+            'client_company': client_company,
+            'total_quote': total_quote,
+            'total_units': total_units,
+            'product_names': json.loads(product_names)
+        }
+        for quote_id, created_at, client_company, total_quote, total_units, product_names in rows
+    ]
+
+
+def load_quote(path, quote_id):
+    """The full saved quote (same fields as when it was saved), or None if it was deleted."""
+    with connect(path) as connection:
+        row = connection.execute(
+            "SELECT created_at, order_data FROM quotes WHERE id = ?", (quote_id,)
+        ).fetchone()
+    connection.close()
+    if row is None:
+        return None
+
+    quote = json.loads(row[1])
+    quote['timestamp'] = datetime.fromisoformat(row[0])
+    for item in quote['order_items']:
+        if 'product_key' in item:
+            item['product_key'] = tuple(item['product_key'])  # JSON stores tuples as lists
+    return quote
+
+
+def delete_quote(path, quote_id):
+    """Delete a saved quote (its products are deleted with it)."""
+    with connect(path) as connection:
+        connection.execute("DELETE FROM quotes WHERE id = ?", (quote_id,))
+    connection.close()
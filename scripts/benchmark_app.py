@@ -0,0 +1,251 @@
+"""
+End-to-end rerun benchmark for the Streamlit app (no browser, no network).
+Drives app.py with Streamlit's AppTest through typical quoting sessions and
+reports how long each rerun takes and how much memory it allocates, for
+several order sizes - so the cost of the UI can be watched as orders grow.
+
+The catalog is a synthetic one (see generate_catalog.py), loaded through the
+offline catalog source (PBP_PRICING_DATA_FILE), so Google Sheets is never called.
+Saved quotes go to a temporary database (PBP_QUOTE_STORE), not saved_quotes.db.
+
+Each session, for every order size:
+    add N items          - pick a partner, then click "Add to Order" (N times)
+    edit quantity        - change input_quantity with the full order below it
+    edit tariff          - change the first item's tariff rate
+    toggle discount      - switch between no discount and the preset discount
+    open invoice tab     - select "10. Invoice" (only the open tab is generated)
+    download invoice     - click "Download Complete Invoice (CSV)"
+    build invoice CSV    - write the invoice file (what the download click runs)
+
+Times are wall time per rerun. Memory is the peak traced by tracemalloc
+during the rerun, above what was allocated before it (tracemalloc slows
+Python down, so use --no-memory for times closer to the real app).
+
+Needs Streamlit 1.59 or newer (for AppTest's download_button); the app itself runs on 1.55.
+
+Usage:
+    python scripts/benchmark_app.py
+    python scripts/benchmark_app.py --order-sizes 1 10 30 60 --products 10000
+    python scripts/benchmark_app.py --json app_benchmark.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from unittest.mock import patch
+
+# Make the app modules (in the project root) importable when run as a script
+APP_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(APP_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import streamlit
+from streamlit.runtime.media_file_manager import MediaFileManager
+from streamlit.testing.v1 import AppTest
+import streamlit.testing.v1.app_test as app_test_module
+
+from generate_catalog import write_catalog
+
+APP_FILE = APP_DIR / "app.py"
+LOCAL_DATA_ENV_VAR = "PBP_PRICING_DATA_FILE"  # Same as app.py
+QUOTE_STORE_ENV_VAR = "PBP_QUOTE_STORE"  # Same as app.py
+DEFAULT_ORDER_SIZES = [1, 10, 30]
+DEFAULT_PRODUCTS = 1000
+DEFAULT_PARTNERS = 20
+REPEATS = 3  # Times each interaction is repeated at each order size
+RUN_TIMEOUT = 120  # Seconds allowed for one rerun
+QUANTITIES = [25, 60, 150, 300]  # Quantities used for the added items
+TARIFF_RATES = [12.5, 25.0]  # Tariff rates the "edit tariff" step switches between
+INVOICE_TAB = "10. Invoice"
+MIN_STREAMLIT_VERSION = (1, 59)  # AppTest.download_button (the app itself needs 1.55)
+
+
+class RecordingMediaFileManager(MediaFileManager):
+    """AppTest's media file manager, remembered so deferred downloads can be run."""
+
+    latest = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        RecordingMediaFileManager.latest = self
+
+
+class SessionBenchmark:
+    """One AppTest session of app.py, timing every rerun."""
+
+    def __init__(self, measure_memory):
+        self.app = AppTest.from_file(str(APP_FILE), default_timeout=RUN_TIMEOUT)
+        self.measure_memory = measure_memory
+        self.results = []
+
+    def measure(self, step, order_size, action):
+        """Run action() (a rerun or a download) and record its wall time and peak memory."""
+        if self.measure_memory:
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+        start = time.perf_counter()
+        action()
+        seconds = time.perf_counter() - start
+        peak_bytes = 0
+        if self.measure_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            peak_bytes = max(0, peak - before)
+
+        if self.app.exception:
+            raise RuntimeError(f"{step}: app raised {self.app.exception[0].value}")
+        self.results.append({'step': step, 'order_size': order_size, 'seconds': seconds, 'peak_bytes': peak_bytes})
+
+    def rerun(self, step, order_size, widget=None):
+        """Rerun the app (after changing a widget, if given)."""
+        self.measure(step, order_size, (widget or self.app).run)
+
+    def button(self, label):
+        return next(button for button in self.app.button if button.label == label)
+
+    def selectbox(self, label):
+        return next(selectbox for selectbox in self.app.selectbox if selectbox.label == label)
+
+    def download_button(self, label):
+        return next(button for button in self.app.download_button if button.label == label)
+
+    def order_size(self):
+        return len(self.app.session_state['order_items'])
+
+    def add_items(self, count):
+        """Add count catalog items, cycling through the partners."""
+        partners = self.selectbox("Select Partner").options
+        for _ in range(count):
+            size = self.order_size()
+            partner = partners[size % len(partners)]
+            if self.selectbox("Select Partner").value != partner:
+                self.rerun("select partner", size, self.selectbox("Select Partner").set_value(partner))
+            self.app.number_input(key="input_quantity").set_value(QUANTITIES[size % len(QUANTITIES)])
+            self.rerun("add item", size + 1, self.button("Add to Order").click())
+
+    def interact(self, repeat):
+        """One round of the typical edits on the current order."""
+        size = self.order_size()
+        quantity = self.app.number_input(key="input_quantity")
+        self.rerun("edit quantity", size, quantity.set_value(quantity.value + 1))
+
+        tariff = self.app.number_input(key="tariff_rate_0")
+        self.rerun("edit tariff", size, tariff.set_value(TARIFF_RATES[repeat % len(TARIFF_RATES)]))
+
+        discount = self.app.radio(key="discount_type_radio")
+        self.rerun("toggle discount", size, discount.set_value("preset" if discount.value == "none" else "none"))
+
+    def download_invoice(self):
+        """Open the invoice tab, click the download and build the file like the browser would."""
+        size = self.order_size()
+        # AppTest doesn't keep the selected tab between runs (the next run is back on
+        # the first tab, like the other steps expect), so select it for each run
+        self.app.session_state['deliverables_tabs'] = INVOICE_TAB
+        self.rerun("open invoice tab", size)
+        self.app.session_state['deliverables_tabs'] = INVOICE_TAB
+        self.rerun("download invoice", size, self.download_button("Download Complete Invoice (CSV)").click())
+
+        file_id = self.download_button("Download Complete Invoice (CSV)").proto.deferred_file_id
+        self.measure("build invoice CSV", size,
+                     lambda: RecordingMediaFileManager.latest.execute_deferred(file_id))
+
+
+def run_session(order_size, measure_memory):
+    """A full session: first page load, add order_size items, then edit and download."""
+    session = SessionBenchmark(measure_memory)
+    session.rerun("first load", 0)
+    session.add_items(order_size)
+    for repeat in range(REPEATS):
+        session.interact(repeat)
+        session.download_invoice()
+    return session.results
+
+
+def summarize(results):
+    """Group rerun results by (order size, step): count, median/max time, median peak memory."""
+    groups = {}
+    for result in results:
+        groups.setdefault((result['order_size'], result['step']), []).append(result)
+
+    summary = []
+    for (order_size, step), group in groups.items():
+        times = [result['seconds'] for result in group]
+        summary.append({
+            'order_size': order_size,
+            'step': step,
+            'runs': len(group),
+            'median_ms': statistics.median(times) * 1000,
+            'max_ms': max(times) * 1000,
+            'peak_kib': statistics.median(result['peak_bytes'] for result in group) / 1024
+        })
+    return summary
+
+
+def print_summary(session_summaries, measure_memory):
+    """One table per session (order size)."""
+    for session_size, summary in session_summaries.items():
+        print(f"\nSession with {session_size} item(s)")
+        print(f"{'step':<20} {'items':>6} {'runs':>5} {'median':>10} {'max':>10}" + (f" {'peak mem':>10}" if measure_memory else ""))
+        for row in summary:
+            steps = [other for other in summary if other['step'] == row['step']]
+            if row is not steps[0] and row is not steps[-1]:
+                continue  # Only the first and last add / partner pick, to keep the table short
+            line = (f"{row['step']:<20} {row['order_size']:>6} {row['runs']:>5} "
+                    f"{row['median_ms']:>8.1f}ms {row['max_ms']:>8.1f}ms")
+            if measure_memory:
+                line += f" {row['peak_kib'] / 1024:>8.1f}MiB"
+            print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark app.py reruns with Streamlit's AppTest.")
+    parser.add_argument('--order-sizes', type=int, nargs='+', default=DEFAULT_ORDER_SIZES,
+                        help="Order sizes in items, one session each (default: 1 10 30)")
+    parser.add_argument('--products', type=int, default=DEFAULT_PRODUCTS,
+                        help="Synthetic catalog size (default: 1000)")
+    parser.add_argument('--partners', type=int, default=DEFAULT_PARTNERS,
+                        help="Partners in the synthetic catalog (default: 20)")
+    parser.add_argument('--no-memory', action='store_true', help="Skip tracemalloc (faster, times only)")
+    parser.add_argument('--json', help="Also write every rerun's results to this JSON file")
+    args = parser.parse_args()
+    measure_memory = not args.no_memory
+
+    if tuple(int(part) for part in streamlit.__version__.split(".")[:2]) < MIN_STREAMLIT_VERSION:
+        sys.exit(f"This benchmark needs Streamlit 1.59 or newer (installed: {streamlit.__version__}). "
+                 f"Run: pip install -U \"streamlit>=1.59\"")
+
+    with tempfile.TemporaryDirectory() as directory:
+        catalog_path = Path(directory) / "catalog"
+        write_catalog(catalog_path, args.products, args.partners)
+        os.environ[LOCAL_DATA_ENV_VAR] = str(catalog_path)
+        os.environ[QUOTE_STORE_ENV_VAR] = str(Path(directory) / "saved_quotes.db")  # Never touch the real saved quotes
+
+        if measure_memory:
+            tracemalloc.start()
+
+        session_summaries = {}
+        all_results = []
+        with patch.object(app_test_module, "MediaFileManager", RecordingMediaFileManager):
+            for order_size in args.order_sizes:
+                start = time.perf_counter()
+                results = run_session(order_size, measure_memory)
+                print(f"Session with {order_size} item(s): {len(results)} reruns in "
+                      f"{time.perf_counter() - start:.1f}s", file=sys.stderr)
+                session_summaries[order_size] = summarize(results)
+                all_results.extend({'session_items': order_size, **result} for result in results)
+
+    print(f"Catalog: {args.products} synthetic products from {args.partners} partners")
+    print_summary(session_summaries, measure_memory)
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(all_results, indent=2) + "\n")
+        print(f"\nAll reruns written to {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,301 @@
+"""
+Benchmarks for the pricing hot path (no Streamlit, no network).
+Times the pricing functions in pricing.py on synthetic catalogs (see
+generate_catalog.py) of several sizes and on orders of several sizes, and
+compares the results with a saved baseline.
+
+Benchmarks labelled [catalog=N] depend on the catalog size (loading, compiling
+and indexing it, and price lookups on rows sampled across all of it). Per-row
+parsing (clean_price, tier parsing, additional costs) doesn't, so it runs once,
+on rows sampled across the smallest catalog. [items=N] is the order size.
+
+Each benchmark reports the time per operation of its fastest timed run
+(runs are sized with timeit's autorange; the fastest run is the least
+disturbed by other work on the machine).
+
+Timings on a shared machine still vary between runs, so the baseline records
+each benchmark's noise too: --save-baseline times everything BASELINE_ROUNDS
+times and stores the median and the spread between rounds. A benchmark is a
+regression when it is more than --threshold plus its own noise slower than
+the baseline, and still is when timed again (CONFIRM_RUNS more times). The
+script then exits with 1, so it can run in CI or before merging a change.
+Baselines are machine-specific: save one on the machine that runs the comparison.
+
+Usage:
+    python scripts/benchmark_pricing.py                      (compare with scripts/benchmark_baseline.json)
+    python scripts/benchmark_pricing.py --save-baseline      (record a new baseline)
+    python scripts/benchmark_pricing.py --catalog-sizes 1000 100000 --order-sizes 5 30 100
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+import timeit
+from pathlib import Path
+
+# Make the app modules (in the project root) importable when run as a script
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from catalog_source import LocalFileSource, load_catalog_frames
+from generate_catalog import write_catalog
+from pricing import (
+    build_catalog_index,
+    calculate_additional_costs,
+    calculate_order_moq,
+    calculate_order_totals,
+    calculate_product_totals,
+    clean_price,
+    compile_pricing_table,
+    determine_tier_number,
+    get_unit_price,
+    get_unit_price_new_system,
+    parse_tariff_rate,
+    parse_tier_info
+)
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "benchmark_baseline.json"
+DEFAULT_CATALOG_SIZES = [1000, 10000]
+DEFAULT_ORDER_SIZES = [5, 30, 100]
+DEFAULT_THRESHOLD = 0.25  # Fail when a benchmark is more than 25% (plus its noise) slower than its baseline
+REPEATS = 7  # Timed runs per benchmark (the fastest is reported)
+BASELINE_ROUNDS = 3  # Times the whole suite is timed when saving a baseline (median and noise)
+CONFIRM_RUNS = 2  # Extra timings of a benchmark that looks slower, before calling it a regression
+QUANTITIES = [1, 10, 25, 30, 60, 150, 300, 700, 2000]  # Quantities priced in each batch
+SAMPLE_ROWS = 200  # Catalog rows used per batch (spread evenly across the catalog)
+PARTNERS_PER_1000_PRODUCTS = 20
+
+
+def load_synthetic_catalog(num_products, directory):
+    """
+    Generate a catalog with generate_catalog.py and load it like the app does.
+    Returns (catalog source, df_template).
+    """
+    num_partners = max(1, num_products * PARTNERS_PER_1000_PRODUCTS // 1000)
+    path = Path(directory) / f"catalog_{num_products}"
+    if not path.exists():
+        write_catalog(path, num_products, num_partners)
+    source = LocalFileSource(path)
+    df_template, _, _ = load_catalog_frames(source)
+    return source, df_template
+
+
+def sample_rows(df_template):
+    """SAMPLE_ROWS catalog rows (dicts) spread evenly across the whole catalog."""
+    rows = list(build_catalog_index(df_template)['rows_by_key'].values())
+    step = max(1, len(rows) // SAMPLE_ROWS)
+    return rows[::step][:SAMPLE_ROWS]
+
+
+def build_order(pricing_table, rows, num_items):
+    """Order items (like app.py's order_items) for num_items catalog rows."""
+    items = []
+    for i in range(num_items):
+        row = rows[i % len(rows)]
+        quantity = QUANTITIES[i % len(QUANTITIES)]
+        base_price, _, _ = get_unit_price(pricing_table, row, quantity)
+        totals = calculate_product_totals(base_price or 0.0, quantity, 100.0,
+                                          tariff_rate_percent=parse_tariff_rate(row['Tariff Estimate (if available)']))
+        items.append({'quantity': quantity, **totals})
+    return items
+
+
+def catalog_benchmarks(source, df_template):
+    """Benchmarks that depend on catalog size: (name, function, operations per call)."""
+    num_products = len(df_template)
+    pricing_table = compile_pricing_table(df_template)
+    pairs = [(row, quantity) for row in sample_rows(df_template) for quantity in QUANTITIES]
+
+    def unit_price_compiled():
+        for row, quantity in pairs:
+            get_unit_price(pricing_table, row, quantity)
+
+    def unit_price_uncompiled():
+        for row, quantity in pairs:
+            get_unit_price_new_system(row, quantity)
+
+    def order_moq():
+        for row, quantity in pairs:
+            calculate_order_moq(pricing_table, row, quantity, 100.0, 50.0, 2.0)
+
+    return [
+        ("load_catalog_frames", lambda: load_catalog_frames(source), num_products),
+        ("compile_pricing_table", lambda: compile_pricing_table(df_template), num_products),
+        ("build_catalog_index", lambda: build_catalog_index(df_template), num_products),
+        ("get_unit_price", unit_price_compiled, len(pairs)),
+        ("get_unit_price_new_system", unit_price_uncompiled, len(pairs)),
+        ("calculate_order_moq", order_moq, len(pairs)),
+    ]
+
+
+def row_benchmarks(rows):
+    """Per-row parsing benchmarks (independent of catalog size): (name, function, operations per call)."""
+    pairs = [(row, quantity) for row in rows for quantity in QUANTITIES]
+    tier_strings = [row['Pricing Tiers Info'] for row in rows]
+    tier_flags = [row['Pricing Tiers (Y/N)'] for row in rows]
+    price_texts = [f"${(i * 7.31) % 2500:,.2f}" for i in range(len(pairs))]
+
+    def tier_number():
+        for tier_string, has_tiers in zip(tier_strings, tier_flags):
+            for quantity in QUANTITIES:
+                determine_tier_number(quantity, tier_string, has_tiers)
+
+    def tier_info():
+        for tier_string in tier_strings:
+            parse_tier_info(tier_string)
+
+    def price_text():
+        for text in price_texts:
+            clean_price(text)
+
+    def additional_costs():
+        for row, quantity in pairs:
+            calculate_additional_costs(row, quantity, include_labels=True)
+
+    return [
+        ("determine_tier_number", tier_number, len(tier_strings) * len(QUANTITIES)),
+        ("parse_tier_info", tier_info, len(tier_strings)),
+        ("clean_price", price_text, len(price_texts)),
+        ("calculate_additional_costs", additional_costs, len(pairs)),
+    ]
+
+
+def order_benchmarks(pricing_table, rows, num_items):
+    """Benchmarks that depend on order size: (name, function, operations per call)."""
+    order_items = build_order(pricing_table, rows, num_items)
+    return [
+        ("calculate_order_totals", lambda: calculate_order_totals(order_items, 40.0, 5.0, True, 2.9, True), 1),
+    ]
+
+
+def collect_benchmarks(catalog_sizes, order_sizes, directory):
+    """Every benchmark to time: {benchmark name: (function, operations per call)}."""
+    benchmarks = {}
+    for num_products in catalog_sizes:
+        load_start = time.perf_counter()
+        source, df_template = load_synthetic_catalog(num_products, directory)
+        print(f"Catalog with {num_products} products ready in {time.perf_counter() - load_start:.1f}s",
+              file=sys.stderr)
+        for name, function, operations in catalog_benchmarks(source, df_template):
+            benchmarks[f"{name}[catalog={num_products}]"] = (function, operations)
+
+    # Per-row and order-size benchmarks use the smallest catalog
+    _, df_template = load_synthetic_catalog(min(catalog_sizes), directory)
+    rows = sample_rows(df_template)
+    for name, function, operations in row_benchmarks(rows):
+        benchmarks[name] = (function, operations)
+
+    pricing_table = compile_pricing_table(df_template)
+    for num_items in order_sizes:
+        for name, function, operations in order_benchmarks(pricing_table, rows, num_items):
+            benchmarks[f"{name}[items={num_items}]"] = (function, operations)
+    return benchmarks
+
+
+def time_benchmark(function, operations):
+    """Seconds per operation in the fastest of REPEATS timed runs."""
+    timer = timeit.Timer(function)
+    loops, _ = timer.autorange()
+    runs = timer.repeat(repeat=REPEATS, number=loops)
+    return min(runs) / (loops * operations)
+
+
+def time_all(benchmarks):
+    """Time every benchmark once. Returns {benchmark name: seconds per operation}."""
+    return {name: time_benchmark(function, operations) for name, (function, operations) in benchmarks.items()}
+
+
+def record_baseline(benchmarks):
+    """
+    Time the suite BASELINE_ROUNDS times.
+    Returns {benchmark name: {'seconds': median, 'noise': (slowest - fastest) / median}}.
+    """
+    rounds = []
+    for round_number in range(1, BASELINE_ROUNDS + 1):
+        print(f"Baseline round {round_number} of {BASELINE_ROUNDS}", file=sys.stderr)
+        rounds.append(time_all(benchmarks))
+
+    baseline = {}
+    for name in benchmarks:
+        timings = [results[name] for results in rounds]
+        median = statistics.median(timings)
+        baseline[name] = {'seconds': median, 'noise': (max(timings) - min(timings)) / median}
+    return baseline
+
+
+def format_time(seconds):
+    """Human-friendly time per operation (ns / µs / ms)."""
+    if seconds < 1e-6:
+        return f"{seconds * 1e9:.0f} ns"
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.2f} µs"
+    return f"{seconds * 1e3:.2f} ms"
+
+
+def compare(benchmarks, results, baseline, threshold):
+    """
+    Print results next to the baseline. A benchmark slower than the baseline by more
+    than threshold + its noise is timed again (CONFIRM_RUNS times) and only counts as
+    a regression if every timing is too slow. Returns the names of regressed benchmarks.
+    """
+    regressions = []
+    print(f"{'benchmark':<44} {'per op':>11} {'baseline':>11} {'change':>8} {'allowed':>8}")
+    for name, seconds in results.items():
+        if name not in baseline:
+            print(f"{name:<44} {format_time(seconds):>11} {'(new)':>11}")
+            continue
+
+        expected = baseline[name]['seconds']
+        allowed = threshold + baseline[name]['noise']
+        for _ in range(CONFIRM_RUNS):
+            if seconds / expected - 1 <= allowed:
+                break
+            # Looks slower: time it again and keep the best result, so one noisy run can't fail the check
+            seconds = min(seconds, time_benchmark(*benchmarks[name]))
+        change = seconds / expected - 1
+
+        line = f"{name:<44} {format_time(seconds):>11} {format_time(expected):>11} {change:>+7.0%} {allowed:>+7.0%}"
+        if change > allowed:
+            line += "  REGRESSION"
+            regressions.append(name)
+        print(line)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the pricing hot path and check for regressions.")
+    parser.add_argument('--catalog-sizes', type=int, nargs='+', default=DEFAULT_CATALOG_SIZES,
+                        help="Catalog sizes in products (default: 1000 10000)")
+    parser.add_argument('--order-sizes', type=int, nargs='+', default=DEFAULT_ORDER_SIZES,
+                        help="Order sizes in items (default: 5 30 100)")
+    parser.add_argument('--baseline', default=str(DEFAULT_BASELINE), help="Baseline JSON file")
+    parser.add_argument('--save-baseline', action='store_true', help="Save these results as the new baseline")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed slowdown on top of each benchmark's noise (default: 0.25 = 25%%)")
+    args = parser.parse_args()
+
+    baseline_path = Path(args.baseline)
+    baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+
+    with tempfile.TemporaryDirectory() as directory:
+        benchmarks = collect_benchmarks(args.catalog_sizes, args.order_sizes, directory)
+
+        if args.save_baseline:
+            baseline.update(record_baseline(benchmarks))
+            baseline_path.write_text(json.dumps(baseline, indent=2, sort_keys=True) + "\n")
+            print(f"Baseline saved to {baseline_path}")
+            return
+
+        results = time_all(benchmarks)
+        regressions = compare(benchmarks, results, baseline, args.threshold)
+
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) slower than the baseline by more than the allowed change")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
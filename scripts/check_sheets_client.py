@@ -0,0 +1,253 @@
+"""
+Check the Google Sheets HTTP client (sheets_client.py) against a local stub server.
+No Google account or network needed: a small http.server on 127.0.0.1 answers
+with the errors Google returns (429 quota, 503, 403 usageLimits, 404, slow
+responses), and each check asserts how many requests were made and how long
+the client waited between them.
+
+Checks:
+    429 with Retry-After, then 200  - retried, waits at least Retry-After
+    503 (HTML body), then 200       - retried with jittered exponential backoff
+    403 usageLimits / 403 other     - quota 403 retried, permission 403 not
+    404                             - not retried
+    429 forever                     - gives up after MAX_RETRIES
+    read timeout, then 200          - retried
+    12 parallel requests            - never more than MAX_CONCURRENT_REQUESTS in flight
+
+Usage:
+    python scripts/check_sheets_client.py
+"""
+
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from types import SimpleNamespace
+
+import requests
+from gspread.exceptions import APIError
+
+# Make sheets_client.py (in the project root) importable when run as a script
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import sheets_client
+
+PARALLEL_REQUESTS = 12
+SLOW_RESPONSE_SECONDS = 0.2  # How long the stub takes to answer in the timeout and concurrency checks
+
+
+class StubState:
+    """What the stub server answers next, and what it has seen."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.responses = []  # (status, headers, body) for the next requests; then 200
+        self.delay_seconds = 0  # Wait before answering
+        self.slow_requests = None  # How many requests wait (None = all)
+        self.hits = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def reset(self, responses=(), delay_seconds=0, slow_requests=None):
+        with self.lock:
+            self.responses = list(responses)
+            self.delay_seconds = delay_seconds
+            self.slow_requests = slow_requests
+            self.hits = 0
+            self.in_flight = 0
+            self.max_in_flight = 0
+
+
+STUB = StubState()
+
+
+def google_error(status, reason="", domain=""):
+    """A Google API style JSON error response: (status, headers, body)."""
+    body = {'error': {'code': status, 'message': reason, 'errors': [{'domain': domain, 'reason': reason}]}}
+    return status, {'Content-Type': 'application/json'}, json.dumps(body)
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, like Google
+
+    def log_message(self, *args):
+        pass  # Quiet
+
+    def do_GET(self):
+        with STUB.lock:
+            STUB.hits += 1
+            STUB.in_flight += 1
+            STUB.max_in_flight = max(STUB.max_in_flight, STUB.in_flight)
+            status, headers, body = STUB.responses.pop(0) if STUB.responses else (200, {}, '{"ok": true}')
+            slow = STUB.slow_requests is None or STUB.hits <= STUB.slow_requests
+            delay_seconds = STUB.delay_seconds if slow else 0
+        try:
+            time.sleep(delay_seconds)
+            data = body.encode()
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The client gave up (timeout check)
+        finally:
+            with STUB.lock:
+                STUB.in_flight -= 1
+
+
+class RecordedWaits:
+    """Stands in for the time module in sheets_client: records backoff waits instead of sleeping."""
+
+    def __init__(self):
+        self.waits = []
+
+    def sleep(self, seconds):
+        self.waits.append(seconds)
+
+
+def new_client():
+    """A RetryingHTTPClient without Google auth (plain requests session), with waits recorded."""
+    waits = RecordedWaits()
+    sheets_client.time = SimpleNamespace(sleep=waits.sleep)
+    return sheets_client.RetryingHTTPClient(None, session=requests.Session()), waits
+
+
+def max_backoff(attempt):
+    """Longest jittered wait allowed before retry attempt + 1."""
+    return min(sheets_client.BACKOFF_MAX_SECONDS, sheets_client.BACKOFF_BASE_SECONDS * 2 ** attempt)
+
+
+def check_retry_after(url):
+    STUB.reset([(429, {'Retry-After': '3'}, '{"error": {"code": 429, "message": "quota"}}')])
+    client, waits = new_client()
+    assert client.request('get', url).json() == {'ok': True}
+    assert STUB.hits == 2, f"expected 2 requests, got {STUB.hits}"
+    assert waits.waits[0] >= 3, f"waited {waits.waits[0]:.2f}s, less than Retry-After (3s)"
+
+
+def check_server_error_backoff(url):
+    failures = 4
+    STUB.reset([(503, {'Content-Type': 'text/html'}, '<html>Service Unavailable</html>')] * failures)
+    client, waits = new_client()
+    assert client.request('get', url).json() == {'ok': True}
+    assert STUB.hits == failures + 1, f"expected {failures + 1} requests, got {STUB.hits}"
+    assert len(waits.waits) == failures
+    for attempt, wait in enumerate(waits.waits):
+        assert 0 <= wait <= max_backoff(attempt), f"wait {attempt + 1} was {wait:.2f}s (max {max_backoff(attempt)}s)"
+
+
+def check_forbidden(url):
+    STUB.reset([google_error(403, "userRateLimitExceeded", "usageLimits")])
+    client, _ = new_client()
+    assert client.request('get', url).json() == {'ok': True}
+    assert STUB.hits == 2, f"quota 403: expected 2 requests, got {STUB.hits}"
+
+    STUB.reset([google_error(403, "forbidden", "global")])
+    client, _ = new_client()
+    try:
+        client.request('get', url)
+        raise AssertionError("permission 403 should raise APIError")
+    except APIError:
+        pass
+    assert STUB.hits == 1, f"permission 403: expected 1 request, got {STUB.hits}"
+
+
+def check_not_found(url):
+    STUB.reset([google_error(404, "notFound")])
+    client, waits = new_client()
+    try:
+        client.request('get', url)
+        raise AssertionError("404 should raise APIError")
+    except APIError:
+        pass
+    assert STUB.hits == 1 and not waits.waits, f"404: expected 1 request and no waits, got {STUB.hits}"
+
+
+def check_gives_up(url):
+    attempts = sheets_client.MAX_RETRIES + 1
+    STUB.reset([google_error(429, "rateLimitExceeded")] * (attempts + 5))
+    client, waits = new_client()
+    try:
+        client.request('get', url)
+        raise AssertionError("should give up and raise APIError")
+    except APIError:
+        pass
+    assert STUB.hits == attempts, f"expected {attempts} requests, got {STUB.hits}"
+    assert len(waits.waits) == sheets_client.MAX_RETRIES
+
+
+def check_timeout(url):
+    original_timeout = sheets_client.REQUEST_TIMEOUT
+    sheets_client.REQUEST_TIMEOUT = (1, SLOW_RESPONSE_SECONDS / 2)
+    try:
+        # The first answer is slower than the read timeout, the retry is answered right away
+        STUB.reset(delay_seconds=SLOW_RESPONSE_SECONDS, slow_requests=1)
+        client, waits = new_client()
+        assert client.request('get', url).json() == {'ok': True}
+        assert STUB.hits == 2, f"expected 2 requests, got {STUB.hits}"
+        assert len(waits.waits) == 1 and waits.waits[0] <= max_backoff(0)
+    finally:
+        sheets_client.REQUEST_TIMEOUT = original_timeout
+
+
+def check_concurrency_limit(url):
+    STUB.reset(delay_seconds=SLOW_RESPONSE_SECONDS)
+    client, _ = new_client()
+    threads = [threading.Thread(target=client.request, args=('get', url)) for _ in range(PARALLEL_REQUESTS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert STUB.hits == PARALLEL_REQUESTS
+    limit = sheets_client.MAX_CONCURRENT_REQUESTS
+    assert STUB.max_in_flight == limit, f"{STUB.max_in_flight} requests in flight at once (limit {limit})"
+
+
+CHECKS = [
+    ("429 with Retry-After, then 200", check_retry_after),
+    ("503 with jittered backoff, then 200", check_server_error_backoff),
+    ("403 usageLimits retried, other 403 not", check_forbidden),
+    ("404 not retried", check_not_found),
+    ("gives up after MAX_RETRIES", check_gives_up),
+    ("read timeout retried", check_timeout),
+    ("concurrency limit", check_concurrency_limit),
+]
+
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/v4/spreadsheets/stub/values:batchGet"
+
+    print("=" * 80)
+    print("Checking sheets_client.py against a local stub server...")
+    print("=" * 80)
+
+    failures = 0
+    original_time = sheets_client.time
+    for name, check in CHECKS:
+        try:
+            check(url)
+            print(f"✓ {name}")
+        except AssertionError as e:
+            failures += 1
+            print(f"✗ {name}: {e}")
+        except Exception as e:
+            failures += 1
+            print(f"✗ {name}: {type(e).__name__}: {e}")
+        finally:
+            sheets_client.time = original_time
+    server.shutdown()
+
+    if failures:
+        print(f"\n✗ {failures} check(s) failed")
+        sys.exit(1)
+    print("\n✓✓✓ ALL CHECKS PASSED! ✓✓✓")
+
+
+if __name__ == '__main__':
+    main()
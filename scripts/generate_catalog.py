@@ -0,0 +1,215 @@
+"""
+Synthetic pricing catalog generator (for scale testing).
+Writes a realistic Template / Metadata / Partner-Specific Info catalog with
+any number of partners and products, in the same layout and text format as
+the Google Sheet ('$1,234.00' prices, '50.00%' tariffs, 'T1: 1-25, ...' tiers).
+
+The output loads with the local catalog source (see catalog_source.py):
+    a folder of per-sheet CSV files (fast, fine for 1M products), or an .xlsx workbook.
+
+Usage:
+    python scripts/generate_catalog.py --products 10000 --partners 200 --output catalogs/10k
+    python scripts/generate_catalog.py --products 5000 --output catalogs/5k.xlsx
+    PBP_PRICING_DATA_FILE=catalogs/10k streamlit run app.py
+"""
+
+import argparse
+import csv
+import random
+import sys
+import time
+from pathlib import Path
+
+# Make catalog_source.py (in the project root) importable when run as a script
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from catalog_source import SHEET_LAYOUTS, TEMPLATE_FILE_LAYOUTS
+
+TEMPLATE_HEADERS = [
+    'Partner', 'Product/Service', 'Purchase Description', 'Pricing Tiers (Y/N)', 'Pricing Tiers Info',
+    'PBP Cost (No Tiers)', 'PBP Cost: Tier 1', 'PBP Cost: Tier 2', 'PBP Cost: Tier 3', 'PBP Cost: Tier 4',
+    'PBP Cost: Tier 5', 'PBP Cost: Tier 6', 'Customization Setup Fee', 'Customization Cost per Unit',
+    'Customization Info', 'Country of Origin', 'Marketing Description', 'Shipping',
+    'Tariff Estimate (if available)', 'Tariff Info', 'Partner MSRP'
+]
+PARTNER_INFO_HEADERS = ['Partner', 'Pricing Tiers Info', 'Customization Info', 'Tariffs Info', 'Other Info']
+
+# Tier structures seen in partner price lists (the last one has gaps between case-pack sizes)
+TIER_STRUCTURES = [
+    'T1: 1-25, T2: 26-50, T3: 51-100, T4: 101-250, T5: 251-500, T6: 501-1000',
+    'T1: 1-99, T2: 100-499, T3: 500+',
+    'T1: 1-49, T2: 50-199, T3: 200-999, T4: 1000+',
+    'T1: 1-250, T2: 251-1000',
+    'T1: 1-10, T2: 11-50, T3: 51-100, T4: 101-500, T5: 501+',
+    'T1: 12-24, T2: 48-96, T3: 144-288',
+]
+TIERED_SHARE = 0.75  # Share of products with pricing tiers
+CUSTOMIZATION_SHARE = 0.5  # Share of products with customization costs
+MSRP_SHARE = 0.3  # Share of products with a Partner MSRP
+
+PRODUCT_TYPES = [
+    'Tote Bag', 'Mug', 'Scarf', 'Basket', 'Candle', 'Notebook', 'Soap Bar', 'Coaster Set', 'Pouch',
+    'Bracelet', 'Necklace', 'Blanket', 'Pillow Cover', 'Honey Jar', 'Coffee (12oz)', 'Chocolate Bar',
+    'Keychain', 'Ornament', 'Tea Towel', 'Planter', 'Greeting Card Set', 'Laptop Sleeve', 'Water Bottle'
+]
+PRODUCT_STYLES = ['Classic', 'Indigo', 'Natural', 'Deluxe', 'Mini', 'Woven', 'Embroidered', 'Recycled', 'Organic']
+PARTNER_WORDS = ['Hope', 'Harvest', 'Thread', 'River', 'Sunrise', 'Village', 'Stone', 'Loom', 'Garden', 'Bridge']
+PARTNER_SUFFIXES = ['Collective', 'Cooperative', 'Project', 'Artisans', 'Works', 'Studio', 'Trading']
+COUNTRIES = ['India', 'Guatemala', 'Kenya', 'Nepal', 'Peru', 'Uganda', 'Cambodia', 'USA', 'Mexico', 'Rwanda']
+TARIFF_FORMATS = ['{:.2f}%', '{:g}%', 'NA', '']
+
+METADATA_ROWS = [
+    ['', 'Deliverable', '', 'Data Source'],
+    ['', 'Invoice / Invoice Details Sheet', '', 'Spreadsheet', 'App Input', 'App Calculation'],
+    ['', 'Product/Service', '', 'X'],
+    ['', 'Purchase Description', '', 'X'],
+    ['', 'Unit Cost (actual sale price)', 'Pricing Tiers', 'X', 'X', 'X'],
+    ['', 'Customization Costs', '', 'X'],
+    ['', 'Shipping (to client)', '', '', 'X'],
+]
+TITLE_ROWS = {
+    "Template": ['Peace by Piece International', 'Partner Product Purchasing List', 'Updated MM/DD/YY'],
+    "Metadata": ['Data to Collect For Each Deliverable'],
+    "Partner-Specific Info": ['Partner-Specific Information'],
+}
+
+
+def money(value):
+    """Format a price like the sheet does ('$1,234.00')."""
+    return f"${value:,.2f}"
+
+
+def partner_names(num_partners):
+    """Unique, readable partner names ('Hope Loom Collective', ..., 'Hope Loom Collective 2')."""
+    names = []
+    for i in range(num_partners):
+        word_a = PARTNER_WORDS[i % len(PARTNER_WORDS)]
+        word_b = PARTNER_WORDS[(i // len(PARTNER_WORDS)) % len(PARTNER_WORDS)]
+        suffix = PARTNER_SUFFIXES[i % len(PARTNER_SUFFIXES)]
+        repeat = i // (len(PARTNER_WORDS) ** 2)
+        names.append(f"{word_a} {word_b} {suffix}" + (f" {repeat + 1}" if repeat else ""))
+    return names
+
+
+def generate_product_row(rng, partner, product_number):
+    """One Template row (list of cell text, in TEMPLATE_HEADERS order)."""
+    product_type = rng.choice(PRODUCT_TYPES)
+    product = f"{product_type} - {rng.choice(PRODUCT_STYLES)} {product_number}"
+    base_cost = round(min(2500.0, rng.lognormvariate(2.5, 1.0)), 2)
+
+    tier_prices = [''] * 6
+    if rng.random() < TIERED_SHARE:
+        has_tiers = 'Y'
+        tier_info = rng.choice(TIER_STRUCTURES)
+        no_tier_cost = 'NA'
+        price = base_cost
+        for tier in range(tier_info.count(':')):
+            tier_prices[tier] = money(price)
+            price *= 1 - rng.uniform(0.03, 0.08)  # Each tier a little cheaper
+    else:
+        has_tiers = 'N'
+        tier_info = 'NA'
+        no_tier_cost = money(base_cost)
+
+    if rng.random() < CUSTOMIZATION_SHARE:
+        setup_fee = money(rng.choice([25, 50, 75, 100, 150]))
+        per_unit = money(round(rng.uniform(0.5, 6.0), 2))
+        customization_info = rng.choice(['Custom labels', 'Logo embroidery', 'Engraving', 'Custom packaging'])
+    else:
+        setup_fee = per_unit = customization_info = ''
+
+    tariff = rng.choice(TARIFF_FORMATS)
+    if '{' in tariff:
+        tariff = tariff.format(rng.choice([10, 15, 25, 25.5, 50]))
+    msrp = money(base_cost * rng.uniform(2.0, 3.0)) if rng.random() < MSRP_SHARE else ''
+
+    return [
+        partner, product, f"SKU-{product_number:07d}", has_tiers, tier_info, no_tier_cost, *tier_prices,
+        setup_fee, per_unit, customization_info, rng.choice(COUNTRIES),
+        f"Handmade {product_type.lower()} made by artisans.", rng.choice(['', money(40), money(25)]),
+        tariff, 'Estimate - confirm with partner' if tariff else '', msrp
+    ]
+
+
+def generate_catalog(num_products, num_partners, seed=0):
+    """
+    Generate the three sheets as row iterators of cell text (no layout rows).
+    Returns {sheet_name: (headers, rows)}; Template rows are generated lazily.
+    """
+    rng = random.Random(seed)
+    partners = partner_names(num_partners)
+
+    def template_rows():
+        for product_number in range(1, num_products + 1):
+            partner = partners[rng.randrange(num_partners)]
+            yield generate_product_row(rng, partner, product_number)
+
+    partner_rows = [
+        [partner, rng.choice(TIER_STRUCTURES), 'Contact partner for custom work', 'Estimated 10-50% tariff', '']
+        for partner in partners
+    ]
+    return {
+        "Template": (TEMPLATE_HEADERS, template_rows()),
+        "Metadata": (None, METADATA_ROWS),
+        "Partner-Specific Info": (PARTNER_INFO_HEADERS, partner_rows),
+    }
+
+
+def sheet_rows(sheet_name, headers, rows, layout):
+    """Lay out a sheet like the Google Sheet: title rows, header row, data (first column blank)."""
+    titles = TITLE_ROWS[sheet_name]
+    preamble = [[] for _ in range(layout['header_row'])]
+    for i, title in enumerate(titles[:max(0, len(preamble) - 1)]):
+        preamble[i + 1] = ['', title]
+    if headers is None:
+        # Metadata: the title is the header row
+        yield from preamble
+        yield ['', titles[0]]
+        yield from rows
+        return
+    yield from preamble
+    yield [''] + headers
+    for row in rows:
+        yield [''] + row
+
+
+def write_catalog(output, num_products, num_partners, seed=0):
+    """Write the catalog to a CSV folder, or to an .xlsx workbook if output ends in .xlsx."""
+    output = Path(output)
+    sheets = generate_catalog(num_products, num_partners, seed)
+
+    if output.suffix == '.xlsx':
+        from openpyxl import Workbook  # Only needed for .xlsx output
+
+        workbook = Workbook(write_only=True)
+        for sheet_name, (headers, rows) in sheets.items():
+            worksheet = workbook.create_sheet(sheet_name)
+            for row in sheet_rows(sheet_name, headers, rows, TEMPLATE_FILE_LAYOUTS[sheet_name]):
+                worksheet.append(row)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        workbook.save(output)
+        return
+
+    output.mkdir(parents=True, exist_ok=True)
+    for sheet_name, (headers, rows) in sheets.items():
+        with open(output / f"{sheet_name}.csv", 'w', newline='', encoding='utf-8') as handle:
+            csv.writer(handle).writerows(sheet_rows(sheet_name, headers, rows, SHEET_LAYOUTS[sheet_name]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic pricing catalog for scale testing.")
+    parser.add_argument('--products', type=int, default=10000, help="Number of products (default: 10000)")
+    parser.add_argument('--partners', type=int, default=100, help="Number of partners (default: 100)")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed, for repeatable catalogs (default: 0)")
+    parser.add_argument('--output', required=True, help="Output folder (CSV files) or .xlsx file")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    write_catalog(args.output, args.products, args.partners, args.seed)
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {args.products} products from {args.partners} partners to {args.output} in {elapsed:.1f}s",
+          file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,249 @@
+"""
+Batch quoting from the command line (no Streamlit needed).
+Reads order requests from a CSV or JSONL file and streams out priced quotes,
+using the same pricing functions as app.py (see pricing.py).
+
+Catalog: the "Download Pricing Data (CSV)" file from the app sidebar,
+or the app's local snapshot (.pricing_snapshot/template.parquet).
+
+Order request fields (CSV columns or JSON keys):
+    partner, product, quantity          (required)
+    markup_percent                      (default 100)
+    include_customization               (default no)
+    customization_setup_fee, customization_per_unit   (default from catalog)
+    customization_minimum_qty           (default none)
+    tariff_rate_percent                 (default from catalog)
+
+Usage:
+    python scripts/quote_orders.py --catalog pricing_data.csv --orders orders.csv > quotes.csv
+    python scripts/quote_orders.py --catalog .pricing_snapshot/template.parquet --orders orders.jsonl --format jsonl
+    cat orders.jsonl | python scripts/quote_orders.py --catalog pricing_data.csv --input-format jsonl
+
+The input format comes from --input-format, else from the file extension
+(.csv / .jsonl / .json), else (stdin) from the first non-blank character ('{' = JSONL).
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import math
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+# Make pricing.py (in the project root) importable when run as a script
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pricing import (
+    build_catalog_index,
+    calculate_product_totals,
+    clean_price,
+    compile_pricing_table,
+    get_unit_price,
+    parse_tariff_rate,
+    prepare_catalog
+)
+
+QUOTE_FIELDS = [
+    'partner', 'product', 'quantity', 'markup_percent', 'base_price', 'tier_range',
+    'product_subtotal', 'customization_setup_total', 'customization_unit_total',
+    'markup_amount', 'product_total', 'total_per_unit', 'tariff_rate_percent',
+    'tariff_amount', 'error'
+]
+REQUIRED_FIELDS = ['partner', 'product']  # Orders without these stop the run (wrong file or columns)
+
+
+def load_catalog(path):
+    """
+    Load the Template catalog from a CSV export or a Parquet snapshot.
+    Returns (pricing_table, rows_by_key).
+    """
+    path = Path(path)
+    if path.suffix == '.parquet':
+        df_template = pd.read_parquet(path)
+    else:
+        # Read every cell as text, exactly like the Google Sheet values
+        df_template = pd.read_csv(path, dtype=str, keep_default_na=False)
+    df_template = prepare_catalog(df_template)
+
+    return compile_pricing_table(df_template), build_catalog_index(df_template)['rows_by_key']
+
+
+def detect_input_format(path, lines):
+    """
+    Input format for an orders file: from the extension, else from the first
+    non-blank character ('{' = JSONL, anything else = CSV).
+    Returns (format, lines) - lines still include anything read to sniff.
+    """
+    if path.endswith('.jsonl') or path.endswith('.json'):
+        return 'jsonl', lines
+    if path.endswith('.csv'):
+        return 'csv', lines
+
+    lines = iter(lines)
+    leading = []
+    for line in lines:
+        leading.append(line)
+        if line.strip():
+            break
+    first_character = ''.join(leading).strip()[:1]
+    return ('jsonl' if first_character == '{' else 'csv'), itertools.chain(leading, lines)
+
+
+def read_orders(path, input_format=None):
+    """
+    Yield order requests (dicts) from a CSV or JSONL file ('-' = stdin).
+    input_format: 'csv' or 'jsonl', or None to detect it (see detect_input_format).
+    """
+    handle = sys.stdin if path == '-' else open(path, newline='')
+    try:
+        lines = handle
+        if input_format is None:
+            input_format, lines = detect_input_format(path, handle)
+
+        if input_format == 'jsonl':
+            for line_number, line in enumerate(lines, 1):
+                if not line.strip():
+                    continue
+                try:
+                    order = json.loads(line)
+                except json.JSONDecodeError as e:
+                    raise ValueError(f"line {line_number} is not valid JSON ({e})") from e
+                if not isinstance(order, dict):
+                    raise ValueError(f"line {line_number} is not a JSON object")
+                yield order
+        else:
+            reader = csv.DictReader(lines)
+            missing = [field for field in REQUIRED_FIELDS if field not in (reader.fieldnames or REQUIRED_FIELDS)]
+            if missing:
+                raise ValueError(f"CSV header is missing {', '.join(missing)} (columns found: {', '.join(reader.fieldnames)})")
+            yield from reader
+    finally:
+        if handle is not sys.stdin:
+            handle.close()
+
+
+def check_required_fields(order, order_number):
+    """Raise ValueError if an order request is missing partner or product."""
+    missing = [field for field in REQUIRED_FIELDS if order.get(field) is None]
+    if missing:
+        raise ValueError(f"order {order_number} is missing {', '.join(missing)} "
+                         f"(fields found: {', '.join(map(str, order)) or 'none'})")
+
+
+def is_yes(value):
+    """Read booleans from CSV text or JSON ('Y', 'yes', 'true', '1', True)."""
+    return str(value).strip().lower() in ('y', 'yes', 'true', '1')
+
+
+def number_or_default(value, default):
+    """
+    Parse a number from an order field, using default when the field is blank.
+    Raises ValueError for text that isn't a finite number ('abc', 'inf', '1e400').
+    """
+    if value is None or str(value).strip() == '':
+        return default
+    number = float(value)
+    if not math.isfinite(number):
+        raise ValueError(f"{value!r} is not a finite number")
+    return number
+
+
+def price_order(order, pricing_table, rows_by_key):
+    """Price one order request. Returns a quote dict (with 'error' set if it can't be priced)."""
+    quote = {field: '' for field in QUOTE_FIELDS}
+    quote['partner'] = order.get('partner', '')
+    quote['product'] = order.get('product', '')
+
+    try:
+        row = rows_by_key.get((quote['partner'], quote['product']))
+        if row is None:
+            raise ValueError("product not found in catalog")
+
+        quantity = int(number_or_default(order.get('quantity'), 0))
+        if quantity < 1:
+            raise ValueError("quantity must be at least 1")
+        markup_percent = number_or_default(order.get('markup_percent'), 100.0)
+
+        base_price, tier_range, _ = get_unit_price(pricing_table, row, quantity)
+        if base_price is None:
+            raise ValueError("no pricing available for this quantity")
+
+        setup_fee = 0
+        per_unit = 0
+        effective_custom_qty = quantity
+        if is_yes(order.get('include_customization', '')):
+            setup_fee = number_or_default(order.get('customization_setup_fee'),
+                                          clean_price(row.get('Customization Setup Fee', '')) or 0)
+            per_unit = number_or_default(order.get('customization_per_unit'),
+                                         clean_price(row.get('Customization Cost per Unit', '')) or 0)
+            effective_custom_qty = max(quantity, int(number_or_default(order.get('customization_minimum_qty'), 0)))
+
+        tariff_rate = number_or_default(order.get('tariff_rate_percent'),
+                                        parse_tariff_rate(row.get('Tariff Estimate (if available)', '')))
+
+        totals = calculate_product_totals(
+            base_price,
+            quantity,
+            markup_percent,
+            customization_setup_fee=setup_fee,
+            customization_per_unit=per_unit,
+            effective_custom_qty=effective_custom_qty,
+            tariff_rate_percent=tariff_rate
+        )
+    except (ValueError, TypeError) as e:
+        quote['error'] = str(e)
+        return quote
+
+    quote.update({
+        'quantity': quantity,
+        'markup_percent': markup_percent,
+        'base_price': round(base_price, 2),
+        'tier_range': tier_range,
+        'tariff_rate_percent': tariff_rate
+    })
+    for field in ['product_subtotal', 'customization_setup_total', 'customization_unit_total',
+                  'markup_amount', 'product_total', 'total_per_unit', 'tariff_amount']:
+        quote[field] = round(totals[field], 2)
+    return quote
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Price a file of order requests without running the app.")
+    parser.add_argument('--catalog', required=True, help="Pricing data CSV export or template.parquet snapshot")
+    parser.add_argument('--orders', default='-', help="Order requests (.csv or .jsonl), '-' for stdin")
+    parser.add_argument('--input-format', choices=['csv', 'jsonl'],
+                        help="Orders format (default: from the file extension, or detected on stdin)")
+    parser.add_argument('--format', choices=['csv', 'jsonl'], default='csv', help="Output format (default: csv)")
+    args = parser.parse_args()
+
+    pricing_table, rows_by_key = load_catalog(args.catalog)
+
+    if args.format == 'csv':
+        writer = csv.DictWriter(sys.stdout, fieldnames=QUOTE_FIELDS)
+        writer.writeheader()
+        write_quote = writer.writerow
+    else:
+        def write_quote(quote):
+            sys.stdout.write(json.dumps(quote) + '\n')
+
+    start = time.perf_counter()
+    count = 0
+    try:
+        for order in read_orders(args.orders, args.input_format):
+            check_required_fields(order, count + 1)
+            write_quote(price_order(order, pricing_table, rows_by_key))
+            count += 1
+    except ValueError as e:
+        sys.exit(f"Error reading orders: {e}")
+
+    elapsed = time.perf_counter() - start
+    rate = count / elapsed if elapsed > 0 else 0
+    print(f"Priced {count} quotes in {elapsed:.2f}s ({rate:.0f} quotes/s)", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,85 +1,54 @@
 """
 Test complete data loading function with the fix
+Uses the app's own loader (catalog_source.py), so there is no copy to keep in sync.
+
+Usage:
+    streamlit run scripts/test_data_loading.py                      (Google Sheet, needs secrets)
+    python scripts/test_data_loading.py "templates/Partner Specific Pricing Template.xlsx"   (offline)
 """
 
-import gspread
-from google.oauth2.service_account import Credentials
-import pandas as pd
-import streamlit as st
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Make the app modules (in the project root) importable when run as a script
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from catalog_source import GoogleSheetsSource, LocalFileSource, load_catalog_frames
+from pricing import build_catalog_index, catalog_to_sheet_text, compile_pricing_table
+from quote_orders import load_catalog, price_order
+
+SPREADSHEET_NAME = "master_pricing_template_10_14"
+ROUND_TRIP_QUANTITIES = [1, 25, 50, 100, 250, 500, 1000, 5000]  # Quantities quoted in the CSV export round trip
+
+def open_spreadsheet():
+    """Open the pricing Google Sheet with the service account in st.secrets."""
+    import streamlit as st
+    from google.oauth2.service_account import Credentials
+    from sheets_client import authorize
 
-def load_pricing_data():
-    """
-    Load pricing data from master_pricing_template_10_14 Google Sheet.
-    Loads three sheets: Template, Metadata, Partner-Specific Info
-    Returns three DataFrames.
-    """
     creds_info = st.secrets["gcp_service_account"]
     scopes = [
         "https://www.googleapis.com/auth/spreadsheets",
         "https://www.googleapis.com/auth/drive"
     ]
     creds = Credentials.from_service_account_info(creds_info, scopes=scopes)
-    gc = gspread.authorize(creds)
-
-    spreadsheet = gc.open("master_pricing_template_10_14")
-
-    # Load Template sheet (header at row 6, index 5)
-    template_sheet = spreadsheet.worksheet("Template")
-    template_values = template_sheet.get_all_values()
-
-    # Row 6 has headers, but first column is empty - skip it
-    raw_headers = template_values[5]
-    raw_data = template_values[6:]
-
-    # Find first non-empty column index
-    first_col_idx = 0
-    for i, header in enumerate(raw_headers):
-        if header.strip():
-            first_col_idx = i
-            break
-
-    # Extract headers and data starting from first non-empty column
-    template_headers = [col.strip() for col in raw_headers[first_col_idx:]]
-    template_data = [row[first_col_idx:] for row in raw_data]
-
-    df_template = pd.DataFrame(template_data, columns=template_headers)
-
-    # Remove empty rows (where Partner column is empty)
-    df_template = df_template[df_template['Partner'].str.strip() != '']
+    return authorize(creds).open(SPREADSHEET_NAME)
 
-    # Load Metadata sheet (header at row 2, index 1)
-    metadata_sheet = spreadsheet.worksheet("Metadata")
-    metadata_values = metadata_sheet.get_all_values()
-    metadata_headers = [col.strip() if col else f"Unnamed_{i}" for i, col in enumerate(metadata_values[1])]
-    metadata_data = metadata_values[2:]
-    df_metadata = pd.DataFrame(metadata_data, columns=metadata_headers)
-
-    # Load Partner-Specific Info sheet (header at row 2, index 1)
-    partner_sheet = spreadsheet.worksheet("Partner-Specific Info")
-    partner_values = partner_sheet.get_all_values()
-
-    # Row 2 has headers, may have empty first column - skip it
-    raw_partner_headers = partner_values[1]
-    raw_partner_data = partner_values[2:]
-
-    # Find first non-empty column index for partner sheet
-    first_partner_col_idx = 0
-    for i, header in enumerate(raw_partner_headers):
-        if header.strip():
-            first_partner_col_idx = i
-            break
-
-    # Extract headers and data starting from first non-empty column
-    partner_headers = [col.strip() if col else f"Unnamed_{i}" for i, col in enumerate(raw_partner_headers[first_partner_col_idx:])]
-    partner_data = [row[first_partner_col_idx:] for row in raw_partner_data]
-
-    df_partner_info = pd.DataFrame(partner_data, columns=partner_headers)
-
-    # Remove empty rows from partner info (only if Partner column exists)
-    if 'Partner' in df_partner_info.columns:
-        df_partner_info = df_partner_info[df_partner_info['Partner'].str.strip() != '']
-
-    return df_template, df_metadata, df_partner_info
+def load_pricing_data():
+    """
+    Load pricing data from master_pricing_template_10_14 Google Sheet
+    (or the local file given on the command line).
+    Loads three sheets: Template, Metadata, Partner-Specific Info
+    Returns three DataFrames.
+    """
+    if len(sys.argv) > 1:
+        source = LocalFileSource(sys.argv[1])
+    else:
+        source = GoogleSheetsSource(open_spreadsheet, SPREADSHEET_NAME)
+    return load_catalog_frames(source)
 
 # Run the test
 print("="*80)
@@ -87,7 +56,9 @@ print("Testing complete data loading function...")
 print("="*80)
 
 try:
+    load_start = time.perf_counter()
     df_template, df_metadata, df_partner_info = load_pricing_data()
+    print(f"\nLoaded in {time.perf_counter() - load_start:.2f}s")
 
     print("\n✓ Template Sheet:")
     print(f"  Rows: {len(df_template)}")
@@ -118,6 +89,29 @@ try:
     print(f"PBP Cost: Tier 1: {sample['PBP Cost: Tier 1']}")
     print(f"Customization Setup Fee: {sample['Customization Setup Fee']}")
 
+    # The sidebar's "Download Pricing Data (CSV)" is the catalog input of scripts/quote_orders.py:
+    # quotes from the exported file must match quotes from the loaded catalog
+    print("\n" + "="*80)
+    print("CSV Export Round Trip (scripts/quote_orders.py):")
+    print("="*80)
+    with tempfile.TemporaryDirectory() as directory:
+        export_path = Path(directory) / "pricing_data.csv"
+        export_path.write_text(catalog_to_sheet_text(df_template).to_csv(index=False))
+        exported_table, exported_rows = load_catalog(export_path)
+
+    pricing_table = compile_pricing_table(df_template)
+    rows_by_key = build_catalog_index(df_template)['rows_by_key']
+    compared = 0
+    for partner, product in rows_by_key:
+        for quantity in ROUND_TRIP_QUANTITIES:
+            order = {'partner': partner, 'product': product, 'quantity': quantity, 'include_customization': 'Y'}
+            expected = price_order(order, pricing_table, rows_by_key)
+            exported = price_order(order, exported_table, exported_rows)
+            if exported != expected:
+                raise AssertionError(f"{partner} / {product} x {quantity}: export quotes {exported}, catalog quotes {expected}")
+            compared += 1
+    print(f"✓ {compared} quotes match ({len(rows_by_key)} products x {len(ROUND_TRIP_QUANTITIES)} quantities)")
+
     print("\n" + "="*80)
     print("✓✓✓ ALL TESTS PASSED! ✓✓✓")
     print("="*80)
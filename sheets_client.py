@@ -0,0 +1,98 @@
+"""
+Google Sheets HTTP client for the PBP Pricing App.
+A gspread HTTP client with a pooled keep-alive session, request timeouts,
+bounded concurrency and jittered exponential backoff on quota (429) and
+server (5xx) errors. No Streamlit dependency, so it can be tested against
+a local stub HTTP server.
+"""
+
+import random
+import threading
+import time
+
+import gspread
+import requests
+from gspread.exceptions import APIError
+from gspread.http_client import HTTPClient
+from requests.adapters import HTTPAdapter
+
+# Connection settings (soft-coded for easy modification)
+REQUEST_TIMEOUT = (5, 30)  # (connect, read) seconds
+MAX_RETRIES = 5  # Retries after the first attempt
+BACKOFF_BASE_SECONDS = 0.5  # Longest wait before retry 1; doubles for each retry
+BACKOFF_MAX_SECONDS = 16  # Longest wait before any retry
+MAX_CONCURRENT_REQUESTS = 4  # Requests in flight at once, shared by every user of the client
+POOL_SIZE = 10  # Keep-alive connections kept open per host
+
+# 408 request timeout, 429 quota exceeded, 5xx server errors
+RETRY_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+
+def should_retry(error):
+    """True if a failed request (gspread APIError) is worth retrying."""
+    # Use the HTTP status (error.code is -1 when the error body isn't JSON, e.g. from a proxy)
+    status = error.response.status_code
+    if status in RETRY_STATUS_CODES:
+        return True
+    # The Drive API reports quota errors as 403 with a usageLimits domain
+    if status == 403:
+        return any(detail.get('domain') == 'usageLimits' for detail in error.error.get('errors', []))
+    return False
+
+
+def backoff_delay(attempt, response=None):
+    """
+    Seconds to wait before retry number attempt + 1.
+    Full jitter: a random wait up to BACKOFF_BASE_SECONDS * 2^attempt (capped),
+    so users hitting the quota together don't all retry at the same moment.
+    A Retry-After header from the server is respected.
+    """
+    delay = random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+    if response is not None:
+        try:
+            delay = max(delay, min(BACKOFF_MAX_SECONDS, float(response.headers.get('Retry-After', 0))))
+        except ValueError:
+            pass
+    return delay
+
+
+class RetryingHTTPClient(HTTPClient):
+    """
+    gspread HTTP client with a pooled session, timeouts, bounded
+    concurrency and retries (see the connection settings above).
+    Pass it to gspread.authorize(..., http_client=RetryingHTTPClient),
+    or create it with auth=None and a plain requests.Session for testing.
+    """
+
+    def __init__(self, auth, session=None):
+        super().__init__(auth, session)
+
+        # Keep-alive connection pool (the session is reused for every request)
+        adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self.timeout = REQUEST_TIMEOUT
+        self.request_slots = threading.BoundedSemaphore(MAX_CONCURRENT_REQUESTS)
+
+    def request(self, *args, **kwargs):
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                with self.request_slots:
+                    return super().request(*args, **kwargs)
+            except APIError as error:
+                if attempt == MAX_RETRIES or not should_retry(error):
+                    raise
+                delay = backoff_delay(attempt, error.response)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if attempt == MAX_RETRIES:
+                    raise
+                delay = backoff_delay(attempt)
+
+            # Wait outside the request slot so other requests can go ahead
+            time.sleep(delay)
+
+
+def authorize(credentials):
+    """Create a gspread client that uses RetryingHTTPClient."""
+    return gspread.authorize(credentials, http_client=RetryingHTTPClient)